@@ -0,0 +1 @@
+"""Benchmarks for the SNF simulations package, run with airspeed velocity (asv)."""
@@ -0,0 +1,158 @@
+"""Benchmarks for creating casks and calculating their spectra."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from snf_simulations.cask import Cask
+from snf_simulations.data import get_example_tbq_path, get_nuclide
+from snf_simulations.data.mendeleev import IsotopeProperties
+from snf_simulations.data.synthetic import write_tabqfile
+from snf_simulations.evolution import CaskEvolution
+from snf_simulations.spec import Spectrum
+
+
+class TimeCaskFromTabqfile:
+    """Creating a Cask from the example .tbQ file."""
+
+    params = (["default", "all"],)
+    param_names = ["isotopes"]
+
+    def setup(self, isotopes: str) -> None:
+        """Copy the example file without the summary row for other nuclides.
+
+        The "<other>" row can't be parsed as an isotope, so it has to be removed
+        before using isotopes="all".
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = Path(self.tmp_dir.name) / "example.tbQ"
+        lines = get_example_tbq_path().read_text().splitlines(keepends=True)
+        self.filepath.write_text(
+            "".join(line for line in lines if not line.startswith("<other>"))
+        )
+
+    def teardown(self, isotopes: str) -> None:
+        """Remove the copied file."""
+        self.tmp_dir.cleanup()
+
+    def time_from_tabqfile(self, isotopes: str) -> None:
+        """Time Cask.from_tabqfile."""
+        Cask.from_tabqfile(
+            self.filepath,
+            total_mass=10000,
+            isotopes=None if isotopes == "default" else isotopes,
+        )
+
+
+class TimeCaskTotalSpectrum:
+    """Calculating the total spectrum of a cask at many cooling times."""
+
+    params = ([1, 10, 100],)
+    param_names = ["n_times"]
+
+    def setup(self, n_times: int) -> None:
+        """Create the Cask and the cooling times."""
+        self.cask = Cask.from_tabqfile(get_example_tbq_path(), total_mass=10000)
+        self.cooling_times = np.linspace(0.5, 50, n_times)
+
+    def time_get_total_spectrum(self, n_times: int) -> None:
+        """Time get_total_spectrum at each cooling time."""
+        for cooling_time in self.cooling_times:
+            self.cask.get_total_spectrum(cooling_time=cooling_time)
+
+
+class TimeCaskManyIsotopes:
+    """Calculating the activities and spectra of a cask with many isotopes."""
+
+    params = ([100, 3000], [1, 1000])
+    param_names = ["n_isotopes", "n_times"]
+
+    def setup(self, n_isotopes: int, n_times: int) -> None:
+        """Create a Cask with random masses and half-lives, sharing one spectrum."""
+        rng = np.random.default_rng(1234)
+        isotopes = [
+            get_nuclide(10000 * z + 10 * mass_number).name
+            for z in range(1, 31)
+            for mass_number in range(100, 200)
+        ][:n_isotopes]
+        spec = Spectrum.from_isotope("Sr90", frozen=True)
+        self.cask = Cask(
+            isotope_masses=dict(
+                zip(isotopes, rng.uniform(0, 10, n_isotopes).tolist(), strict=True)
+            ),
+            initial_cooling_time=0.5,
+            isotope_properties={
+                isotope: IsotopeProperties(
+                    molar_mass=100.0,
+                    half_life=float(half_life),
+                    decay_modes=["B-"],
+                )
+                for isotope, half_life in zip(
+                    isotopes, rng.uniform(0.1, 100, n_isotopes), strict=True
+                )
+            },
+            isotope_spectra=dict.fromkeys(isotopes, spec),
+        )
+        self.cooling_times = np.linspace(0.5, 50, n_times)
+        # The component basis is only calculated once for each cask.
+        self.cask.get_component_basis()
+
+    def time_get_component_activities(self, n_isotopes: int, n_times: int) -> None:
+        """Time get_component_activities at every cooling time at once."""
+        self.cask.get_component_activities(self.cooling_times)
+
+    def time_get_component_spectra(self, n_isotopes: int, n_times: int) -> None:
+        """Time get_component_spectra at one cooling time."""
+        self.cask.get_component_spectra(cooling_time=10)
+
+    def time_get_total_spectrum(self, n_isotopes: int, n_times: int) -> None:
+        """Time get_total_spectrum at each cooling time."""
+        for cooling_time in self.cooling_times:
+            self.cask.get_total_spectrum(cooling_time=cooling_time)
+
+
+class TimeCaskFromLargeTabqfile:
+    """Creating a Cask from a synthetic .tbQ file at production scale."""
+
+    params = ([1000, 3000], [1, 100])
+    param_names = ["n_nuclides", "n_steps"]
+
+    def setup(self, n_nuclides: int, n_steps: int) -> None:
+        """Write the synthetic file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = write_tabqfile(
+            Path(self.tmp_dir.name) / "synthetic.tbQ",
+            n_nuclides=n_nuclides,
+            n_steps=n_steps,
+            seed=1234,
+        )
+
+    def teardown(self, n_nuclides: int, n_steps: int) -> None:
+        """Remove the synthetic file."""
+        self.tmp_dir.cleanup()
+
+    def time_from_tabqfile(self, n_nuclides: int, n_steps: int) -> None:
+        """Time Cask.from_tabqfile with the default isotopes."""
+        Cask.from_tabqfile(self.filepath, total_mass=10000)
+
+
+class TimeCaskEvolution:
+    """Evaluating the total spectrum of a cask at any time from a precomputed grid."""
+
+    def setup(self) -> None:
+        """Create the Cask and its evolution over 100 years."""
+        self.cask = Cask.from_tabqfile(get_example_tbq_path(), total_mass=10000)
+        self.evolution = CaskEvolution(self.cask, max_time=100, max_energy=6000)
+
+    def time_create(self) -> None:
+        """Time calculating and refining the grid of spectra."""
+        CaskEvolution(self.cask, max_time=100, max_energy=6000)
+
+    def time_get_spectrum(self) -> None:
+        """Time interpolating the spectrum at one cooling time."""
+        self.evolution.get_spectrum(42.1)
+
+    def time_get_spectrum_exact(self) -> None:
+        """Time calculating the exact spectrum at one cooling time."""
+        self.evolution.get_spectrum(42.1, exact=True)
@@ -0,0 +1,70 @@
+"""Benchmarks for the calculations behind the dashboard tabs.
+
+These are skipped if the optional dashboard dependencies are not installed.
+"""
+
+from types import ModuleType
+
+from snf_simulations.cask import Cask
+from snf_simulations.data import get_example_tbq_path
+
+
+def _import_dashboard() -> ModuleType:
+    """Import the dashboard module, or skip the benchmark if it is unavailable."""
+    try:
+        from snf_simulations import dashboard  # noqa: PLC0415
+    except ImportError as e:
+        # asv skips benchmarks that raise NotImplementedError in setup
+        raise NotImplementedError from e
+    return dashboard
+
+
+class TimeDashboardCoolingTimes:
+    """Calculating the dashboard tabs that show every selected cooling time."""
+
+    params = ([1, 4, 10],)
+    param_names = ["n_times"]
+
+    def setup(self, n_times: int) -> None:
+        """Create the Cask used by the dashboard."""
+        self.dashboard = _import_dashboard()
+        self.cask = Cask.from_tabqfile(get_example_tbq_path(), total_mass=10000)
+        self.cooling_times = [0.5 + i for i in range(n_times)]
+        self.cask_spectra = self.dashboard.calculate_cask_spectra(
+            self.cask, self.cooling_times
+        )
+
+    def time_cask_spectra(self, n_times: int) -> None:
+        """Time the cask simulations tab."""
+        self.dashboard.calculate_cask_spectra(self.cask, self.cooling_times)
+
+    def time_scale_cask_spectra(self, n_times: int) -> None:
+        """Time rescaling the cask simulations tab for a new mass."""
+        self.dashboard.scale_results(self.cask_spectra, 2.0)
+
+    def time_detector_rates(self, n_times: int) -> None:
+        """Time the detector simulations tab."""
+        self.dashboard.calculate_detector_rates(
+            self.cask,
+            self.cooling_times,
+            detector_volume=1.2,
+            detector_distance=40,
+            efficiencies=(0.3, 0.5),
+        )
+
+
+class TimeDashboardSingleTime:
+    """Calculating the dashboard tabs that show a single cooling time."""
+
+    def setup(self) -> None:
+        """Create the Cask used by the dashboard."""
+        self.dashboard = _import_dashboard()
+        self.cask = Cask.from_tabqfile(get_example_tbq_path(), total_mass=10000)
+
+    def time_component_spectra(self) -> None:
+        """Time the component spectra tab."""
+        self.dashboard.calculate_component_spectra(self.cask, 5.0)
+
+    def time_sampled_spectrum(self) -> None:
+        """Time the spectrum sampling tab."""
+        self.dashboard.calculate_sampled_spectrum(self.cask, 5.0, n_samples=100000)
@@ -0,0 +1,32 @@
+"""Benchmarks for loading input data files."""
+
+import tempfile
+from pathlib import Path
+
+from snf_simulations.data.fispin import load_tabqfile
+from snf_simulations.data.synthetic import write_tabqfile
+
+
+class TimeLoadTabqfile:
+    """Loading synthetic FISPIN .tbQ files of different sizes."""
+
+    params = ([20, 1000, 3000], [1, 10, 100])
+    param_names = ["n_nuclides", "n_steps"]
+
+    def setup(self, n_nuclides: int, n_steps: int) -> None:
+        """Write the synthetic file."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = write_tabqfile(
+            Path(self.tmp_dir.name) / "synthetic.tbQ",
+            n_nuclides=n_nuclides,
+            n_steps=n_steps,
+            seed=1234,
+        )
+
+    def teardown(self, n_nuclides: int, n_steps: int) -> None:
+        """Remove the synthetic file."""
+        self.tmp_dir.cleanup()
+
+    def time_load_tabqfile(self, n_nuclides: int, n_steps: int) -> None:
+        """Time load_tabqfile."""
+        load_tabqfile(self.filepath)
@@ -0,0 +1,37 @@
+"""Benchmarks for the Spectrum class."""
+
+import numpy as np
+
+from snf_simulations.spec import Spectrum
+
+
+class TimeSpectrum:
+    """Integrating and equalising an isotope spectrum."""
+
+    params = (["Sr90", "Y90", "Rh106"],)
+    param_names = ["isotope"]
+
+    def setup(self, isotope: str) -> None:
+        """Load the isotope spectrum."""
+        self.spec = Spectrum.from_isotope(isotope)
+
+    def time_integrate(self, isotope: str) -> None:
+        """Time integrating the whole spectrum."""
+        self.spec.integrate()
+
+    def time_integrate_partial(self, isotope: str) -> None:
+        """Time integrating with bounds that fall partway through bins."""
+        self.spec.integrate(
+            lower_energy=0.1 * self.spec.energy[-1],
+            upper_energy=0.9 * self.spec.energy[-1],
+        )
+
+    def time_integrate_thresholds(self, isotope: str) -> None:
+        """Time integrating above 1000 different thresholds."""
+        thresholds = np.linspace(0, self.spec.energy[-1], 1001)[:-1]
+        self.spec.integrate_many(thresholds, self.spec.energy[-1])
+
+    def time_equalise(self, isotope: str) -> None:
+        """Time equalising to 1 keV bins up to 6 MeV."""
+        spec = Spectrum(self.spec.energy, self.spec.flux, self.spec.errors)
+        spec.equalise(width=1, min_energy=0, max_energy=6000)
@@ -0,0 +1,43 @@
+"""Benchmarks for the histogram utility functions."""
+
+import numpy as np
+
+from snf_simulations.utils import linear_interpolate_with_errors, sample_histogram
+
+
+class TimeLinearInterpolate:
+    """Interpolating a histogram onto a new binning."""
+
+    params = ([100, 1000, 10000], [1, 10])
+    param_names = ["n_bins", "width"]
+
+    def setup(self, n_bins: int, width: float) -> None:
+        """Create an irregular histogram to interpolate."""
+        rng = np.random.default_rng(1234)
+        self.edges = np.cumsum(rng.uniform(0.5, 5, n_bins + 1))
+        self.content = rng.uniform(0, 1e10, n_bins)
+        self.errors = self.content * 0.01
+        self.new_edges = np.arange(0, self.edges[-1] + width, width)
+
+    def time_linear_interpolate_with_errors(self, n_bins: int, width: float) -> None:
+        """Time linear_interpolate_with_errors."""
+        linear_interpolate_with_errors(
+            self.edges, self.content, self.errors, self.new_edges
+        )
+
+
+class TimeSampleHistogram:
+    """Sampling values from a histogram."""
+
+    params = ([1000, 100000, 1000000],)
+    param_names = ["n_samples"]
+
+    def setup(self, n_samples: int) -> None:
+        """Create a histogram to sample from."""
+        rng = np.random.default_rng(1234)
+        self.edges = np.arange(0, 6001, 1.0)
+        self.content = rng.uniform(0, 1e10, 6000)
+
+    def time_sample_histogram(self, n_samples: int) -> None:
+        """Time sample_histogram."""
+        sample_histogram(self.edges, self.content, n_samples=n_samples, seed=1)
@@ -0,0 +1,234 @@
+"""Store many spectra in a single binary archive file, and load them back in bulk.
+
+Archives are uncompressed NumPy .npz files, with the spectra packed end to end
+into a few flat arrays. Spectra sharing the same energy binning only store it
+once. As the arrays aren't compressed they can be memory-mapped, so opening an
+archive is almost instant however many spectra it contains, and only the spectra
+that are used are read from disk.
+"""
+
+import json
+import struct
+import zipfile
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+import numpy as np
+
+from .spec import Spectrum
+
+# Version of the archive layout, stored in each file.
+_ARCHIVE_VERSION = 1
+
+# Size of the fixed part of a zip local file header, and the offset of the
+# file name and extra field lengths within it.
+_ZIP_LOCAL_HEADER_SIZE = 30
+_ZIP_NAME_LENGTHS_OFFSET = 26
+
+
+def write_spectra(
+    filepath: str | Path,
+    spectra: Mapping[str, Spectrum] | Sequence[Spectrum],
+    metadata: Mapping | None = None,
+) -> Path:
+    """Write many spectra to a single archive file.
+
+    Args:
+        filepath: Path to write the archive to. The suffix is set to ".npz".
+        spectra: The spectra to write, either as a dictionary mapping names to
+            spectra or as a list of spectra. For a list, the name of each spectrum
+            is used, or its index if it doesn't have a name.
+        metadata: Optional dictionary of extra information to store with the
+            spectra, e.g. the settings used to create them.
+            Must be JSON-serialisable.
+
+    Returns:
+        The path to the archive.
+
+    """
+    if isinstance(spectra, Mapping):
+        names = [str(name) for name in spectra]
+        spectra = list(spectra.values())
+    else:
+        names = [
+            spec.name if spec.name is not None else str(i)
+            for i, spec in enumerate(spectra)
+        ]
+    if not spectra:
+        msg = "spectra must not be empty"
+        raise ValueError(msg)
+    if len(set(names)) != len(names):
+        msg = "Spectrum names must be unique"
+        raise ValueError(msg)
+
+    # Find the unique energy grids. Interned grids are the same object, so most
+    # can be matched without comparing the values.
+    grids: list[np.ndarray] = []
+    grid_index = np.empty(len(spectra), dtype=np.int64)
+    for i, spec in enumerate(spectra):
+        for j, grid in enumerate(grids):
+            if grid is spec.energy or np.array_equal(grid, spec.energy):
+                grid_index[i] = j
+                break
+        else:
+            grid_index[i] = len(grids)
+            grids.append(spec.energy)
+
+    dtype = np.result_type(*(spec.flux for spec in spectra))
+    arrays = {
+        "version": np.array(_ARCHIVE_VERSION),
+        "names": np.array(names, dtype=str),
+        "metadata": np.array(json.dumps(dict(metadata or {}))),
+        "energy": np.concatenate(grids).astype(np.float64),
+        "grid_starts": np.cumsum([0] + [len(grid) for grid in grids]),
+        "grid_index": grid_index,
+        "flux": np.concatenate([spec.flux for spec in spectra]).astype(dtype),
+        "errors": np.concatenate([spec.errors for spec in spectra]).astype(dtype),
+        "starts": np.cumsum([0] + [len(spec.flux) for spec in spectra]),
+    }
+    filepath = Path(filepath).with_suffix(".npz")
+    np.savez(filepath, **arrays)
+    return filepath
+
+
+def _memmap_member(filepath: Path, zip_file: zipfile.ZipFile, name: str) -> np.ndarray:
+    """Memory-map an array stored uncompressed in an .npz file.
+
+    Falls back to reading the array into memory if it is compressed.
+    """
+    info = zip_file.getinfo(f"{name}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        with zip_file.open(info) as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    with open(filepath, "rb") as f:
+        # The local header can have a different extra field to the central
+        # directory, so read its length to find the start of the array file.
+        f.seek(info.header_offset)
+        header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack(
+            "<HH", header[_ZIP_NAME_LENGTHS_OFFSET:_ZIP_LOCAL_HEADER_SIZE]
+        )
+        f.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if not shape or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(
+        filepath,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+def read_spectra(
+    filepath: str | Path,
+    names: Sequence[str] | None = None,
+    mmap: bool = True,
+) -> dict[str, Spectrum]:
+    """Read spectra from an archive written using write_spectra.
+
+    Args:
+        filepath: Path to the archive.
+        names: Optional names of the spectra to read. If None, all are read.
+        mmap: If True, the spectra are frozen and backed by read-only
+            memory-mapped views of the file, so they are only read from disk when
+            used. Otherwise the arrays are read into memory.
+
+    Returns:
+        Dictionary mapping the names to the spectra, in the order they were written.
+
+    """
+    filepath = Path(filepath)
+    with zipfile.ZipFile(filepath) as zip_file:
+        members = {name.removesuffix(".npy") for name in zip_file.namelist()}
+        if "grid_index" not in members:
+            msg = f"{filepath} is not a spectrum archive"
+            raise ValueError(msg)
+        arrays = {}
+        for member in ["energy", "grid_starts", "grid_index", "flux", "errors"]:
+            array = _memmap_member(filepath, zip_file, member)
+            arrays[member] = array if mmap else np.array(array)
+        arrays["starts"] = np.array(_memmap_member(filepath, zip_file, "starts"))
+        all_names = [str(name) for name in _memmap_member(filepath, zip_file, "names")]
+
+    if names is None:
+        names = all_names
+    index = {name: i for i, name in enumerate(all_names)}
+    missing = [name for name in names if name not in index]
+    if missing:
+        msg = f"Spectra not found in {filepath}: {', '.join(missing)}"
+        raise ValueError(msg)
+
+    # Spectra with the same binning share a single energy array.
+    grid_starts = arrays["grid_starts"]
+    grids: dict[int, np.ndarray] = {}
+    spectra = {}
+    for name in names:
+        i = index[name]
+        grid = int(arrays["grid_index"][i])
+        if grid not in grids:
+            grids[grid] = arrays["energy"][grid_starts[grid] : grid_starts[grid + 1]]
+        start, end = arrays["starts"][i], arrays["starts"][i + 1]
+        spectra[name] = Spectrum(
+            grids[grid],
+            arrays["flux"][start:end],
+            arrays["errors"][start:end],
+            name=name,
+            frozen=mmap,
+        )
+    return spectra
+
+
+def read_metadata(filepath: str | Path) -> dict:
+    """Read the metadata stored in an archive written using write_spectra."""
+    with np.load(filepath, allow_pickle=False) as data:
+        return json.loads(str(data["metadata"]))
+
+
+def load_spectra_directory(
+    directory: str | Path,
+    pattern: str = "*",
+    mmap: bool = True,
+) -> dict[str, Spectrum]:
+    """Load every spectrum file in a directory.
+
+    CSV files (from Spectrum.write_csv), single spectrum .npz files (from
+    Spectrum.write_npz) and archives (from write_spectra) are all loaded.
+
+    Args:
+        directory: Directory containing the files.
+        pattern: Optional glob pattern to select the files, e.g. "scan_*".
+        mmap: If True, spectra in archives are memory-mapped (see read_spectra).
+
+    Returns:
+        Dictionary mapping names to spectra, in order of the file names.
+        Single spectra are named after their file (without the suffix), and
+        spectra from archives are named "<file name>/<spectrum name>".
+
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        msg = f"{directory} is not a directory"
+        raise ValueError(msg)
+
+    spectra = {}
+    for filepath in sorted(directory.glob(pattern)):
+        if filepath.suffix == ".csv":
+            spectra[filepath.stem] = Spectrum.from_file(filepath)
+        elif filepath.suffix == ".npz":
+            with zipfile.ZipFile(filepath) as zip_file:
+                is_archive = "grid_index.npy" in zip_file.namelist()
+            if is_archive:
+                for name, spec in read_spectra(filepath, mmap=mmap).items():
+                    spectra[f"{filepath.stem}/{name}"] = spec
+            else:
+                spectra[filepath.stem] = Spectrum.from_npz(filepath)
+    return spectra
@@ -1,13 +1,27 @@
 """Calculate antineutrino spectra for spent nuclear fuel casks."""
 
-from collections.abc import Collection
-from copy import deepcopy
+from collections.abc import Collection, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import cast
-
-from .data import get_isotope_masses, get_isotope_properties
+from typing import NamedTuple, cast
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from .data import (
+    get_isotope_masses,
+    get_isotope_properties,
+    get_nuclide,
+    get_nuclide_index,
+    load_tabqfiles,
+)
+from .data.fispin import TabqInventory
+from .data.mendeleev import IsotopeProperties
+from .data.nuclides import get_zais
 from .physics import DecayChain, get_decay_mass, get_isotope_activity
+from .profiling import profiled
 from .spec import Spectrum
+from .utils import get_energy_grid, linear_interpolate_with_errors
 
 # Define a default list of isotopes to include in the cask spectrum if the user doesn't
 # specify their own list.
@@ -30,87 +44,374 @@ DEFAULT_ISOTOPES = [
     "Ru106",
 ]
 
+# Default maximum number of threads used to load isotope data when creating a Cask.
+_MAX_WORKERS = 8
+
+# Maximum number of component bases with different binnings kept by each Cask.
+_MAX_BASES = 4
+
+# Decay chains producing additional beta-emitting daughters after removal.
+# All of these decay chains have a branching ratio of 1.
+# If any additional isotopes were to be added with decay chains
+# involving more beta emitting isotopes then they can be added here.
+# TODO: work out how these are selected, if we can define them dynamically
+# or from an input file then that would be ideal.
+DECAY_CHAINS = (
+    DecayChain("Sr90", "Y90"),
+    DecayChain("Ce144", "Pr144"),
+    DecayChain("Kr88", "Rb88"),
+    DecayChain("Ru106", "Rh106"),
+)
+
+
+class ComponentBasis(NamedTuple):
+    """Class to hold the component spectra of a cask on a common energy binning.
+
+    Each row of flux and errors is the spectrum for one component with an activity
+    of 1 Bq, so the total flux for any set of component activities is given by the
+    matrix product ``activities @ flux``.
+
+    Attributes:
+        energy: Array of N+1 energy bin edges (keV) shared by all components.
+        flux: Array of component fluxes (keV^-1 Bq^-1), with shape (M, N).
+        errors: Array of component flux uncertainties, with shape (M, N).
+        names: Names of the M components, matching get_component_spectra.
+
+    """
+
+    energy: np.ndarray
+    flux: np.ndarray
+    errors: np.ndarray
+    names: list[str]
+
+
+class IsotopeArrays:
+    """Class to hold the data for the isotopes in a cask as aligned arrays.
+
+    Element i of every array is for names[i], so the activities of every isotope
+    at any number of times are found with a few array operations, rather than a
+    dictionary lookup and a function call per isotope. The arrays are read-only.
+
+    Attributes:
+        names: Names of the N isotopes.
+        zais: Array of the ZAI ids of the isotopes (see data.nuclides).
+        masses: Array of the masses (kg).
+        molar_masses: Array of the molar masses (g/mol).
+        half_lives: Array of the half-lives (years).
+        decay_constants: Array of the decay constants (per year).
+        initial_activities: Array of the activities (Bq) of the masses.
+
+    """
+
+    __slots__ = (
+        "_index",
+        "decay_constants",
+        "half_lives",
+        "initial_activities",
+        "masses",
+        "molar_masses",
+        "names",
+        "zais",
+    )
+
+    def __init__(
+        self,
+        isotope_masses: Mapping[str, float],
+        isotope_properties: Mapping[str, IsotopeProperties],
+    ) -> None:
+        """Initialize the IsotopeArrays object.
+
+        Args:
+            isotope_masses: Dictionary of the mass (kg) of each isotope.
+            isotope_properties: Dictionary of the properties of each isotope,
+                as returned by data.get_isotope_properties.
+
+        """
+        self.names = list(isotope_masses)
+        self._index = {isotope: i for i, isotope in enumerate(self.names)}
+        properties = [isotope_properties[isotope] for isotope in self.names]
+        self.zais = get_zais(self.names)
+        self.masses = np.array(list(isotope_masses.values()), dtype=np.float64)
+        self.molar_masses = np.array([p["molar_mass"] for p in properties], dtype=float)
+        self.half_lives = np.array([p["half_life"] for p in properties], dtype=float)
+        self.decay_constants = np.log(2) / self.half_lives
+        self.initial_activities = np.asarray(
+            get_isotope_activity(
+                time_elapsed=0,
+                mass=self.masses,
+                molar_mass=self.molar_masses,
+                half_life=self.half_lives,
+            )
+        )
+        for array in (
+            self.zais,
+            self.masses,
+            self.molar_masses,
+            self.half_lives,
+            self.decay_constants,
+            self.initial_activities,
+        ):
+            array.flags.writeable = False
+
+    def __len__(self) -> int:
+        """Return the number of isotopes."""
+        return len(self.names)
+
+    def index(self, isotope: str) -> int:
+        """Get the position of an isotope in the arrays.
+
+        Raises:
+            KeyError: If the isotope isn't included.
+
+        """
+        return self._index[isotope]
+
+    def get_activities(self, time_elapsed: float | np.ndarray) -> np.ndarray:
+        """Get the activity of every isotope after some time.
+
+        Args:
+            time_elapsed: Time elapsed in years, or an array of times with shape
+                (T, 1) to get the activities at each time.
+
+        Returns:
+            Array of activities (Bq), with shape (N,) or (T, N).
+
+        """
+        return self.initial_activities * np.exp(
+            -self.decay_constants * np.asarray(time_elapsed, dtype=float)
+        )
+
+
+class IsotopeMassView(Mapping[str, float]):
+    """Read-only dictionary view of the isotope masses in an IsotopeArrays."""
+
+    __slots__ = ("_arrays",)
+
+    def __init__(self, arrays: IsotopeArrays) -> None:
+        """Initialize the view of the masses in the arrays."""
+        self._arrays = arrays
+
+    def __getitem__(self, isotope: str) -> float:
+        """Get the mass (kg) of an isotope."""
+        return float(self._arrays.masses[self._arrays.index(isotope)])
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the isotope names."""
+        return iter(self._arrays.names)
+
+    def __len__(self) -> int:
+        """Return the number of isotopes."""
+        return len(self._arrays)
+
+    def __contains__(self, isotope: object) -> bool:
+        """Check if an isotope is included."""
+        return isotope in self._arrays._index  # noqa: SLF001
+
+    def __repr__(self) -> str:
+        """Return a string representation of the masses, as a dictionary."""
+        return repr(dict(self))
+
+
+def _load_isotope_data(
+    isotope: str, properties: bool, spectrum: bool, dtype: np.dtype
+) -> tuple[IsotopeProperties | None, Spectrum | None, Exception | None]:
+    """Load the properties and/or spectrum of an isotope, catching any error."""
+    try:
+        return (
+            get_isotope_properties(isotope) if properties else None,
+            Spectrum.from_isotope(isotope, dtype=dtype, frozen=True)
+            if spectrum
+            else None,
+            None,
+        )
+    except Exception as error:  # noqa: BLE001
+        return None, None, error
+
 
 def _filter_isotopes(isotopes: list[str], verbose: bool = False) -> list[str]:
-    """Filter a list of isotopes to only include relevant antineutrino spectra."""
-    filtered_isotopes = []
-    for isotope in isotopes:
-        # Isotopes that end in "m" or "n" are metastable states,
-        # which we'll just ignore for now.
-        if isotope.endswith("m") or isotope.endswith("n"):
-            if verbose:
-                print(f"Excluding metastable isotope: {isotope}")
-            continue
-
-        # Only select isotopes that have a B- decay mode,
-        # as these are the ones that will contribute to the antineutrino spectrum.
-        properties = get_isotope_properties(isotope)
-        if "B-" not in properties["decay_modes"]:
-            if verbose:
-                print(f"Excluding isotope without B- decay: {isotope}")
-            continue
-
-        # We also want to exclude isotopes that don't have any antineutrino spectrum
-        # data in the IAEA database.
-        try:
-            Spectrum.from_isotope(isotope)
-        except ValueError as err:
-            if "No antineutrino spectrum data found for isotope" in str(err):
-                if verbose:
-                    msg = f"Excluding isotope with empty spectrum data: {isotope}"
-                    print(msg)
-                continue
+    """Filter a list of isotopes to only include relevant antineutrino spectra.
+
+    Only isotopes with a B- decay mode and non-empty antineutrino spectrum data
+    for their level in the IAEA database are kept. Metastable states are kept if
+    they are in the table of isomer decay data. The checks for each isotope are
+    stored in the nuclide index, so are only done the first time it is seen.
+    """
+    return get_nuclide_index().filter(isotopes, verbose=verbose)
+
 
-        filtered_isotopes.append(isotope)
+def _select_isotopes(
+    available: Collection[str], isotopes: Collection[str] | str | None
+) -> list[str]:
+    """Select the isotopes to include from those in a file.
 
-    return filtered_isotopes
+    Args:
+        available: The isotopes in the file.
+        isotopes: The isotopes to include (see Cask.from_tabqfile).
+
+    Returns:
+        The selected isotopes that are in the file, in the same order, after
+        filtering with _filter_isotopes.
+
+    """
+    if isotopes != "all":
+        if isotopes is None:
+            selected_isotopes = DEFAULT_ISOTOPES
+        else:
+            selected_isotopes = cast(Collection[str], isotopes)
+    else:
+        selected_isotopes = available
+    selected_isotopes = set(
+        _filter_isotopes(
+            list(selected_isotopes),
+            verbose=isotopes != "all",  # Only print if given a list
+        )
+    )
+    return [isotope for isotope in available if isotope in selected_isotopes]
 
 
 class Cask:
     """Class representing a cask of spent nuclear fuel.
 
+    The isotope masses and properties are stored as aligned arrays (see
+    IsotopeArrays), which are used for all of the calculations.
+
     Attributes:
         isotope_masses: The masses of each isotope in the cask.
             Should be a dictionary where keys are isotope names and values are the
-            mass of the isotope in the cask (in kg).
+            mass of the isotope in the cask (in kg). After the Cask is created this
+            is a read-only view of the masses in arrays.
         initial_cooling_time: The time since the cask was removed from the reactor,
             in years, corresponding to the time that the isotope masses were calculated.
             This initial age will be subtracted from the requested cooling times when
             calculating the antineutrino spectrum, to account for decay during the time
             since removal.
         name: An optional name for the cask.
+        isotope_properties: Optional pre-loaded properties for the isotopes,
+            as returned by data.get_isotope_properties.
+            Any isotopes not included are loaded when the Cask is created.
+        isotope_spectra: Optional pre-loaded spectra for the isotopes, e.g. to share
+            the same Spectrum objects between many casks.
+            Any isotopes not included are loaded when the Cask is created,
+            as frozen spectra (see Spectrum).
+        dtype: Floating point type to store the flux and errors of the spectra as.
+            Using np.float32 halves the memory needed for the spectra of casks
+            with many isotopes, while sums are still calculated in double precision.
+        max_workers: Maximum number of threads used to load the isotopes not already
+            given. If None, up to 8 threads are used. If any isotopes can't be
+            loaded, a ValueError listing every failed isotope is raised.
+        arrays: The IsotopeArrays with the masses and properties of the isotopes.
 
     """
 
-    def __init__(
+    __slots__ = (
+        "_bases",
+        "_daughter_data",
+        "arrays",
+        "dtype",
+        "initial_cooling_time",
+        "isotope_properties",
+        "isotope_spectra",
+        "name",
+    )
+
+    def __init__(  # noqa: PLR0913
         self,
-        isotope_masses: dict[str, float],
+        isotope_masses: Mapping[str, float],
         initial_cooling_time: float = 0,
         name: str | None = None,
+        isotope_properties: Mapping[str, IsotopeProperties] | None = None,
+        isotope_spectra: Mapping[str, Spectrum] | None = None,
+        dtype: DTypeLike = np.float64,
+        max_workers: int | None = None,
     ) -> None:
         """Initialize the Cask object."""
-        self.isotope_masses = isotope_masses
         self.initial_cooling_time = initial_cooling_time
         self.name = name
+        self.dtype = np.dtype(dtype)
 
-        if not self.isotope_masses:
+        if not isotope_masses:
             msg = "isotope_masses must not be empty"
             raise ValueError(msg)
-        if any(mass < 0 for mass in self.isotope_masses.values()):
+        if np.any(np.fromiter(isotope_masses.values(), dtype=float) < 0):
             msg = "isotope_masses values must be non-negative"
             raise ValueError(msg)
         if self.initial_cooling_time < 0:
             msg = "initial_cooling_time must be non-negative"
             raise ValueError(msg)
+        if not np.issubdtype(self.dtype, np.floating):
+            msg = "dtype must be a floating point type"
+            raise ValueError(msg)
 
-        # Store all constant isotope data
-        self.isotopes = list(self.isotope_masses.keys())
-        self.isotope_properties = {
-            isotope: get_isotope_properties(isotope) for isotope in self.isotopes
-        }
-        self.isotope_spectra = {
-            isotope: Spectrum.from_isotope(isotope) for isotope in self.isotopes
-        }
+        # Store all constant isotope data, loading anything not already given
+        self.isotope_properties = dict(isotope_properties or {})
+        self.isotope_spectra = dict(isotope_spectra or {})
+        self._daughter_data: dict[str, tuple[Spectrum, IsotopeProperties]] = {}
+        self._bases: dict[tuple[float, float | None], ComponentBasis] = {}
+        self._load_isotopes(list(isotope_masses), max_workers)
+        for isotope, spec in self.isotope_spectra.items():
+            if spec.flux.dtype != self.dtype:
+                self.isotope_spectra[isotope] = spec.astype(self.dtype)
+        self.arrays = IsotopeArrays(isotope_masses, self.isotope_properties)
+
+    @property
+    def isotope_masses(self) -> IsotopeMassView:
+        """The mass (kg) of each isotope in the cask, as a read-only dictionary."""
+        return IsotopeMassView(self.arrays)
+
+    @property
+    def isotopes(self) -> list[str]:
+        """The names of the isotopes in the cask."""
+        return self.arrays.names
+
+    def _load_isotopes(self, isotopes: list[str], max_workers: int | None) -> None:
+        """Load the properties and spectra of any isotopes not already given.
+
+        Loading each isotope is mostly waiting on file reads (or downloads), so the
+        isotopes are loaded in a pool of threads. Every isotope is loaded even if
+        some fail, so all of the failures can be reported together.
+        """
+        missing = [
+            isotope
+            for isotope in isotopes
+            if isotope not in self.isotope_properties
+            or isotope not in self.isotope_spectra
+        ]
+        if not missing:
+            return
+        if max_workers is None:
+            max_workers = min(_MAX_WORKERS, len(missing))
+        if max_workers < 1:
+            msg = "max_workers must be a positive value"
+            raise ValueError(msg)
+
+        def _load(isotope: str) -> tuple:
+            return _load_isotope_data(
+                isotope,
+                properties=isotope not in self.isotope_properties,
+                spectrum=isotope not in self.isotope_spectra,
+                dtype=self.dtype,
+            )
+
+        if max_workers == 1:
+            results = [_load(isotope) for isotope in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_load, missing))
+
+        errors = {}
+        for isotope, (properties, spec, error) in zip(missing, results, strict=True):
+            if error is not None:
+                errors[isotope] = error
+                continue
+            if properties is not None:
+                self.isotope_properties[isotope] = properties
+            if spec is not None:
+                self.isotope_spectra[isotope] = spec
+        if errors:
+            msg = f"Could not load data for {len(errors)} isotope(s):"
+            for isotope, error in errors.items():
+                msg += f"\n  {isotope}: {error}"
+            raise ValueError(msg) from next(iter(errors.values()))
 
     def __repr__(self) -> str:
         """Return a string representation of the Cask object."""
@@ -127,13 +428,14 @@ class Cask:
             return repr_str
 
     @classmethod
-    def from_tabqfile(
+    def from_tabqfile(  # noqa: PLR0913
         cls,
         filepath: str | Path,
         total_mass: float | None = None,
         isotopes: Collection[str] | str | None = None,
         time_str: str | None = None,
         name: str | None = None,
+        dtype: DTypeLike = np.float64,
     ) -> "Cask":
         """Create a Cask object from a FISPIN .tbQ output file.
 
@@ -151,6 +453,7 @@ class Cask:
                 (see data.get_isotope_masses for details)
             name: Optional name for the cask.
                 If None, a name is generated from the filename.
+            dtype: Floating point type to store the spectra as (see Cask).
 
         Returns:
             A Cask object with the isotope masses loaded from the file.
@@ -167,21 +470,9 @@ class Cask:
             }
 
         # Filter isotopes
-        if isotopes != "all":
-            if isotopes is None:
-                selected_isotopes = DEFAULT_ISOTOPES
-            else:
-                selected_isotopes = cast(Collection[str], isotopes)
-        else:
-            selected_isotopes = isotope_masses.keys()
-        selected_isotopes = _filter_isotopes(
-            list(selected_isotopes),
-            verbose=isotopes != "all",  # Only print if given a list
-        )
         isotope_masses = {
-            isotope: mass
-            for isotope, mass in isotope_masses.items()
-            if isotope in selected_isotopes
+            isotope: isotope_masses[isotope]
+            for isotope in _select_isotopes(isotope_masses, isotopes)
         }
 
         # Extract filename if no name is given
@@ -195,25 +486,226 @@ class Cask:
             isotope_masses=isotope_masses,
             initial_cooling_time=cooling_time,
             name=name,
+            dtype=dtype,
         )
 
-    def get_component_spectra(
-        self, cooling_time: float | None = None
-    ) -> list[Spectrum]:
-        """Get the individual antineutrino spectra for each isotope in the cask.
+    @classmethod
+    def from_inventory(
+        cls,
+        inventory: TabqInventory,
+        total_mass: float | None = None,
+        isotopes: Collection[str] | str | None = None,
+        dtype: DTypeLike = np.float64,
+    ) -> list["Cask"]:
+        """Create a Cask for each file in an inventory of many .tbQ files.
+
+        The isotopes are selected once for every file, and the spectra and properties
+        of each isotope are loaded once and shared between all of the casks. Every
+        cask includes every selected isotope in any of the files, with a mass of zero
+        if it isn't in the file.
 
         Args:
-            cooling_time: The time in years since the cask was removed from the reactor.
-                Note that this has to be greater than or equal to the
+            inventory: The masses from the files, as returned by data.load_tabqfiles.
+            total_mass: The total mass of each cask to simulate (in kg).
+                If None, the mass from each simulation file is used.
+            isotopes: Optional list of isotopes to include (see from_tabqfile).
+            dtype: Floating point type to store the spectra as (see Cask).
+
+        Returns:
+            A list of Cask objects, one for each file, named after the files.
+
+        """
+        names = [get_nuclide(zai).name for zai in inventory.zais]
+        if isotopes != "all":
+            if isotopes is None:
+                selected_isotopes = DEFAULT_ISOTOPES
+            else:
+                selected_isotopes = cast(Collection[str], isotopes)
+            selected_zais = set(get_zais(selected_isotopes).tolist())
+            names = [
+                name
+                for name, zai in zip(names, inventory.zais, strict=True)
+                if zai in selected_zais
+            ]
+        names = _filter_isotopes(names, verbose=isotopes != "all")
+        columns = np.searchsorted(inventory.zais, get_zais(names))
+
+        masses = inventory.masses[:, columns]
+        if total_mass is not None:
+            masses = masses * (total_mass / inventory.total_masses)[:, np.newaxis]
+
+        casks: list[Cask] = []
+        for filepath, file_masses, cooling_time in zip(
+            inventory.filepaths, masses, inventory.cooling_times, strict=True
+        ):
+            # The isotope data loaded for the first cask is shared with the others.
+            casks.append(
+                cls(
+                    isotope_masses=dict(zip(names, file_masses.tolist(), strict=True)),
+                    initial_cooling_time=float(cooling_time),
+                    name=filepath.stem,
+                    isotope_properties=casks[0].isotope_properties if casks else None,
+                    isotope_spectra=casks[0].isotope_spectra if casks else None,
+                    dtype=dtype,
+                )
+            )
+        return casks
+
+    @classmethod
+    def from_tabqfiles(  # noqa: PLR0913
+        cls,
+        filepaths: str | Path | Sequence[str | Path],
+        total_mass: float | None = None,
+        isotopes: Collection[str] | str | None = None,
+        time_str: str | None = None,
+        dtype: DTypeLike = np.float64,
+        max_workers: int | None = None,
+    ) -> list["Cask"]:
+        """Create a Cask for each of many FISPIN .tbQ output files.
+
+        This is much faster than calling from_tabqfile for each file, as the files
+        are parsed in parallel and the isotope data is only loaded once. To get the
+        tags from the filenames as well, use data.load_tabqfiles and from_inventory.
+
+        Args:
+            filepaths: A directory, a glob pattern or a list of paths to the files
+                (see data.load_tabqfiles).
+            total_mass: The total mass of each cask to simulate (in kg).
+                If None, the mass from each simulation file is used.
+            isotopes: Optional list of isotopes to include (see from_tabqfile).
+            time_str: Specific simulation time to extract data for from every file.
+                If None, the smallest time in each file is used.
+            dtype: Floating point type to store the spectra as (see Cask).
+            max_workers: Number of worker processes used to parse the files.
+                If None, uses the number of CPUs.
+
+        Returns:
+            A list of Cask objects, one for each file, named after the files.
+
+        """
+        inventory = load_tabqfiles(filepaths, time_str, max_workers=max_workers)
+        return cls.from_inventory(inventory, total_mass, isotopes, dtype)
+
+    def get_decay_chains(self) -> list[DecayChain]:
+        """Get the decay chains that create new isotopes in this cask over time.
+
+        Returns:
+            The entries from DECAY_CHAINS whose parent isotope is in the cask
+            with a non-zero mass.
+
+        """
+        masses = self.isotope_masses
+        return [
+            chain
+            for chain in DECAY_CHAINS
+            if chain.parent in masses and masses[chain.parent] > 0
+        ]
+
+    def _get_daughter_data(self, daughter: str) -> tuple[Spectrum, IsotopeProperties]:
+        """Get the spectrum and properties for a decay chain daughter isotope."""
+        if daughter not in self.isotope_properties:
+            # The daughter isn't one of the cask isotopes, so load its data once and
+            # keep it separately (so it isn't treated as being in the cask).
+            if daughter not in self._daughter_data:
+                self._daughter_data[daughter] = (
+                    Spectrum.from_isotope(daughter, dtype=self.dtype, frozen=True),
+                    get_isotope_properties(daughter),
+                )
+            return self._daughter_data[daughter]
+        return self.isotope_spectra[daughter], self.isotope_properties[daughter]
+
+    def get_component_basis(
+        self,
+        width: float = 1,
+        max_energy: float | None = None,
+    ) -> ComponentBasis:
+        """Get the spectra of every possible component on a common binning.
+
+        The components are the isotopes in the cask, followed by the daughter
+        isotope of each chain from get_decay_chains. The bases for the last few
+        binnings are kept, so calling this again with the same binning returns the
+        same read-only arrays.
+
+        Args:
+            width: Bin width (keV) for the basis spectra.
+            max_energy: Maximum energy (keV) for the basis spectra.
+                If None, uses the maximum energy across all the component spectra.
+
+        Returns:
+            The ComponentBasis for the cask.
+
+        """
+        key = (width, max_energy)
+        if key in self._bases:
+            return self._bases[key]
+        spectra = [self.isotope_spectra[isotope] for isotope in self.isotopes]
+        names = list(self.isotopes)
+        for chain in self.get_decay_chains():
+            spectra.append(self._get_daughter_data(chain.daughter)[0])
+            names.append(f"{chain.parent}->{chain.daughter}")
+        if max_energy is None:
+            max_energy = max(float(spec.energy[-1]) for spec in spectra)
+
+        # This uses the same binning and interpolation as Spectrum.equalise
+        energy = get_energy_grid(0, max_energy, width)
+        flux = np.empty((len(spectra), len(energy) - 1), dtype=self.dtype)
+        errors = np.empty_like(flux)
+        for i, spec in enumerate(spectra):
+            flux[i], errors[i] = linear_interpolate_with_errors(
+                spec.energy, spec.flux, spec.errors, energy
+            )
+        flux.flags.writeable = False
+        errors.flags.writeable = False
+        basis = ComponentBasis(energy=energy, flux=flux, errors=errors, names=names)
+        if len(self._bases) >= _MAX_BASES:
+            # Remove the oldest basis.
+            del self._bases[next(iter(self._bases))]
+        self._bases[key] = basis
+        return basis
+
+    def get_component_activities(self, cooling_times: np.ndarray) -> np.ndarray:
+        """Get the activity of each component in the basis at many cooling times.
+
+        Args:
+            cooling_times: Array of times in years since the cask was removed from
+                the reactor. These all have to be greater than or equal to the
                 initial_cooling_time of the cask.
-                If None, the initial_cooling_time of the cask is used.
 
         Returns:
-            A list of Spectrum objects, representing the antineutrino spectra for each
-            isotope as well as any additional isotopes created from decays since
-            removal from the reactor.
+            Array of activities (Bq) with shape (len(cooling_times), M), with the
+            components in the same order as get_component_basis.
 
         """
+        cooling_times = np.asarray(cooling_times, dtype=float)
+        if np.any(cooling_times < self.initial_cooling_time):
+            msg = "cooling_times cannot be less than "
+            msg += f"the initial cask cooling time ({self.initial_cooling_time:.3e})"
+            raise ValueError(msg)
+        time_elapsed = cooling_times.ravel()[:, None] - self.initial_cooling_time
+
+        activities = [self.arrays.get_activities(time_elapsed)]
+        for chain in self.get_decay_chains():
+            daughter_properties = self._get_daughter_data(chain.daughter)[1]
+            parent = self.arrays.index(chain.parent)
+            daughter_mass = get_decay_mass(
+                time_elapsed=time_elapsed,
+                parent_mass=self.arrays.masses[parent],
+                parent_half_life=self.arrays.half_lives[parent],
+                daughter_half_life=daughter_properties["half_life"],
+                branching_ratio=chain.branching_ratio,
+            )
+            activities.append(
+                get_isotope_activity(
+                    time_elapsed=0,
+                    mass=daughter_mass,
+                    molar_mass=daughter_properties["molar_mass"],
+                    half_life=daughter_properties["half_life"],
+                )
+            )
+        return np.concatenate(activities, axis=1)
+
+    def _get_time_elapsed(self, cooling_time: float | None) -> float:
+        """Get the time in years since the initial cooling time of the cask."""
         if cooling_time is None:
             cooling_time = self.initial_cooling_time
         if cooling_time < 0:
@@ -226,62 +718,54 @@ class Cask:
 
         # Take off the initial age of the cask, as the isotope masses should already
         # account for some initial decay since removal from the core.
-        time_elapsed = cooling_time - self.initial_cooling_time
+        return cooling_time - self.initial_cooling_time
+
+    @profiled("Cask.get_component_spectra")
+    def get_component_spectra(
+        self, cooling_time: float | None = None
+    ) -> list[Spectrum]:
+        """Get the individual antineutrino spectra for each isotope in the cask.
 
-        # Get the antineutrino spectra for each isotope
-        spectra = []
-        for isotope in self.isotopes:
-            # Get the antineutrino spectrum for this isotope
-            spec = self.isotope_spectra[isotope]
+        Args:
+            cooling_time: The time in years since the cask was removed from the reactor.
+                Note that this has to be greater than or equal to the
+                initial_cooling_time of the cask.
+                If None, the initial_cooling_time of the cask is used.
 
-            # Scale based on the time since the initial removal
-            activity = get_isotope_activity(
-                time_elapsed=time_elapsed,
-                mass=self.isotope_masses[isotope],
-                molar_mass=self.isotope_properties[isotope]["molar_mass"],
-                half_life=self.isotope_properties[isotope]["half_life"],
+        Returns:
+            A list of Spectrum objects, representing the antineutrino spectra for each
+            isotope as well as any additional isotopes created from decays since
+            removal from the reactor.
+
+        """
+        time_elapsed = self._get_time_elapsed(cooling_time)
+
+        # Get the antineutrino spectra for each isotope, scaled based on the
+        # time since the initial removal.
+        activities = self.arrays.get_activities(time_elapsed)
+        spectra = [
+            self.isotope_spectra[isotope] * activity
+            for isotope, activity in zip(
+                self.isotopes, activities.tolist(), strict=True
             )
-            spec *= activity
-            spectra.append(spec)
+        ]
 
         # Add any extra newly-created isotopes from decays since
         # the initial cooling time.
         if time_elapsed > 0:
-            # All of these decay chains have a branching ratio of 1.
-            # If any additional isotopes were to be added with decay chains
-            # involving more beta emitting isotopes then they can be added here.
-            # TODO: work out how these are selected, if we can define them dynamically
-            # or from an input file then that would be ideal.
-            decay_chains = (
-                DecayChain("Sr90", "Y90"),
-                DecayChain("Ce144", "Pr144"),
-                DecayChain("Kr88", "Rb88"),
-                DecayChain("Ru106", "Rh106"),
-            )
-            for chain in decay_chains:
-                if (
-                    chain.parent not in self.isotopes
-                    or self.isotope_masses[chain.parent] == 0
-                ):
-                    # No parent isotope in the cask, so skip this decay
-                    continue
-
-                if chain.daughter not in self.isotope_properties:
-                    # We won't have the spectrum or hl/mm data cached
-                    daughter_spec = Spectrum.from_isotope(chain.daughter)
-                    daughter_properties = get_isotope_properties(chain.daughter)
-                else:
-                    daughter_spec = deepcopy(self.isotope_spectra[chain.daughter])
-                    daughter_properties = self.isotope_properties[chain.daughter]
+            for chain in self.get_decay_chains():
+                daughter_spec, daughter_properties = self._get_daughter_data(
+                    chain.daughter
+                )
                 daughter_molar_mass = daughter_properties["molar_mass"]
                 daughter_half_life = daughter_properties["half_life"]
-                daughter_spec.name = f"{chain.parent}->{chain.daughter}"
 
                 # Calculate the mass of the daughter isotope
+                parent = self.arrays.index(chain.parent)
                 daughter_mass = get_decay_mass(
                     time_elapsed=time_elapsed,
-                    parent_mass=self.isotope_masses[chain.parent],
-                    parent_half_life=self.isotope_properties[chain.parent]["half_life"],
+                    parent_mass=float(self.arrays.masses[parent]),
+                    parent_half_life=float(self.arrays.half_lives[parent]),
                     daughter_half_life=daughter_half_life,
                     branching_ratio=chain.branching_ratio,
                 )
@@ -295,10 +779,13 @@ class Cask:
                     molar_mass=daughter_molar_mass,
                     half_life=daughter_half_life,
                 )
+                # Scaling gives a new spectrum, so the shared one isn't changed.
                 scaled_spec = daughter_spec * activity
+                scaled_spec.name = f"{chain.parent}->{chain.daughter}"
                 spectra.append(scaled_spec)
         return spectra
 
+    @profiled("Cask.get_total_spectrum")
     def get_total_spectrum(self, cooling_time: float | None = None) -> Spectrum:
         """Calculate the total antineutrino spectrum as a Spectrum object.
 
@@ -311,17 +798,36 @@ class Cask:
         """
         if cooling_time is None:
             cooling_time = self.initial_cooling_time
-        spectra = self.get_component_spectra(cooling_time)
-
-        # Equalise all the spectra to 1keV bins to allow combining,
-        # going from 0 to the maximum energy across all spectra.
-        max_energy = max(spec.energy[-1] for spec in spectra)
-        for spec in spectra:
-            spec.equalise(width=1, min_energy=0, max_energy=max_energy)
-
-        # Sum all the spectra to get the total cask spectrum
-        total_spec = spectra[0]
-        for spec in spectra[1:]:
-            total_spec = total_spec + spec
-        total_spec.name = self.name
-        return total_spec
+        time_elapsed = self._get_time_elapsed(cooling_time)
+
+        # The spectra are binned in 1keV bins from 0 to the maximum energy across
+        # all the component spectra, using the component basis. Daughter isotopes
+        # from the decay chains are only included after the initial cooling time.
+        spectra = [self.isotope_spectra[isotope] for isotope in self.isotopes]
+        if time_elapsed > 0:
+            spectra += [
+                self._get_daughter_data(chain.daughter)[0]
+                for chain in self.get_decay_chains()
+            ]
+        energy = get_energy_grid(0, max(spec.energy[-1] for spec in spectra), 1)
+        n_bins = len(energy) - 1
+        # Any basis with 1keV bins covering the energy range can be used, as the
+        # bins of a shorter grid are the same as the start of a longer one.
+        for (width, _), basis in self._bases.items():
+            if width == 1 and len(basis.energy) > n_bins:
+                break
+        else:
+            basis = self.get_component_basis()
+        activities = self.get_component_activities(np.array([cooling_time]))[0]
+
+        # The sums are in double precision, even if the spectra are stored as float32.
+        flux = activities @ basis.flux[:, :n_bins]
+        variance = np.square(activities) @ np.square(
+            basis.errors[:, :n_bins], dtype=np.float64
+        )
+        return Spectrum(
+            energy,
+            flux.astype(self.dtype),
+            np.sqrt(variance).astype(self.dtype),
+            name=self.name,
+        )
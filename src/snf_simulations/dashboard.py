@@ -1,7 +1,7 @@
 """Interactive Shiny dashboard for SNF antineutrino spectrum visualization."""
 
 from collections.abc import Iterable
-from io import BytesIO
+from importlib.util import find_spec
 from pathlib import Path
 from typing import TypedDict
 
@@ -14,18 +14,205 @@ from shinywidgets import output_widget, render_widget
 from snf_simulations.cask import DEFAULT_ISOTOPES, Cask
 from snf_simulations.data import get_example_tbq_path
 from snf_simulations.detector import Detector
+from snf_simulations.evolution import CaskEvolution
+from snf_simulations.export import iter_csv_chunks, iter_parquet_chunks
 from snf_simulations.physics import calculate_flux_at_distance
 
+# File formats the tables can be downloaded in.
+# Parquet is only offered if the optional pyarrow package is installed.
+DOWNLOAD_FORMATS = {"csv": "CSV"}
+if find_spec("pyarrow") is not None:
+    DOWNLOAD_FORMATS["parquet"] = "Parquet"
+
+
+# Total mass of fuel (kg) the spectra are calculated for.
+# The spectra are proportional to the mass, so the results are then rescaled for
+# the selected cask mass and number of casks (see scale_results).
+REFERENCE_MASS = 1.0
+
+# Latest cooling time (years) on the time evolution slider.
+EVOLUTION_MAX_TIME = 100
+
+# Columns in the calculated dataframes that don't scale with the mass of fuel.
+_UNSCALED_COLUMNS = {"energy_min", "energy_max", "cooling_time_yrs"}
+
 
 class SimInputs(TypedDict):
-    """Snapshot of sidebar inputs for recalculated cask simulations."""
+    """Snapshot of sidebar inputs that need the cask to be reloaded."""
 
     filepath: Path
     cask_name: str
+    all_isotopes: bool
+
+
+class ScaleInputs(TypedDict):
+    """Snapshot of sidebar inputs that only rescale the cask simulation results."""
+
     cask_mass: float
     n_casks: int
-    cooling_times: list[float]
-    all_isotopes: bool
+
+
+def calculate_cask_spectra(cask: Cask, cooling_times: list[float]) -> pd.DataFrame:
+    """Calculate the total cask spectrum for each cooling time.
+
+    Returns:
+        A dataframe with the energy bin edges and a flux column for each time.
+
+    """
+    # Get the spectrum for each cooling time from the component spectra, using the
+    # same basis as the time evolution so it is only calculated once.
+    basis = cask.get_component_basis(width=1, max_energy=6000)
+    activities = cask.get_component_activities(np.asarray(cooling_times, dtype=float))
+    flux = activities @ basis.flux
+
+    # Get the flux for each spectrum and combine into a single dataframe
+    energy_bin_min = basis.energy[:-1]
+    energy_bin_max = basis.energy[1:]
+    fluxes = dict(zip(cooling_times, flux, strict=True))
+
+    # Create a single dataframe with all the spectra data
+    data = {
+        "energy_min": energy_bin_min,
+        "energy_max": energy_bin_max,
+        **{f"flux_{cooling_time:.3g}": fluxes[cooling_time] for cooling_time in fluxes},
+    }
+    return pd.DataFrame(data)
+
+
+def calculate_detector_rates(
+    cask: Cask,
+    cooling_times: list[float],
+    detector_volume: float,
+    detector_distance: float,
+    efficiencies: tuple[float, float],
+) -> pd.DataFrame:
+    """Calculate fluxes and event rates at the detector for each cooling time.
+
+    Returns:
+        A dataframe with the flux and the event rates for the lower and upper
+        detector efficiencies at each cooling time.
+
+    """
+    lower_efficiency, upper_efficiency = efficiencies
+    detector = Detector(volume=detector_volume, proton_density=4.6e22)
+
+    rows = []
+    for cooling_time in cooling_times:
+        spec = cask.get_total_spectrum(cooling_time=float(cooling_time))
+        total_flux = spec.integrate(lower_energy=1806)
+        flux_at_distance = calculate_flux_at_distance(
+            total_flux, distance=detector_distance
+        )
+        rate_lower = detector.calculate_event_rate(
+            spec=spec,
+            distance=detector_distance,
+            efficiency=lower_efficiency,
+        )
+        rate_upper = detector.calculate_event_rate(
+            spec=spec,
+            distance=detector_distance,
+            efficiency=upper_efficiency,
+        )
+        rows.append(
+            {
+                "cooling_time_yrs": cooling_time,
+                "flux_cm-2_s-1": flux_at_distance,
+                "event_rate_lower_s-1": rate_lower,
+                "event_rate_upper_s-1": rate_upper,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def calculate_component_spectra(cask: Cask, cooling_time: float) -> pd.DataFrame:
+    """Calculate the spectrum of each component of the cask at one cooling time.
+
+    Returns:
+        A dataframe with the energy bin edges and a flux column for each component.
+
+    """
+    component_spectra = cask.get_component_spectra(cooling_time=cooling_time)
+    spectra = [
+        spec.equalised(width=1, min_energy=0, max_energy=6000)
+        for spec in component_spectra
+    ]
+
+    # Get the flux for each spectrum and combine into a single dataframe
+    energy_bin_min = spectra[0].energy[:-1]
+    energy_bin_max = spectra[0].energy[1:]
+    fluxes = {spec.name: spec.flux for spec in spectra}
+
+    # Create a single dataframe with all the spectra data
+    data = {
+        "energy_min": energy_bin_min,
+        "energy_max": energy_bin_max,
+        **{isotope: flux for isotope, flux in fluxes.items()},
+    }
+    return pd.DataFrame(data)
+
+
+def calculate_sampled_spectrum(
+    cask: Cask, cooling_time: float, n_samples: int
+) -> pd.DataFrame:
+    """Sample the total cask spectrum at one cooling time.
+
+    Returns:
+        A dataframe with the energy bin edges, the sampled counts in each bin and
+        the original flux scaled to match the counts.
+
+    """
+    # Get spectrum and sample
+    spec = cask.get_total_spectrum(cooling_time=cooling_time).equalised(
+        width=1, min_energy=0, max_energy=6000
+    )
+    samples = spec.sample(n_samples=n_samples)
+    counts, _ = np.histogram(samples, bins=spec.energy)
+
+    # Scale the original flux to match the total counts for comparison on the plot
+    scale_factor = max(counts.max(), 1) / max(spec.flux.max(), 1)
+    scaled_flux = spec.flux * scale_factor
+
+    # Combine into a single dataframe
+    energy_bin_min = spec.energy[:-1]
+    energy_bin_max = spec.energy[1:]
+    return pd.DataFrame(
+        {
+            "energy_min": energy_bin_min,
+            "energy_max": energy_bin_max,
+            "sampled_counts": counts,
+            "scaled_flux": scaled_flux,
+        }
+    )
+
+
+def scale_results(df: pd.DataFrame, scale: float) -> pd.DataFrame:
+    """Multiply the fluxes and event rates in a dataframe of results by a factor.
+
+    Every spectrum is proportional to the total mass of fuel, so results calculated
+    for the REFERENCE_MASS can be rescaled for any cask mass and number of casks
+    without recalculating the spectra.
+
+    Returns:
+        A copy of the dataframe with every column except the energy bin edges and
+        cooling times multiplied by the scale factor.
+
+    """
+    columns = [column for column in df.columns if column not in _UNSCALED_COLUMNS]
+    scaled = df.copy()
+    scaled[columns] = df[columns] * scale
+    return scaled
+
+
+def iter_download(df: pd.DataFrame, download_format: str) -> Iterable[str | bytes]:
+    """Convert a dataframe to a file for download in chunks.
+
+    Chunks are yielded as they are converted, so the download starts straight away
+    and the whole file is never held in memory at once.
+    """
+    if download_format == "parquet":
+        yield from iter_parquet_chunks(df)
+    else:
+        yield from iter_csv_chunks(df)
 
 
 # Here we define the UI layout of the dashboard using Shiny's components.
@@ -190,6 +377,13 @@ app_ui = ui.page_fluid(
                 icon=ui.tags.i({"class": "fa-solid fa-rotate-right"}),
                 class_="btn-success",
             ),
+            ui.input_radio_buttons(
+                "download_format",
+                "Download format:",
+                DOWNLOAD_FORMATS,
+                selected="csv",
+                inline=True,
+            ),
             width="250px",
         ),
         # Tabs
@@ -200,7 +394,7 @@ app_ui = ui.page_fluid(
                 output_widget("plot_cask_simulations"),
                 ui.download_button(
                     "download_cask_simulations",
-                    "  Download CSV",
+                    "  Download",
                     icon=ui.tags.i({"class": "fa-solid fa-download"}),
                 ),
             ),
@@ -233,7 +427,7 @@ app_ui = ui.page_fluid(
                 ui.output_table("table_detector_simulations"),
                 ui.download_button(
                     "download_detector_simulations",
-                    "  Download CSV",
+                    "  Download",
                     icon=ui.tags.i({"class": "fa-solid fa-download"}),
                 ),
             ),
@@ -249,7 +443,7 @@ app_ui = ui.page_fluid(
                 output_widget("plot_component_spectra"),
                 ui.download_button(
                     "download_component_spectra",
-                    "  Download CSV",
+                    "  Download",
                     icon=ui.tags.i({"class": "fa-solid fa-download"}),
                 ),
             ),
@@ -273,10 +467,25 @@ app_ui = ui.page_fluid(
                 output_widget("plot_sampling"),
                 ui.download_button(
                     "download_sampling",
-                    "  Download CSV",
+                    "  Download",
                     icon=ui.tags.i({"class": "fa-solid fa-download"}),
                 ),
             ),
+            # Tab 5
+            ui.nav_panel(
+                "Time Evolution",
+                ui.input_slider(
+                    "evolution_time",
+                    "Cooling time (years):",
+                    min=0,
+                    max=EVOLUTION_MAX_TIME,
+                    value=0.5,
+                    step=0.5,
+                    animate=True,
+                    width="100%",
+                ),
+                output_widget("plot_evolution"),
+            ),
         ),
     ),
     # Page footer
@@ -298,25 +507,46 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
     """Server logic for the Shiny dashboard."""
     # -----------------------------------------------------------------------
     # Simulation inputs
+    # These are kept separate so changing the mass or number of casks only rescales
+    # the existing results, and changing the cooling times only recalculates the
+    # spectra, rather than reloading the file and recalculating.
     sim_inputs: reactive.Value[SimInputs] = reactive.value(
         # Reactive value to hold the current simulation parameters
         {
             "filepath": get_example_tbq_path(),
             "cask_name": get_example_tbq_path().stem,
+            "all_isotopes": False,
+        }
+    )
+    sim_cooling_times: reactive.Value[list[float]] = reactive.value(
+        # Reactive value to hold the current cooling times to simulate
+        [0.5, 1.0, 5.0, 10.0]
+    )
+    scale_inputs: reactive.Value[ScaleInputs] = reactive.value(
+        # Reactive value to hold the current cask mass and number of casks
+        {
             "cask_mass": 10000.0,
             "n_casks": 1,
-            "cooling_times": [0.5, 1.0, 5.0, 10.0],
-            "all_isotopes": False,
         }
     )
 
+    @reactive.calc
+    def scale_factor() -> float:
+        """Factor to rescale results for the reference mass to the selected casks."""
+        params = scale_inputs()
+        total_mass = float(params["cask_mass"]) * int(params["n_casks"])
+        return total_mass / REFERENCE_MASS
+
     @reactive.calc
     def cask_reactive() -> Cask | None:
-        """Reactive function to create a Cask instance from the current sim inputs."""
+        """Reactive function to create a Cask instance from the current sim inputs.
+
+        The Cask always contains the REFERENCE_MASS of fuel, so it doesn't need to be
+        recreated when the mass or number of casks change.
+        """
         try:
             params = sim_inputs()
             filepath = params["filepath"]
-            total_mass = float(params["cask_mass"]) * int(params["n_casks"])
             name = params["cask_name"]
             if filepath == get_example_tbq_path():
                 # Example file only includes the default isotopes
@@ -327,7 +557,7 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
             # Create the Cask instance
             cask = Cask.from_tabqfile(
                 filepath,
-                total_mass=total_mass,
+                total_mass=REFERENCE_MASS,
                 isotopes=isotopes,
                 name=name,
             )
@@ -361,12 +591,20 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
             snapshot: SimInputs = {
                 "filepath": filepath,
                 "cask_name": cask_name,
+                "all_isotopes": all_isotopes,
+            }
+            scale_snapshot: ScaleInputs = {
                 "cask_mass": cask_mass,
                 "n_casks": n_casks,
-                "cooling_times": cooling_times,
-                "all_isotopes": all_isotopes,
             }
-            sim_inputs.set(snapshot)
+            # Only update the values that have changed, so nothing is recalculated
+            # unless it needs to be.
+            if snapshot != sim_inputs():
+                sim_inputs.set(snapshot)
+            if cooling_times != sim_cooling_times():
+                sim_cooling_times.set(cooling_times)
+            if scale_snapshot != scale_inputs():
+                scale_inputs.set(scale_snapshot)
         except Exception as e:
             ui.notification_show(
                 f"Error recalculating cask simulations: {e}",
@@ -487,40 +725,18 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
     # -----------------------------------------------------------------------
     # Cask Simulations tab
     @reactive.calc
-    def cask_simulations_data() -> pd.DataFrame:
-        """Calculate the spectra for each cooling time."""
+    def reference_cask_spectra() -> pd.DataFrame:
+        """Calculate the spectra for each cooling time for the reference mass."""
         cask = cask_reactive()
         if cask is None:
             return pd.DataFrame()
 
-        params = sim_inputs()
-        cooling_times = list(params["cooling_times"])
-
-        # Get the spectrum for each cooling time
-        spectra = []
-        for cooling_time in cooling_times:
-            spec = cask.get_total_spectrum(cooling_time=float(cooling_time))
-            spec.equalise(width=1, min_energy=0, max_energy=6000)
-            spectra.append(spec)
-
-        # Get the flux for each spectrum and combine into a single dataframe
-        energy_bin_min = spectra[0].energy[:-1]
-        energy_bin_max = spectra[0].energy[1:]
-        fluxes = {
-            cooling_time: spec.flux
-            for cooling_time, spec in zip(cooling_times, spectra, strict=True)
-        }
+        return calculate_cask_spectra(cask, list(sim_cooling_times()))
 
-        # Create a single dataframe with all the spectra data
-        data = {
-            "energy_min": energy_bin_min,
-            "energy_max": energy_bin_max,
-            **{
-                f"flux_{cooling_time:.3g}": fluxes[cooling_time]
-                for cooling_time in fluxes
-            },
-        }
-        return pd.DataFrame(data)
+    @reactive.calc
+    def cask_simulations_data() -> pd.DataFrame:
+        """Get the spectra for each cooling time for the selected casks."""
+        return scale_results(reference_cask_spectra(), scale_factor())
 
     @output
     @render_widget
@@ -530,7 +746,7 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
         if cask is None:
             return None
 
-        params = sim_inputs()
+        params = scale_inputs()
         cask_mass = float(params["cask_mass"])
         n_casks = int(params["n_casks"])
 
@@ -577,57 +793,38 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
 
         return figure
 
-    @render.download(filename="cask_simulations.csv")
-    def download_cask_simulations() -> Iterable[bytes]:
-        """Download cask simulations plot data as CSV."""
-        with BytesIO() as buffer:
-            cask_simulations_data().to_csv(buffer, index=False)
-            yield buffer.getvalue().decode()
+    @render.download(filename=lambda: f"cask_simulations.{input.download_format()}")
+    def download_cask_simulations() -> Iterable[str | bytes]:
+        """Download cask simulations plot data in the selected format."""
+        yield from iter_download(cask_simulations_data(), input.download_format())
 
     # -----------------------------------------------------------------------
     # Detector Simulations tab
     @reactive.calc
-    def detector_simulations_data() -> pd.DataFrame:
-        """Calculate fluxes and event rates for each cooling time."""
+    def reference_detector_rates() -> pd.DataFrame:
+        """Calculate fluxes and event rates for each time for the reference mass."""
         cask = cask_reactive()
         if cask is None:
             return pd.DataFrame()
 
-        params = sim_inputs()
-        cooling_times = list(params["cooling_times"])
+        cooling_times = list(sim_cooling_times())
         detector_volume = float(input.detector_volume())
         detector_distance = float(input.detector_distance())
         lower_efficiency, upper_efficiency = input.detector_efficiency()
         lower_efficiency = float(lower_efficiency) / 100
         upper_efficiency = float(upper_efficiency) / 100
-        detector = Detector(volume=detector_volume, proton_density=4.6e22)
+        return calculate_detector_rates(
+            cask,
+            cooling_times,
+            detector_volume=detector_volume,
+            detector_distance=detector_distance,
+            efficiencies=(lower_efficiency, upper_efficiency),
+        )
 
-        rows = []
-        for cooling_time in cooling_times:
-            spec = cask.get_total_spectrum(cooling_time=float(cooling_time))
-            total_flux = spec.integrate(lower_energy=1806)
-            flux_at_distance = calculate_flux_at_distance(
-                total_flux, distance=detector_distance
-            )
-            rate_lower = detector.calculate_event_rate(
-                spec=spec,
-                distance=detector_distance,
-                efficiency=lower_efficiency,
-            )
-            rate_upper = detector.calculate_event_rate(
-                spec=spec,
-                distance=detector_distance,
-                efficiency=upper_efficiency,
-            )
-            rows.append(
-                {
-                    "cooling_time_yrs": cooling_time,
-                    "flux_cm-2_s-1": flux_at_distance,
-                    "event_rate_lower_s-1": rate_lower,
-                    "event_rate_upper_s-1": rate_upper,
-                }
-            )
-        return pd.DataFrame(rows)
+    @reactive.calc
+    def detector_simulations_data() -> pd.DataFrame:
+        """Get fluxes and event rates for each cooling time for the selected casks."""
+        return scale_results(reference_detector_rates(), scale_factor())
 
     @output
     @render.table
@@ -655,42 +852,28 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
             )
         return pd.DataFrame(rows)
 
-    @render.download(filename="detector_simulations.csv")
-    def download_detector_simulations() -> Iterable[bytes]:
-        """Download detector simulation data as CSV."""
-        with BytesIO() as buffer:
-            detector_simulations_data().to_csv(buffer, index=False)
-            yield buffer.getvalue().decode()
+    @render.download(filename=lambda: f"detector_simulations.{input.download_format()}")
+    def download_detector_simulations() -> Iterable[str | bytes]:
+        """Download detector simulation data in the selected format."""
+        yield from iter_download(detector_simulations_data(), input.download_format())
 
     # -----------------------------------------------------------------------
     # Component Spectra tab
     @reactive.calc
-    def component_spectra_data() -> pd.DataFrame:
-        """Get component spectra data for the selected cooling time."""
+    def reference_component_spectra() -> pd.DataFrame:
+        """Calculate the component spectra at one time for the reference mass."""
         cask = cask_reactive()
         if cask is None:
             return pd.DataFrame()
 
         # Get the component spectra for the selected cooling time
         cooling_time = float(input.component_cooling_time())
-        component_spectra = cask.get_component_spectra(cooling_time=cooling_time)
-        spectra = []
-        for spec in component_spectra:
-            spec.equalise(width=1, min_energy=0, max_energy=6000)
-            spectra.append(spec)
-
-        # Get the flux for each spectrum and combine into a single dataframe
-        energy_bin_min = spectra[0].energy[:-1]
-        energy_bin_max = spectra[0].energy[1:]
-        fluxes = {spec.name: spec.flux for spec in spectra}
-
-        # Create a single dataframe with all the spectra data
-        data = {
-            "energy_min": energy_bin_min,
-            "energy_max": energy_bin_max,
-            **{isotope: flux for isotope, flux in fluxes.items()},
-        }
-        return pd.DataFrame(data)
+        return calculate_component_spectra(cask, cooling_time)
+
+    @reactive.calc
+    def component_spectra_data() -> pd.DataFrame:
+        """Get component spectra data for the selected cooling time and casks."""
+        return scale_results(reference_component_spectra(), scale_factor())
 
     @output
     @render_widget
@@ -737,18 +920,20 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
             )
         return figure
 
-    @render.download(filename="component_spectra.csv")
-    def download_component_spectra() -> Iterable[bytes]:
-        """Download per-isotope component spectra as CSV."""
-        with BytesIO() as buffer:
-            component_spectra_data().to_csv(buffer, index=False)
-            yield buffer.getvalue().decode()
+    @render.download(filename=lambda: f"component_spectra.{input.download_format()}")
+    def download_component_spectra() -> Iterable[str | bytes]:
+        """Download per-isotope component spectra in the selected format."""
+        yield from iter_download(component_spectra_data(), input.download_format())
 
     # -----------------------------------------------------------------------
     # Spectrum Sampling tab
     @reactive.calc
     def sampling_data() -> pd.DataFrame:
-        """Get sampled spectra data for the selected cooling time."""
+        """Get sampled spectra data for the selected cooling time.
+
+        The sampled spectrum only depends on the shape of the spectrum, so it isn't
+        affected by the mass or number of casks.
+        """
         cask = cask_reactive()
         if cask is None:
             return pd.DataFrame()
@@ -757,27 +942,7 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
         cooling_time = float(input.sampling_cooling_time())
         n_samples = input.n_samples()
 
-        # Get spectrum and sample
-        spec = cask.get_total_spectrum(cooling_time=cooling_time)
-        spec.equalise(width=1, min_energy=0, max_energy=6000)
-        samples = spec.sample(n_samples=n_samples)
-        counts, _ = np.histogram(samples, bins=spec.energy)
-
-        # Scale the original flux to match the total counts for comparison on the plot
-        scale_factor = max(counts.max(), 1) / max(spec.flux.max(), 1)
-        scaled_flux = spec.flux * scale_factor
-
-        # Combine into a single dataframe
-        energy_bin_min = spec.energy[:-1]
-        energy_bin_max = spec.energy[1:]
-        return pd.DataFrame(
-            {
-                "energy_min": energy_bin_min,
-                "energy_max": energy_bin_max,
-                "sampled_counts": counts,
-                "scaled_flux": scaled_flux,
-            }
-        )
+        return calculate_sampled_spectrum(cask, cooling_time, n_samples)
 
     @output
     @render_widget
@@ -829,12 +994,68 @@ def server(input: Inputs, output: Outputs, session: Session) -> None:  # noqa: P
 
         return figure
 
-    @render.download(filename="spectrum_sampling.csv")
-    def download_sampling() -> Iterable[bytes]:
-        """Download sampled spectrum as CSV."""
-        with BytesIO() as buffer:
-            sampling_data().to_csv(buffer, index=False)
-            yield buffer.getvalue().decode()
+    @render.download(filename=lambda: f"spectrum_sampling.{input.download_format()}")
+    def download_sampling() -> Iterable[str | bytes]:
+        """Download sampled spectrum in the selected format."""
+        yield from iter_download(sampling_data(), input.download_format())
+
+    # -----------------------------------------------------------------------
+    # Time Evolution tab
+    @reactive.calc
+    def cask_evolution() -> CaskEvolution | None:
+        """Precalculate the spectra over the slider range for the reference mass.
+
+        Moving the slider then only interpolates between the precalculated spectra,
+        so the plot can be animated without recalculating the spectrum each frame.
+        """
+        cask = cask_reactive()
+        if cask is None or cask.initial_cooling_time >= EVOLUTION_MAX_TIME:
+            return None
+        return CaskEvolution(cask, max_time=EVOLUTION_MAX_TIME, max_energy=6000)
+
+    @output
+    @render_widget
+    def plot_evolution() -> go.Figure | None:
+        """Plot the total cask spectrum at the cooling time on the slider."""
+        evolution = cask_evolution()
+        if evolution is None:
+            return None
+
+        # Times before the cask was removed are shown at the initial cooling time
+        cooling_time = max(
+            float(input.evolution_time()), evolution.cask.initial_cooling_time
+        )
+        spec = evolution.get_spectrum(cooling_time) * scale_factor()
+
+        # Create Plotly figure
+        figure = go.Figure()
+        figure.update_layout(
+            title=f"Spectrum after {cooling_time:.3g} years since removal",
+            xaxis={
+                "title": "Energy [keV]",
+                "range": [0, 6000],
+            },
+            yaxis={
+                "title": "Relative Flux [keV⁻¹ s⁻¹]",
+                "type": "log",
+                "range": [10, 18],
+            },
+            template="plotly_white",
+            hovermode="x unified",
+        )
+        figure.add_trace(
+            go.Scatter(
+                x=spec.energy[:-1],
+                y=spec.flux,
+                mode="lines",
+                line={"shape": "hv"},
+                name="Total spectrum",
+                hovertemplate=(
+                    "Energy: %{x:.0f} keV<br>Flux: %{y:.3e} keV⁻¹ s⁻¹<extra></extra>"
+                ),
+            )
+        )
+        return figure
 
 
 app = App(app_ui, server)
@@ -1,13 +1,21 @@
 """Data loading module for antineutrino spectra calculations."""
 
-from .fispin import get_isotope_masses
-from .iaea import get_antineutrino_spectrum
+from .fispin import get_isotope_masses, iter_isotope_masses, load_tabqfiles
+from .iaea import get_antineutrino_branches, get_antineutrino_spectrum
+from .index import get_nuclide_index
 from .mendeleev import get_isotope_properties
+from .nuclides import get_nuclide, get_zai
 from .utils import get_example_tbq_path
 
 __all__ = [
+    "get_antineutrino_branches",
     "get_antineutrino_spectrum",
     "get_example_tbq_path",
     "get_isotope_masses",
     "get_isotope_properties",
+    "get_nuclide",
+    "get_nuclide_index",
+    "get_zai",
+    "iter_isotope_masses",
+    "load_tabqfiles",
 ]
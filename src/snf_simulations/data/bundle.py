@@ -0,0 +1,412 @@
+"""Module for offline nuclear data bundles.
+
+A data bundle is a single file holding the IAEA spectrum files and isotope
+properties for a set of nuclides, so they can be used without network access,
+e.g. on machines with no internet connection. It is a zip archive with:
+
+- ``manifest.json``, giving the bundle format version, the package and mendeleev
+  versions it was built with, the checksum of each spectrum file, and the
+  properties (mass, half-life and decay modes) of each isotope.
+- ``spectra/<nuclide>.csv``, the compressed spectrum file for each nuclide.
+
+The archive is memory-mapped when opened, so each spectrum is read straight from
+the mapped file when it is first used, and the pages are shared between every
+process using the same bundle.
+
+Bundles are found in the SNF_SIMULATIONS_DATA_BUNDLE environment variable (a list of
+paths separated by os.pathsep), and any ``*.snfdata`` files in the user and site
+cache directories (see ``snf-sim data import``). Spectrum files in a bundle are used
+after the user and site caches, but before the data included in the package.
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+import zipfile
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, TypedDict
+
+from .cache import (
+    _get_package_version,
+    add_cache_file,
+    atomic_write,
+    get_cache_dir,
+    get_site_cache_dirs,
+)
+from .nuclides import get_nuclide, get_zai
+
+if TYPE_CHECKING:
+    from .mendeleev import IsotopeProperties
+
+BUNDLE_SUFFIX = ".snfdata"
+_BUNDLE_ENV_VAR = "SNF_SIMULATIONS_DATA_BUNDLE"
+_BUNDLE_FORMAT = "snf_simulations.data_bundle"
+_BUNDLE_VERSION = 1
+_MANIFEST_NAME = "manifest.json"
+_SPECTRA_DIR = "spectra"
+
+
+class BundleEntry(TypedDict):
+    """Class to represent the record of one spectrum file in a data bundle."""
+
+    sha256: str
+    size: int
+
+
+class _MappedFile:
+    """Read-only file object for a memory-mapped file, as used by zipfile.
+
+    Only needed as mmap objects have no seekable method before Python 3.13.
+    """
+
+    def __init__(self, mapped: mmap.mmap) -> None:
+        """Initialize the _MappedFile object."""
+        self._mapped = mapped
+
+    def seekable(self) -> bool:
+        """Return True, as the file supports random access."""
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        """Move to a new position in the file, returning the new position."""
+        self._mapped.seek(offset, whence)
+        return self._mapped.tell()
+
+    def tell(self) -> int:
+        """Return the current position in the file."""
+        return self._mapped.tell()
+
+    def read(self, size: int | None = -1) -> bytes:
+        """Read up to size bytes from the current position, or to the end."""
+        return self._mapped.read(-1 if size is None else size)
+
+
+class DataBundle:
+    """Class to read an offline nuclear data bundle.
+
+    Attributes:
+        filepath: Path to the bundle file.
+        package_version: Version of snf_simulations the bundle was built with.
+        mendeleev_version: Version of mendeleev the properties were taken from.
+        created: Time the bundle was built, in ISO format.
+        spectra: Dictionary mapping each spectrum file name (e.g. '90sr.csv') to its
+            BundleEntry.
+        properties: Dictionary mapping each isotope name (e.g. 'Sr90') to its
+            IsotopeProperties.
+
+    """
+
+    def __init__(self, filepath: str | Path) -> None:
+        """Initialize the DataBundle object, opening and checking the bundle file.
+
+        Args:
+            filepath: Path to the bundle file.
+
+        """
+        self.filepath = Path(filepath)
+        with self.filepath.open("rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as err:
+                # Empty files can't be memory-mapped.
+                msg = f"{self.filepath} is not a valid data bundle: {err}"
+                raise ValueError(msg) from err
+        try:
+            self._zipfile = zipfile.ZipFile(_MappedFile(self._mmap))
+            manifest = json.loads(self._zipfile.read(_MANIFEST_NAME))
+        except (zipfile.BadZipFile, KeyError, ValueError) as err:
+            self._mmap.close()
+            msg = f"{self.filepath} is not a valid data bundle: {err}"
+            raise ValueError(msg) from err
+        if manifest.get("format") != _BUNDLE_FORMAT:
+            self.close()
+            msg = f"{self.filepath} is not a valid data bundle"
+            raise ValueError(msg)
+        if manifest.get("version") != _BUNDLE_VERSION:
+            self.close()
+            msg = (
+                f"Unsupported data bundle version {manifest.get('version')} "
+                f"in {self.filepath} (expected {_BUNDLE_VERSION})"
+            )
+            raise ValueError(msg)
+        # Used for the paths of the files in the bundle.
+        self._zipfile.filename = str(self.filepath)
+
+        self.package_version: str = manifest["package_version"]
+        self.mendeleev_version: str = manifest["mendeleev_version"]
+        self.created: str = manifest["created"]
+        self.spectra: dict[str, BundleEntry] = manifest["spectra"]
+        self.properties: dict[str, IsotopeProperties] = manifest["properties"]
+        self._properties_by_zai = {
+            get_zai(name): properties for name, properties in self.properties.items()
+        }
+
+    def __repr__(self) -> str:
+        """Return a string representation of the DataBundle object."""
+        return (
+            f"<DataBundle: {len(self.spectra)} spectra, "
+            f"{len(self.properties)} isotopes, {self.filepath}>"
+        )
+
+    def __enter__(self) -> "DataBundle":
+        """Return the bundle, which is closed at the end of the with block."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the bundle."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the bundle file."""
+        self._zipfile.close()
+        self._mmap.close()
+
+    def get_spectrum_file(self, filename: str) -> zipfile.Path | None:
+        """Get a spectrum file in the bundle.
+
+        Args:
+            filename: Name of the spectrum file, e.g. '90sr.csv'.
+
+        Returns:
+            The file in the bundle, or None if the bundle doesn't include it.
+
+        """
+        if filename not in self.spectra:
+            return None
+        return zipfile.Path(self._zipfile, at=f"{_SPECTRA_DIR}/{filename}")
+
+    def get_properties(self, isotope_name: str) -> "IsotopeProperties | None":
+        """Get the properties of an isotope in the bundle.
+
+        Args:
+            isotope_name: Name of the isotope.
+                Format should be 'ElementMass' (e.g. Ru106) or 'MassElement'
+                (e.g. 106Ru). Metastable states are given by an "m" or "n" suffix.
+
+        Returns:
+            The properties, or None if the bundle doesn't include the isotope.
+
+        """
+        return self._properties_by_zai.get(get_zai(isotope_name))
+
+    def verify(self) -> list[str]:
+        """Check every spectrum file in the bundle against its checksum.
+
+        Returns:
+            The names of any files that are missing or damaged.
+
+        """
+        damaged = []
+        for filename, entry in self.spectra.items():
+            try:
+                data = self._zipfile.read(f"{_SPECTRA_DIR}/{filename}")
+            except (KeyError, zipfile.BadZipFile):
+                damaged.append(filename)
+                continue
+            if (
+                len(data) != entry["size"]
+                or hashlib.sha256(data).hexdigest() != entry["sha256"]
+            ):
+                damaged.append(filename)
+        return damaged
+
+
+def build_bundle(
+    filepath: str | Path, isotopes: Iterable[str], verbose: bool = False
+) -> Path:
+    """Build a data bundle for a set of isotopes.
+
+    The properties of every isotope are included, and the spectrum file for every
+    isotope with a beta-minus decay mode. Any spectra that aren't available locally
+    are downloaded first, so this should be run on a machine with network access.
+
+    Args:
+        filepath: Path to write the bundle to.
+        isotopes: Names of the isotopes to include, e.g. 'Sr90'.
+        verbose: If True, print the reason any isotopes are skipped.
+
+    Returns:
+        The path to the bundle.
+
+    """
+    # Imported here as the iaea and mendeleev modules use bundles.
+    from .iaea import _fetch_spectrum_file, _find_spectrum_file  # noqa: PLC0415
+    from .index import _get_mendeleev_version  # noqa: PLC0415
+    from .mendeleev import get_isotope_properties  # noqa: PLC0415
+
+    properties = {}
+    spectra = {}
+    for isotope in isotopes:
+        try:
+            isotope_properties = get_isotope_properties(isotope)
+        except ValueError as err:
+            if verbose:
+                print(f"Skipping {isotope}: {err}")
+            continue
+        properties[get_nuclide(isotope).name] = isotope_properties
+        if "B-" not in isotope_properties["decay_modes"]:
+            continue
+        _fetch_spectrum_file(isotope)
+        spectrum_file = _find_spectrum_file(isotope)
+        if spectrum_file is not None:
+            spectra[spectrum_file.name] = spectrum_file.read_bytes()
+
+    manifest = {
+        "format": _BUNDLE_FORMAT,
+        "version": _BUNDLE_VERSION,
+        "package_version": _get_package_version(),
+        "mendeleev_version": _get_mendeleev_version(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "spectra": {
+            filename: BundleEntry(
+                sha256=hashlib.sha256(data).hexdigest(), size=len(data)
+            )
+            for filename, data in sorted(spectra.items())
+        },
+        "properties": dict(sorted(properties.items())),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(
+        buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9
+    ) as bundle:
+        bundle.writestr(_MANIFEST_NAME, json.dumps(manifest, indent=2))
+        for filename, data in sorted(spectra.items()):
+            bundle.writestr(f"{_SPECTRA_DIR}/{filename}", data)
+
+    filepath = Path(filepath)
+    atomic_write(filepath, buffer.getvalue())
+    return filepath
+
+
+def import_bundle(filepath: str | Path) -> Path:
+    """Check a data bundle and add it to the user cache directory.
+
+    Args:
+        filepath: Path to the bundle file.
+
+    Returns:
+        The path to the bundle in the cache directory.
+
+    """
+    filepath = Path(filepath)
+    with DataBundle(filepath) as bundle:
+        damaged = bundle.verify()
+    if damaged:
+        msg = f"Damaged files in data bundle {filepath}: {', '.join(damaged)}"
+        raise ValueError(msg)
+    return add_cache_file(
+        filepath.with_suffix(BUNDLE_SUFFIX).name,
+        filepath.read_bytes(),
+        source=str(filepath.resolve()),
+    )
+
+
+# The bundle files found in each directory, with the directory modification time.
+_bundle_dirs: dict[Path, tuple[int, list[Path]]] = {}
+# The bundles opened so far, with the file modification time and size.
+_bundles: dict[Path, tuple[tuple[int, int], DataBundle]] = {}
+# The path and stamp of each bundle used by the last call to get_data_bundles.
+_bundle_stamps: list[tuple[Path, tuple[int, int]]] = []
+_bundles_lock = threading.Lock()
+
+
+def _get_bundle_paths() -> list[Path]:
+    """Get the paths of every data bundle, in the order they are used."""
+    paths = [
+        Path(path).expanduser()
+        for path in os.environ.get(_BUNDLE_ENV_VAR, "").split(os.pathsep)
+        if path.strip()
+    ]
+    for directory in [get_cache_dir(create=False), *get_site_cache_dirs()]:
+        try:
+            mtime_ns = directory.stat().st_mtime_ns
+        except OSError:
+            continue
+        cached = _bundle_dirs.get(directory)
+        if cached is None or cached[0] != mtime_ns:
+            cached = (mtime_ns, sorted(directory.glob(f"*{BUNDLE_SUFFIX}")))
+            _bundle_dirs[directory] = cached
+        paths += cached[1]
+    return paths
+
+
+def get_data_bundles() -> list[DataBundle]:
+    """Get every data bundle that is available.
+
+    Each bundle is only opened once, unless the file changes. If the bundles have
+    changed since the last call, the cached isotope properties are cleared, so the
+    properties from the new bundles are used.
+
+    Returns:
+        The DataBundle objects, in the order they are used.
+
+    """
+    bundles = []
+    stamps = []
+    with _bundles_lock:
+        for path in _get_bundle_paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                msg = f"Data bundle {path} not found"
+                raise ValueError(msg) from None
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            cached = _bundles.get(path)
+            if cached is None or cached[0] != stamp:
+                # Any old bundle is left open, as its files may still be in use.
+                cached = (stamp, DataBundle(path))
+                _bundles[path] = cached
+            bundles.append(cached[1])
+            stamps.append((path, stamp))
+        changed = stamps != _bundle_stamps
+        _bundle_stamps[:] = stamps
+    if changed:
+        from .mendeleev import _get_isotope_properties_cached  # noqa: PLC0415
+
+        _get_isotope_properties_cached.cache_clear()
+    return bundles
+
+
+def find_bundle_spectrum(filename: str) -> zipfile.Path | None:
+    """Find a spectrum file in the data bundles.
+
+    Args:
+        filename: Name of the spectrum file, e.g. '90sr.csv'.
+
+    Returns:
+        The file in the first bundle that includes it, or None.
+
+    """
+    for bundle in get_data_bundles():
+        spectrum_file = bundle.get_spectrum_file(filename)
+        if spectrum_file is not None:
+            return spectrum_file
+    return None
+
+
+def get_bundle_properties(isotope_name: str) -> "IsotopeProperties | None":
+    """Get the properties of an isotope from the data bundles.
+
+    Args:
+        isotope_name: Name of the isotope, e.g. 'Sr90', '90Sr' or 'Y90m'.
+
+    Returns:
+        The properties from the first bundle that includes the isotope, or None.
+
+    """
+    for bundle in get_data_bundles():
+        properties = bundle.get_properties(isotope_name)
+        if properties is not None:
+            return properties
+    return None
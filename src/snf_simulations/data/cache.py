@@ -0,0 +1,330 @@
+"""Module for managing the cache directory used for spectrum data files.
+
+The cache directory can be shared by many processes at once, e.g. batch workers
+all starting at the same time. To make this safe:
+
+- Files are written to a temporary file in the same directory and then renamed
+  into place, so a reader never sees a partly written file.
+- Creating a file is done while holding a lock on it, so only one process
+  downloads each file while any others wait and then use it.
+- Every file written is recorded in a manifest with its checksum, size, source
+  and the package version, which can be used to find damaged files.
+
+Spectrum files are looked for in this cache directory, then in any read-only site
+cache directories, then in any offline data bundles, then in the data included in
+the package, and are only written here if they have to be downloaded.
+
+The cache can be checked and cleaned from the command line with
+``snf-sim cache verify``, ``snf-sim cache prune`` and ``snf-sim cache warm``.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TypedDict
+
+_CACHE_DIR_ENV_VAR = "SNF_SIMULATIONS_CACHE_DIR"
+_SITE_CACHE_DIR_ENV_VAR = "SNF_SIMULATIONS_SITE_CACHE_DIR"
+_MANIFEST_FILENAME = "manifest.json"
+_MANIFEST_VERSION = 1
+_LOCK_DIRNAME = ".locks"
+_SPECTRUM_SUFFIX = ".csv"
+_TEMP_PREFIX = ".tmp-"
+
+# Temporary files older than this (in seconds) are left over from a process that
+# stopped while writing, rather than still being written.
+_STALE_TEMP_AGE = 3600
+
+# Cache directories that have already been created by this process.
+_created_dirs: set[Path] = set()
+_created_dirs_lock = threading.Lock()
+
+
+class ManifestEntry(TypedDict):
+    """Class to represent the record of one file in the cache manifest."""
+
+    sha256: str
+    size: int
+    source: str
+    package_version: str
+    created: str
+
+
+def _get_package_version() -> str:
+    """Return the installed snf_simulations version."""
+    try:
+        return version("snf_simulations")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def get_cache_dir(create: bool = True) -> Path:
+    """Return the writable directory used for downloaded spectrum data.
+
+    Args:
+        create: If True, create the directory if it doesn't exist. This is only
+            done the first time it is used by each process.
+
+    Returns:
+        Path to the cache directory.
+
+    """
+    cache_dir = os.environ.get(_CACHE_DIR_ENV_VAR)
+    if cache_dir is not None:
+        path = Path(cache_dir).expanduser()
+    else:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+        if xdg_cache_home is not None:
+            path = Path(xdg_cache_home).expanduser() / "snf_simulations" / "spec_data"
+        else:
+            path = Path.home() / ".cache" / "snf_simulations" / "spec_data"
+
+    if create:
+        with _created_dirs_lock:
+            if path not in _created_dirs:
+                path.mkdir(parents=True, exist_ok=True)
+                _created_dirs.add(path)
+    return path
+
+
+def get_site_cache_dirs() -> list[Path]:
+    """Return the read-only site cache directories for spectrum data.
+
+    These are given by the SNF_SIMULATIONS_SITE_CACHE_DIR environment variable,
+    separated by os.pathsep (":" on Linux), e.g. a shared directory prepared once
+    for every job on a cluster. They are never written to.
+
+    Returns:
+        List of paths to the site cache directories.
+
+    """
+    site_cache_dirs = os.environ.get(_SITE_CACHE_DIR_ENV_VAR, "")
+    return [
+        Path(path).expanduser()
+        for path in site_cache_dirs.split(os.pathsep)
+        if path.strip()
+    ]
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on a lock file, shared between processes and threads.
+
+    Args:
+        path: Path to the lock file, which is created if it doesn't exist.
+
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as lock_file:
+        if os.name == "nt":
+            import msvcrt  # noqa: PLC0415
+
+            # LK_LOCK retries for 10 seconds before raising an error.
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl  # noqa: PLC0415
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def cache_lock(filename: str) -> AbstractContextManager[None]:
+    """Lock a file in the cache directory while it is being created.
+
+    Args:
+        filename: Name of the file in the cache directory, e.g. '90sr.csv'.
+
+    """
+    return file_lock(get_cache_dir() / _LOCK_DIRNAME / f"{filename}.lock")
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write a file by writing a temporary file and then renaming it into place.
+
+    Args:
+        path: Path of the file to write.
+        data: Contents of the file.
+
+    """
+    fd, temp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f"{_TEMP_PREFIX}{path.name}."
+    )
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(data)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        Path(temp_name).replace(path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def _read_manifest(cache_dir: Path) -> dict[str, ManifestEntry]:
+    """Read the manifest of a cache directory, or an empty one if there isn't one."""
+    filepath = cache_dir / _MANIFEST_FILENAME
+    try:
+        data = json.loads(filepath.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != _MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def _write_manifest(cache_dir: Path, files: dict[str, ManifestEntry]) -> None:
+    """Write the manifest of a cache directory."""
+    data = {"version": _MANIFEST_VERSION, "files": files}
+    atomic_write(
+        cache_dir / _MANIFEST_FILENAME,
+        json.dumps(data, indent=2, sort_keys=True).encode("utf-8"),
+    )
+
+
+def get_manifest() -> dict[str, ManifestEntry]:
+    """Get the manifest of the files in the cache directory.
+
+    Returns:
+        Dictionary mapping each file name to its ManifestEntry.
+
+    """
+    return _read_manifest(get_cache_dir())
+
+
+def add_cache_file(filename: str, data: bytes, source: str) -> Path:
+    """Write a file to the cache directory and record it in the manifest.
+
+    Args:
+        filename: Name of the file in the cache directory, e.g. '90sr.csv'.
+        data: Contents of the file.
+        source: Where the data came from, e.g. the download URL.
+
+    Returns:
+        Path to the file.
+
+    """
+    cache_dir = get_cache_dir()
+    filepath = cache_dir / filename
+    atomic_write(filepath, data)
+    with cache_lock(_MANIFEST_FILENAME):
+        files = _read_manifest(cache_dir)
+        files[filename] = ManifestEntry(
+            sha256=hashlib.sha256(data).hexdigest(),
+            size=len(data),
+            source=source,
+            package_version=_get_package_version(),
+            created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        )
+        _write_manifest(cache_dir, files)
+    return filepath
+
+
+def _get_filenames(cache_dir: Path, files: dict[str, ManifestEntry]) -> list[str]:
+    """Get the names of the spectrum files in the cache directory or manifest."""
+    return sorted(
+        set(files) | {path.name for path in cache_dir.glob(f"*{_SPECTRUM_SUFFIX}")}
+    )
+
+
+def _check_file(filepath: Path, entry: ManifestEntry | None) -> str | None:
+    """Check a cache file against its manifest entry, returning any problem."""
+    if entry is None:
+        return "not in manifest"
+    if not filepath.is_file():
+        return "missing"
+    if filepath.stat().st_size != entry["size"]:
+        return "size mismatch"
+    if hashlib.sha256(filepath.read_bytes()).hexdigest() != entry["sha256"]:
+        return "checksum mismatch"
+    return None
+
+
+def verify_cache() -> dict[str, str]:
+    """Check every spectrum file in the cache directory against the manifest.
+
+    Files that aren't in the manifest (e.g. saved by hand, or by an older version)
+    are reported, but aren't counted as damaged.
+
+    Returns:
+        Dictionary mapping the name of each file with a problem to a description
+        of the problem: "missing", "size mismatch", "checksum mismatch",
+        "not in manifest" or "temporary file".
+
+    """
+    cache_dir = get_cache_dir()
+    files = _read_manifest(cache_dir)
+    problems = {}
+    for filename in _get_filenames(cache_dir, files):
+        problem = _check_file(cache_dir / filename, files.get(filename))
+        if problem is not None:
+            problems[filename] = problem
+    for path in sorted(cache_dir.glob(f"{_TEMP_PREFIX}*")):
+        problems[path.name] = "temporary file"
+    return problems
+
+
+def prune_cache(remove_all: bool = False, include_bundles: bool = False) -> list[str]:
+    """Remove damaged files from the cache directory.
+
+    Spectrum files that are missing or don't match their checksum are removed from
+    the cache and the manifest, so they are fetched again the next time they are
+    used. Temporary files left by processes that stopped while writing are also
+    removed. Files that aren't in the manifest are kept.
+
+    Imported data bundles are kept unless include_bundles is True, as they can't
+    be fetched again (e.g. on a machine without internet access).
+
+    Args:
+        remove_all: If True, remove every spectrum file, e.g. to fetch them all
+            again after a new release of the IAEA data.
+        include_bundles: If True, also remove imported data bundles (with
+            remove_all, or if they are damaged).
+
+    Returns:
+        The names of the files removed.
+
+    """
+    cache_dir = get_cache_dir()
+    files = _read_manifest(cache_dir)
+    removed = []
+    for filename in _get_filenames(cache_dir, files):
+        if not include_bundles and not filename.endswith(_SPECTRUM_SUFFIX):
+            continue
+        # Files are always locked before the manifest, to avoid deadlocks.
+        with cache_lock(filename):
+            # Read the manifest again, in case the file was replaced meanwhile.
+            entry = _read_manifest(cache_dir).get(filename)
+            problem = _check_file(cache_dir / filename, entry)
+            if remove_all or problem not in {None, "not in manifest"}:
+                (cache_dir / filename).unlink(missing_ok=True)
+                removed.append(filename)
+    with cache_lock(_MANIFEST_FILENAME):
+        files = _read_manifest(cache_dir)
+        for filename in removed:
+            files.pop(filename, None)
+        _write_manifest(cache_dir, files)
+    for path in sorted(cache_dir.glob(f"{_TEMP_PREFIX}*")):
+        try:
+            if time.time() - path.stat().st_mtime > _STALE_TEMP_AGE:
+                path.unlink()
+                removed.append(path.name)
+        except FileNotFoundError:
+            # Renamed into place by the process writing it.
+            continue
+    return removed
@@ -1,10 +1,21 @@
 """Module for loading FISPIN .tbQ output files."""
 
+import glob
+import math
+import os
+import re
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
+from typing import NamedTuple
 
 import numpy as np
 import pandas as pd
 
+from ..profiling import profiled
+from .nuclides import get_nuclide, get_zai
 from .utils import _UNITS_TO_SECONDS
 
 _UNITS_TO_YEARS = {
@@ -16,6 +27,82 @@ _UNITS_TO_YEARS = {
 }
 
 
+@cache
+def _format_isotope_name(name: str) -> str:
+    """Format an isotope name from a FISPIN file, e.g. "SR 90" as "Sr90".
+
+    The same few hundred names are repeated in every section of a file, so each is
+    only formatted once.
+    """
+    try:
+        # The FISPIN format uses "A" as the symbol for argon, which the nuclide
+        # registry also accepts.
+        return get_nuclide(name).name
+    except ValueError:
+        # Rows which aren't a single nuclide, e.g. "<other>".
+        return name.capitalize().replace(" ", "")
+
+
+@contextmanager
+def _open_lines(filepath_or_contents: str | Path) -> Iterator[Iterator[str]]:
+    """Open a .tbQ file, or the contents of one, to read one line at a time."""
+    try:
+        f = open(filepath_or_contents)  # noqa: SIM115
+    except FileNotFoundError:
+        if isinstance(filepath_or_contents, Path):
+            raise
+        # If the input is not a valid file path, treat it as the file contents.
+        yield iter(filepath_or_contents.splitlines(keepends=True))
+        return
+    with f:
+        yield iter(f)
+
+
+def _iter_sections(
+    filepath_or_contents: str | Path,
+) -> Iterator[tuple[str, list[str], list[list[str]]]]:
+    """Read the time sections of a .tbQ file one at a time.
+
+    Only one section is held in memory at once, however long the file is.
+
+    Yields:
+        The simulation time string, the column names and the rows of each section.
+
+    """
+    with _open_lines(filepath_or_contents) as lines:
+        # The file can contain multiple sections for different time steps.
+        # Header format is "*** TIME    2.347E+00 YEARS"
+        # We'll extract the value and unit string, but leave converting it to the
+        # user.
+        time_str = None
+        header_keys: list[str] = []
+        isotope_data: list[list[str]] = []
+        for line in lines:
+            if line.startswith("*** TIME"):
+                if time_str is not None:
+                    yield time_str, header_keys, isotope_data
+                # Get the time value and unit from the header line
+                time_str = " ".join(line.split()[2:4])
+                # The next line should be the header
+                header_keys = next(lines, "").split()
+                isotope_data = []
+            elif time_str is not None:
+                # Read the following lines until we hit the total at the end of
+                # the section (or the end of the file)
+                if line.startswith("TOTAL"):
+                    yield time_str, header_keys, isotope_data
+                    time_str = None
+                    continue
+
+                # Complication: the first few characters are the isotope,
+                # which can contain spaces (e.g. "U 235").
+                isotope = _format_isotope_name(line[0:12])
+                isotope_data.append([isotope, *line[12:].split()])
+        if time_str is not None:
+            yield time_str, header_keys, isotope_data
+
+
+@profiled("data.load_tabqfile")
 def load_tabqfile(filepath_or_contents: str | Path) -> dict[str, pd.DataFrame]:
     """Load in a FISPIN .tbQ output file and extract the data.
 
@@ -30,52 +117,8 @@ def load_tabqfile(filepath_or_contents: str | Path) -> dict[str, pd.DataFrame]:
         e.g. "6.000E+01 MINS" or "2.800E+01 DAYS".
 
     """
-    try:
-        with open(filepath_or_contents) as f:
-            lines = f.readlines()
-    except FileNotFoundError:
-        if isinstance(filepath_or_contents, Path):
-            raise
-        # If the input is not a valid file path, treat it as the file contents.
-        lines = filepath_or_contents.splitlines(keepends=True)
-
-    # The file can contain multiple sections for different time steps.
-    # Header format is "*** TIME    2.347E+00 YEARS"
-    # We'll extract the value and unit string, but leave converting it to the user.
     time_dfs = {}
-    for i, line in enumerate(lines):
-        if not line.startswith("*** TIME"):
-            continue
-
-        # Get the time value and unit from the header line
-        time_str = " ".join(line.split()[2:4])
-
-        # The next line should be the header
-        header_keys = lines[i + 1].split()
-
-        # Read the following lines until we hit the total at the end of the section
-        # (or the end of the file)
-        isotope_data = []
-        for data_line in lines[i + 2 :]:
-            if data_line.startswith("TOTAL"):
-                break
-
-            # Complication: the first few characters are the isotope,
-            # which can contain spaces (e.g. "U 235").
-            # We'll remove spaces from the first 12 characters before splitting.
-            # The FISPIN format also uses "A" as the atomic symbol
-            # for argon, not "Ar", so we replace that here.
-            # We also format the isotope to be capitalised (e.g. "Sr90"),
-            # by default the file has them in uppercase (e.g. "SR90").
-            isotope = data_line[0:12].capitalize()
-            if isotope[:2] == "A ":
-                isotope = "Ar" + isotope[2:]
-            isotope = isotope.replace(" ", "")
-
-            data_line_new = f"{isotope:>12}{data_line[12:]}"
-            data = data_line_new.strip().split()
-            isotope_data.append(data)
-
+    for time_str, header_keys, isotope_data in _iter_sections(filepath_or_contents):
         # Convert to a DataFrame and store
         df = pd.DataFrame(isotope_data, columns=pd.Index(header_keys))
         for col in header_keys[1:]:
@@ -85,6 +128,35 @@ def load_tabqfile(filepath_or_contents: str | Path) -> dict[str, pd.DataFrame]:
     return time_dfs
 
 
+def iter_isotope_masses(
+    filepath_or_contents: str | Path,
+) -> Iterator[tuple[dict[str, float], float]]:
+    """Get the isotope masses from every time section of a FISPIN .tbQ file.
+
+    The file is read one section at a time, so this can be used for files with
+    any number of time steps without loading the whole file.
+
+    Args:
+        filepath_or_contents: Path to the file to load,
+        or the contents of the file as a string.
+
+    Yields:
+        The isotope masses (in kg) and cooling time (in years) of each section,
+        in the order they are in the file (see get_isotope_masses).
+
+    """
+    for time_str, header_keys, isotope_data in _iter_sections(filepath_or_contents):
+        column = header_keys.index("GRAMS")
+        isotope_masses = {}
+        for row in isotope_data:
+            try:
+                mass = float(row[column])
+            except (IndexError, ValueError):
+                mass = np.nan
+            isotope_masses[row[0]] = mass * 1e-3  # convert from grams to kg
+        yield isotope_masses, _convert_sim_time_to_years(time_str)
+
+
 def _convert_sim_time_to_years(time_str: str) -> float:
     """Convert a simulation time string from the .tbQ file into years."""
     value, unit = time_str.split()
@@ -140,3 +212,157 @@ def get_isotope_masses(
         for name, mass in zip(names, masses, strict=True)
     }
     return isotope_masses, cooling_time
+
+
+class TabqInventory(NamedTuple):
+    """Class to hold the isotope masses from many .tbQ files on a shared nuclide axis.
+
+    Attributes:
+        filepaths: Path to each of the N files.
+        zais: Sorted array of the ZAI ids of the M nuclides in any of the files
+            (see data.nuclides).
+        masses: Array of the mass (in kg) of each nuclide in each file, with shape
+            (N, M). Nuclides that aren't in a file have a mass of zero.
+        total_masses: Array of the total mass (in kg) of each file, including any
+            rows that aren't a single nuclide (e.g. "<other>").
+        cooling_times: Array of the cooling time (in years) the masses of each file
+            correspond to.
+        tags: Dictionary of the tags parsed from each filename, see load_tabqfiles.
+
+    """
+
+    filepaths: list[Path]
+    zais: np.ndarray
+    masses: np.ndarray
+    total_masses: np.ndarray
+    cooling_times: np.ndarray
+    tags: list[dict[str, str | float]]
+
+
+def _find_tabqfiles(filepaths: str | Path | Sequence[str | Path]) -> list[Path]:
+    """Find the .tbQ files given by a directory, a glob pattern, or a list of paths."""
+    if isinstance(filepaths, (str, Path)):
+        path = Path(filepaths)
+        if path.is_dir():
+            found = sorted(path.glob("*.tbQ"))
+        elif glob.has_magic(str(filepaths)):
+            found = sorted(Path(name) for name in glob.glob(str(filepaths)))
+        else:
+            found = [path]
+    else:
+        found = [Path(path) for path in filepaths]
+    if not found:
+        msg = f"No .tbQ files found in {filepaths}"
+        raise ValueError(msg)
+    return found
+
+
+def _parse_filename_tags(
+    filepath: Path, pattern: re.Pattern | None
+) -> dict[str, str | float]:
+    """Get the values of the named groups of a pattern in a filename."""
+    if pattern is None:
+        return {}
+    match = pattern.search(filepath.stem)
+    if match is None:
+        return {}
+    tags: dict[str, str | float] = {}
+    for key, value in match.groupdict().items():
+        if value is None:
+            continue
+        try:
+            tags[key] = float(value)
+        except ValueError:
+            tags[key] = value
+    return tags
+
+
+def _load_tabq_masses(
+    filepath: Path, time_str: str | None
+) -> tuple[np.ndarray, np.ndarray, float, float]:
+    """Load the nuclide masses from one .tbQ file, in a worker process.
+
+    Returns:
+        The ZAI ids and masses (in kg) of the nuclides in the file, the total mass
+        of every row, and the cooling time in years.
+
+    """
+    isotope_masses, cooling_time = get_isotope_masses(filepath, time_str)
+    zais = []
+    masses = []
+    for name, mass in isotope_masses.items():
+        try:
+            zai = get_zai(name)
+        except ValueError:
+            # Rows which aren't a single nuclide, e.g. "<other>".
+            continue
+        zais.append(zai)
+        masses.append(mass)
+    total_mass = float(np.nansum(list(isotope_masses.values())))
+    return (
+        np.array(zais, dtype=np.int64),
+        np.array(masses, dtype=np.float64),
+        total_mass,
+        cooling_time,
+    )
+
+
+@profiled("data.load_tabqfiles")
+def load_tabqfiles(
+    filepaths: str | Path | Sequence[str | Path],
+    time_str: str | None = None,
+    filename_pattern: str | None = None,
+    max_workers: int | None = None,
+) -> TabqInventory:
+    r"""Load the isotope masses from many FISPIN .tbQ output files at once.
+
+    The files are parsed in a pool of worker processes, and the masses are aligned
+    into a single matrix with a column for every nuclide in any of the files.
+
+    Args:
+        filepaths: A directory (every .tbQ file in it is loaded), a glob pattern
+            (e.g. "runs/*/batch*.tbQ") or a list of paths to the files.
+        time_str: Specific simulation time to extract data for from every file.
+            If None, uses the earliest time in each file (see get_isotope_masses).
+        filename_pattern: Optional regular expression with named groups, which is
+            searched for in the name of each file (without the suffix) to give its
+            tags, e.g. r"batch(?P<batch>\d+)_bu(?P<burnup>[\d.]+)" gives
+            {"batch": 3.0, "burnup": 45.0} for "batch3_bu45.tbQ".
+            Values are converted to numbers where possible.
+        max_workers: Number of worker processes to use.
+            If None, uses the number of CPUs. If 1, runs in the current process.
+
+    Returns:
+        A TabqInventory with the masses from every file.
+
+    """
+    paths = _find_tabqfiles(filepaths)
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, len(paths))
+    if max_workers < 1:
+        msg = "max_workers must be a positive value"
+        raise ValueError(msg)
+
+    time_strs = [time_str] * len(paths)
+    if max_workers == 1:
+        results = list(map(_load_tabq_masses, paths, time_strs))
+    else:
+        chunksize = max(1, math.ceil(len(paths) / (4 * max_workers)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(
+                executor.map(_load_tabq_masses, paths, time_strs, chunksize=chunksize)
+            )
+
+    zais = np.unique(np.concatenate([result[0] for result in results]))
+    masses = np.zeros((len(paths), len(zais)))
+    for i, (file_zais, file_masses, _, _) in enumerate(results):
+        masses[i, np.searchsorted(zais, file_zais)] = file_masses
+    pattern = re.compile(filename_pattern) if filename_pattern is not None else None
+    return TabqInventory(
+        filepaths=paths,
+        zais=zais,
+        masses=masses,
+        total_masses=np.array([result[2] for result in results]),
+        cooling_times=np.array([result[3] for result in results]),
+        tags=[_parse_filename_tags(path, pattern) for path in paths],
+    )
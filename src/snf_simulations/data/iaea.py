@@ -1,40 +1,64 @@
-"""Module for loading antineutrino spectrum data from the IAEA database."""
+"""Module for loading antineutrino spectrum data from the IAEA database.
 
-import os
-import shutil
+The spectrum file for each nuclide is looked for in order in:
+
+1. The user cache directory (see data.cache.get_cache_dir), so files saved there
+   by hand or written as synthetic test data take precedence.
+2. Any read-only site cache directories (see data.cache.get_site_cache_dirs).
+3. Any offline data bundles (see data.bundle).
+4. The data included in the package, which is read in place.
+
+Only if none of these have the file is it downloaded from the IAEA database and
+saved to the user cache.
+"""
+
+import threading
 import urllib.error
 import urllib.request
+import zipfile
 from importlib import resources
 from io import StringIO
 from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
 
 import numpy as np
 import pandas as pd
 
-from .utils import _parse_isotope
+from ..profiling import count, profiled
+from .bundle import find_bundle_spectrum
+from .cache import add_cache_file, cache_lock, get_cache_dir, get_site_cache_dirs
+from .nuclides import get_nuclide
 
-_CACHE_DIR_ENV_VAR = "SNF_SIMULATIONS_CACHE_DIR"
+if TYPE_CHECKING:
+    from importlib.resources.abc import Traversable
 
+_PACKAGED_DATA = "snf_simulations.data.spec_data"
 
-def _get_cache_dir() -> Path:
-    """Return the writable directory used for downloaded spectrum data.
 
-    Returns:
-        Path to the cache directory.
+class SpectrumBranch(NamedTuple):
+    """Class to represent the antineutrino spectrum from one level of a nuclide.
+
+    Attributes:
+        level_energy: Excitation energy of the parent level (keV),
+            0 for the ground state.
+        branching_fraction: Fraction of decays from the level that are beta-minus
+            decays, from the integral of the electron spectrum.
+        data: Array containing energy, flux, and uncertainty.
+            The flux is per decay of the level, so already includes the
+            branching fraction.
 
     """
-    cache_dir = os.environ.get(_CACHE_DIR_ENV_VAR)
-    if cache_dir is not None:
-        path = Path(cache_dir).expanduser()
-    else:
-        xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
-        if xdg_cache_home is not None:
-            path = Path(xdg_cache_home).expanduser() / "snf_simulations" / "spec_data"
-        else:
-            path = Path.home() / ".cache" / "snf_simulations" / "spec_data"
 
-    path.mkdir(parents=True, exist_ok=True)
-    return path
+    level_energy: float
+    branching_fraction: float
+    data: np.ndarray
+
+
+# The branches read from each spectrum file, with the file modification time and size
+# they were read at. Every level of a nuclide is in the same file, so this means the
+# file is only read once however many of the levels are used.
+_branches: dict[str, tuple[tuple[int, int], list[SpectrumBranch]]] = {}
+_branches_lock = threading.Lock()
 
 
 def _get_cache_file(isotope_name: str) -> Path:
@@ -45,31 +69,73 @@ def _get_cache_file(isotope_name: str) -> Path:
             Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
 
     Returns:
-        Path to the cache file for the isotope.
+        Path to the cache file for the isotope, which may not exist yet.
 
     """
     nuclide = _parse_nuclide(isotope_name)
-    return _get_cache_dir() / f"{nuclide}.csv"
+    return get_cache_dir(create=False) / f"{nuclide}.csv"
 
 
-def _copy_packaged_spectrum_to_cache(isotope_name: str) -> bool:
-    """Copy an included spectrum file for a nuclide into the package cache.
+def _find_packaged_spectrum(filename: str) -> "Traversable | None":
+    """Find a spectrum file included in the package.
 
     Args:
-        isotope_name: Name of the isotope to get the cache file for.
-            Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+        filename: Name of the spectrum file, e.g. '90sr.csv'.
 
     Returns:
-        True if a bundled file exists and was copied, otherwise False.
+        The packaged file, or None if there isn't one for the nuclide.
 
     """
-    nuclide = _parse_nuclide(isotope_name)
-    resource = resources.files("snf_simulations.data.spec_data") / f"{nuclide}.csv"
+    resource = resources.files(_PACKAGED_DATA) / filename
     if not resource.is_file():
-        return False
-    with resources.as_file(resource) as path:
-        shutil.copyfile(path, _get_cache_file(isotope_name))
-    return True
+        return None
+    return resource
+
+
+def _find_spectrum_file(isotope_name: str) -> "Path | Traversable | None":
+    """Find the spectrum file for an isotope, without downloading it.
+
+    Args:
+        isotope_name: Name of the isotope to find the file for.
+            Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+
+    Returns:
+        The first file found in the user cache, the site caches, the data bundles
+        or the package, or None if the file isn't available locally.
+
+    """
+    filename = f"{_parse_nuclide(isotope_name)}.csv"
+    for directory in [get_cache_dir(create=False), *get_site_cache_dirs()]:
+        filepath = directory / filename
+        if filepath.is_file():
+            return filepath
+    bundle_file = find_bundle_spectrum(filename)
+    if bundle_file is not None:
+        return bundle_file
+    return _find_packaged_spectrum(filename)
+
+
+def _get_file_stamp(spectrum_file: "Path | Traversable") -> tuple[int, int] | None:
+    """Get the modification time and size of a spectrum file.
+
+    Args:
+        spectrum_file: The spectrum file, as returned by _find_spectrum_file.
+
+    Returns:
+        The modification time in nanoseconds and the size in bytes, of the archive
+        for files inside one, or None if they aren't known.
+
+    """
+    if isinstance(spectrum_file, zipfile.Path):
+        if spectrum_file.root.filename is None:
+            return None
+        filepath = Path(spectrum_file.root.filename)
+    elif isinstance(spectrum_file, Path):
+        filepath = spectrum_file
+    else:
+        return None
+    stat = filepath.stat()
+    return (stat.st_mtime_ns, stat.st_size)
 
 
 def _parse_nuclide(isotope_name: str) -> str:
@@ -82,10 +148,11 @@ def _parse_nuclide(isotope_name: str) -> str:
     Returns:
         nuclide: Nuclide name in the format 'masselement' (e.g. '106ru').
         Note that the element symbol is converted to lowercase.
+        Metastable states (e.g. Rh106m) are in the same IAEA data as the ground
+        state, so give the same nuclide name.
 
     """
-    element, mass_number = _parse_isotope(isotope_name)
-    return f"{mass_number}{element.lower()}"
+    return get_nuclide(isotope_name).iaea_name
 
 
 def _download_spectrum_data(isotope_name: str, timeout: float = 20.0) -> str:
@@ -138,60 +205,155 @@ def _download_spectrum_data(isotope_name: str, timeout: float = 20.0) -> str:
     # Some nuclides (e.g. Ru106) have duplicate rows in the IAEA database.
     # These break creating histograms, so remove exact duplicates before caching.
     # Some (Ra228) even have duplicate energy lines but different (rounded) fluxes!
-    # So we specify based only on the energy column.
-    data = data.drop_duplicates(subset=["bin_en"], keep="first")
+    # So we specify based only on the parent level and energy columns.
+    data = data.drop_duplicates(subset=["p_energy", "bin_en"], keep="first")
 
     filename = _get_cache_file(nuclide)
     if not filename.is_file():
-        data.to_csv(filename, index=False)
+        add_cache_file(
+            filename.name, data.to_csv(index=False).encode("utf-8"), source=url
+        )
 
     return str(filename)
 
 
+def _load_spectrum_branches(isotope_name: str) -> list[SpectrumBranch]:
+    """Load the spectrum for each parent level of a nuclide from its data file.
+
+    The file is only read again if it has changed since it was last read.
+
+    Args:
+        isotope_name: Name of the isotope to load data for.
+            Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+
+    Returns:
+        The SpectrumBranch for each level, in order of increasing level energy.
+
+    """
+    nuclide = _parse_nuclide(isotope_name)
+    spectrum_file = _find_spectrum_file(nuclide)
+    if spectrum_file is None:
+        msg = f"Spectrum data file for {nuclide} not found."
+        raise ValueError(msg)
+    try:
+        # Files without a known time can't change while the package is used.
+        stamp = _get_file_stamp(spectrum_file) or (0, 0)
+    except FileNotFoundError:
+        msg = f"Spectrum data file for {nuclide} not found."
+        raise ValueError(msg) from None
+    key = str(spectrum_file)
+    with _branches_lock:
+        cached = _branches.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    count("iaea.read_csv")
+    with spectrum_file.open("rb") as file:
+        df = pd.read_csv(file)
+
+    # Some isotopes have spectra for more than one parent level (e.g. the ground
+    # state and a metastable state), given by the p_energy column.
+    branches = []
+    for level_energy, level in df.groupby("p_energy", sort=True):
+        data = level[["bin_en", "dn_de_nu", "unc_dn_de_nu"]].to_numpy()
+        data.flags.writeable = False
+        energy = level["bin_en"].to_numpy()
+        branching_fraction = np.sum(level["dn_de"].to_numpy()[:-1] * np.diff(energy))
+        branches.append(
+            SpectrumBranch(float(level_energy), float(branching_fraction), data)
+        )
+    with _branches_lock:
+        _branches[key] = (stamp, branches)
+    return branches
+
+
 def _load_spectrum_file(isotope_name: str) -> np.ndarray:
-    """Load in antineutrino spectrum data from a CSV file in the cache.
+    """Load in antineutrino spectrum data from the CSV file for a nuclide.
 
     Args:
         isotope_name: Name of the isotope to load data for.
             Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+            Metastable states are given by an "m" or "n" suffix (e.g. Rh106m), and
+            use the spectrum of the first or second excited parent level.
 
     Returns:
         Array containing energy, flux, and uncertainty.
+        The array is empty if there is no data for the level.
+
+    """
+    isomer = get_nuclide(isotope_name).isomer
+    branches = _load_spectrum_branches(isotope_name)
+    if isomer == 0:
+        levels = [branch for branch in branches if branch.level_energy == 0]
+    else:
+        levels = [branch for branch in branches if branch.level_energy > 0][
+            isomer - 1 : isomer
+        ]
+    if not levels:
+        return np.empty((0, 3))
+    return levels[0].data
+
+
+def _fetch_spectrum_file(isotope_name: str) -> bool:
+    """Make sure the spectrum file for an isotope is available, downloading it if not.
+
+    Returns:
+        True if the file was downloaded.
 
     """
+    if _find_spectrum_file(isotope_name) is not None:
+        return False
     nuclide = _parse_nuclide(isotope_name)
     cache_file = _get_cache_file(nuclide)
-    if not cache_file.is_file():
-        msg = f"Spectrum data file for {nuclide} not found in cache."
-        raise ValueError(msg)
+    with cache_lock(cache_file.name):
+        # Another process may have created the file while waiting for the lock.
+        if cache_file.is_file():
+            return False
+        print(f"Downloading spectrum data for {nuclide} from IAEA database...")
+        count("iaea.download")
+        _download_spectrum_data(nuclide)
+    # Keep the eligibility index up to date with the new file.
+    from .index import get_nuclide_index  # noqa: PLC0415
 
-    df = pd.read_csv(cache_file)
+    get_nuclide_index().record_branches(nuclide, _load_spectrum_branches(nuclide))
+    return True
 
-    # Some isotopes have multiple decay chains, so cut off where the
-    # main decay chain ends based on the p_energy column.
-    df = df[df["p_energy"] == 0]
 
-    # Return only the relevant columns as a "D numpy array.
-    return df[["bin_en", "dn_de_nu", "unc_dn_de_nu"]].to_numpy()
+@profiled("data.get_antineutrino_branches")
+def get_antineutrino_branches(isotope_name: str) -> list[SpectrumBranch]:
+    """Load the antineutrino spectrum for each parent level of a nuclide.
 
+    If the spectrum data is not included in the package or already in the cache,
+    it is downloaded from the IAEA database and saved locally before loading.
 
+    Args:
+        isotope_name: Isotope name to load the spectra for.
+            Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+
+    Returns:
+        The SpectrumBranch for each level with data, in order of increasing level
+        energy. The ground state is first, if it has data.
+
+    """
+    _fetch_spectrum_file(isotope_name)
+    return _load_spectrum_branches(isotope_name)
+
+
+@profiled("data.get_antineutrino_spectrum")
 def get_antineutrino_spectrum(isotope_name: str) -> np.ndarray:
     """Load in antineutrino spectrum data for a given isotope.
 
-    If the spectrum data is not already in the cache, it is downloaded from the
-    IAEA database and saved locally before loading.
+    If the spectrum data is not included in the package or already in the cache,
+    it is downloaded from the IAEA database and saved locally before loading.
 
     Args:
         isotope_name: Isotope name to load the spectrum for.
             Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+            Metastable states are given by an "m" or "n" suffix (e.g. Rh106m).
 
     Returns:
         Array containing energy, flux, and uncertainty.
 
     """
-    nuclide = _parse_nuclide(isotope_name)
-    cache_file = _get_cache_file(nuclide)
-    if not cache_file.is_file() and not _copy_packaged_spectrum_to_cache(isotope_name):
-        print(f"Downloading spectrum data for {nuclide} from IAEA database...")
-        _download_spectrum_data(nuclide)
-    return _load_spectrum_file(nuclide)
+    _fetch_spectrum_file(isotope_name)
+    return _load_spectrum_file(isotope_name)
@@ -0,0 +1,289 @@
+"""Module for the index of which isotopes contribute to antineutrino spectra.
+
+An isotope is included in a cask spectrum if it has a beta-minus decay mode (from
+mendeleev, or the table of metastable states) and has a non-empty antineutrino
+spectrum for its level in the IAEA database. Checking these needs a mendeleev query
+and reading the spectrum file for each isotope, so the results are stored in an
+index file in the user spectrum cache directory (if it can be written). Each isotope
+is only checked once, and later checks are just a set lookup.
+
+The index is updated whenever a new spectrum file is downloaded, and any entries
+for spectrum files that have been changed since they were checked are checked
+again when the index is loaded.
+"""
+
+import json
+import threading
+from collections.abc import Iterable
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import TypedDict
+
+from .cache import atomic_write, get_cache_dir
+from .iaea import SpectrumBranch, _find_spectrum_file, _get_file_stamp
+from .mendeleev import _has_isomer_data, get_isotope_properties
+from .nuclides import _ISOMER_SUFFIXES, get_nuclide, get_zai
+
+_INDEX_FILENAME = "eligibility.json"
+_INDEX_VERSION = 2
+
+
+class IndexEntry(TypedDict):
+    """Class to represent the checks for one nuclide level in the index."""
+
+    beta_minus: bool | None
+    has_spectrum: bool | None
+    spectrum_mtime_ns: int | None
+
+
+def _get_mendeleev_version() -> str:
+    """Return the installed mendeleev version, which the decay modes come from."""
+    try:
+        return version("mendeleev")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _get_spectrum_mtime(zai: int) -> int | None:
+    """Get the modification time of the spectrum file used for a ZAI id.
+
+    Returns:
+        The modification time in nanoseconds (of the archive for files inside one),
+        or None if there is no file or the time isn't known.
+
+    """
+    spectrum_file = _find_spectrum_file(get_nuclide(zai).name)
+    if spectrum_file is None:
+        return None
+    try:
+        stamp = _get_file_stamp(spectrum_file)
+    except OSError:
+        return None
+    return None if stamp is None else stamp[0]
+
+
+def _get_key(zai: int) -> str:
+    """Get the index file key for a ZAI id, e.g. '90y' for Y90 and '90y:m' for Y90m."""
+    nuclide = get_nuclide(zai)
+    if nuclide.isomer == 0:
+        return nuclide.iaea_name
+    return f"{nuclide.iaea_name}:{_ISOMER_SUFFIXES[nuclide.isomer - 1]}"
+
+
+def _parse_key(key: str) -> int:
+    """Get the ZAI id for an index file key."""
+    nuclide, _, suffix = key.partition(":")
+    return get_zai(nuclide) + (_ISOMER_SUFFIXES.index(suffix) + 1 if suffix else 0)
+
+
+class NuclideIndex:
+    """Class holding the eligibility of each nuclide checked so far.
+
+    Attributes:
+        filepath: Path to the index file.
+
+    """
+
+    def __init__(self, filepath: Path) -> None:
+        """Initialize the NuclideIndex object, loading the index file if it exists."""
+        self.filepath = filepath
+        # Entries are keyed by ZAI id, see data.nuclides.
+        self._entries: dict[int, IndexEntry] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the NuclideIndex object."""
+        return f"<NuclideIndex: {len(self._entries)} nuclides, {self.filepath}>"
+
+    def _load(self) -> None:
+        """Load the index file, dropping any entries that are out of date."""
+        if not self.filepath.is_file():
+            return
+        try:
+            data = json.loads(self.filepath.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            # A damaged index is rebuilt as the isotopes are checked.
+            return
+        if data.get("version") != _INDEX_VERSION:
+            return
+        same_mendeleev = data.get("mendeleev") == _get_mendeleev_version()
+        for key, entry in data.get("nuclides", {}).items():
+            try:
+                zai = _parse_key(key)
+            except ValueError:
+                continue
+            if not same_mendeleev:
+                entry["beta_minus"] = None
+            if (
+                entry["has_spectrum"] is not None
+                and _get_spectrum_mtime(zai) != entry["spectrum_mtime_ns"]
+            ):
+                entry["has_spectrum"] = None
+                entry["spectrum_mtime_ns"] = None
+            self._entries[zai] = IndexEntry(**entry)
+
+    def save(self) -> None:
+        """Write the index file, replacing the old one in a single step."""
+        with self._lock:
+            data = {
+                "version": _INDEX_VERSION,
+                "mendeleev": _get_mendeleev_version(),
+                "nuclides": {
+                    _get_key(zai): entry for zai, entry in self._entries.items()
+                },
+            }
+            text = json.dumps(data, sort_keys=True)
+            try:
+                self.filepath.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write(self.filepath, text.encode("utf-8"))
+            except OSError:
+                # The cache directory may be read-only, in which case the index is
+                # only kept for this process.
+                return
+
+    def _get_entry(self, zai: int) -> IndexEntry:
+        """Get the entry for a ZAI id, adding an empty one if it isn't indexed."""
+        if zai not in self._entries:
+            self._entries[zai] = IndexEntry(
+                beta_minus=None, has_spectrum=None, spectrum_mtime_ns=None
+            )
+        return self._entries[zai]
+
+    def record_spectrum(
+        self, isotope_name: str, has_spectrum: bool, save: bool = True
+    ) -> None:
+        """Record whether the spectrum file for an isotope has any data.
+
+        Args:
+            isotope_name: Name of the isotope, e.g. 'Sr90', '90Sr' or 'Y90m'.
+            has_spectrum: True if the spectrum for the level is not empty.
+            save: If True, write the index file straight away.
+
+        """
+        zai = get_zai(isotope_name)
+        with self._lock:
+            entry = self._get_entry(zai)
+            entry["has_spectrum"] = has_spectrum
+            entry["spectrum_mtime_ns"] = _get_spectrum_mtime(zai)
+            if save:
+                self.save()
+
+    def record_branches(self, nuclide: str, branches: list[SpectrumBranch]) -> None:
+        """Record which levels of a nuclide have spectra in its new spectrum file.
+
+        Args:
+            nuclide: Nuclide name in the IAEA format, e.g. '90y'.
+            branches: The branches loaded from the file,
+                as returned by data.get_antineutrino_branches.
+
+        """
+        has_ground_state = any(
+            branch.level_energy == 0 and len(branch.data) > 0 for branch in branches
+        )
+        n_isomers = sum(branch.level_energy > 0 for branch in branches)
+        name = get_nuclide(nuclide).name
+        with self._lock:
+            self.record_spectrum(name, has_ground_state, save=False)
+            for i, suffix in enumerate(_ISOMER_SUFFIXES):
+                self.record_spectrum(f"{name}{suffix}", n_isomers > i, save=False)
+            self.save()
+
+    def update(self, isotopes: Iterable[str]) -> None:
+        """Check any of the isotopes that aren't already in the index.
+
+        Isotopes without a beta-minus decay mode, and metastable states without
+        decay data, don't need their spectrum checked. Any spectra that aren't
+        available locally are downloaded.
+
+        Args:
+            isotopes: Names of the isotopes to check.
+
+        """
+        # Imported here as the iaea module updates the index after downloads.
+        from .iaea import get_antineutrino_spectrum  # noqa: PLC0415
+
+        changed = False
+        with self._lock:
+            for isotope in isotopes:
+                entry = self._get_entry(get_zai(isotope))
+                if entry["beta_minus"] is None:
+                    if _has_isomer_data(isotope):
+                        properties = get_isotope_properties(isotope)
+                        entry["beta_minus"] = "B-" in properties["decay_modes"]
+                    else:
+                        entry["beta_minus"] = False
+                    changed = True
+                if entry["beta_minus"] and entry["has_spectrum"] is None:
+                    data = get_antineutrino_spectrum(isotope)
+                    self.record_spectrum(isotope, len(data) > 0, save=False)
+                    changed = True
+            if changed:
+                self.save()
+
+    def get_eligible(self) -> set[str]:
+        """Get the nuclides in the index that contribute to antineutrino spectra.
+
+        Returns:
+            Set of nuclide names in the IAEA format, e.g. '90sr', with metastable
+            states given by a suffix, e.g. '106rh:m'.
+
+        """
+        return {_get_key(zai) for zai in self._get_eligible_zais()}
+
+    def _get_eligible_zais(self) -> set[int]:
+        """Get the ZAI ids of the nuclides that contribute to antineutrino spectra."""
+        with self._lock:
+            return {
+                zai
+                for zai, entry in self._entries.items()
+                if entry["beta_minus"] and entry["has_spectrum"]
+            }
+
+    def filter(self, isotopes: Iterable[str], verbose: bool = False) -> list[str]:
+        """Filter a list of isotopes to only those that contribute to the spectrum.
+
+        Args:
+            isotopes: Names of the isotopes to filter.
+            verbose: If True, print the reason each isotope is excluded.
+
+        Returns:
+            The isotopes which have a beta-minus decay mode and a non-empty
+            antineutrino spectrum, in the same order.
+
+        """
+        isotopes = list(isotopes)
+        self.update(isotopes)
+        eligible = self._get_eligible_zais()
+        filtered = []
+        for isotope in isotopes:
+            zai = get_zai(isotope)
+            if zai in eligible:
+                filtered.append(isotope)
+            elif verbose:
+                if not _has_isomer_data(isotope):
+                    print(f"Excluding metastable isotope without decay data: {isotope}")
+                elif not self._entries[zai]["beta_minus"]:
+                    print(f"Excluding isotope without B- decay: {isotope}")
+                else:
+                    print(f"Excluding isotope with empty spectrum data: {isotope}")
+        return filtered
+
+
+# One index for each cache directory used.
+_indexes: dict[Path, NuclideIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_nuclide_index() -> NuclideIndex:
+    """Get the nuclide index for the current spectrum cache directory.
+
+    Returns:
+        The shared NuclideIndex, loaded from the cache directory the first time.
+
+    """
+    filepath = get_cache_dir(create=False) / _INDEX_FILENAME
+    with _indexes_lock:
+        if filepath not in _indexes:
+            _indexes[filepath] = NuclideIndex(filepath)
+        return _indexes[filepath]
@@ -6,7 +6,10 @@ from typing import TypedDict
 import numpy as np
 from mendeleev import isotope
 
-from .utils import _UNITS_TO_SECONDS, _parse_isotope
+from ..profiling import count, profiled
+from .bundle import get_bundle_properties
+from .nuclides import get_nuclide, get_zai
+from .utils import _UNITS_TO_SECONDS
 
 
 class IsotopeProperties(TypedDict):
@@ -17,19 +20,83 @@ class IsotopeProperties(TypedDict):
     decay_modes: list[str]
 
 
+# Half-lives and decay modes of common metastable states in spent fuel, which
+# aren't included in mendeleev. Values from the IAEA Live Chart of Nuclides.
+_ISOMERS: dict[str, tuple[float, str, list[str]]] = {
+    "Kr85m": (4.480, "hour", ["B-", "IT"]),
+    "Y90m": (3.19, "hour", ["IT", "B-"]),
+    "Y91m": (49.71, "minute", ["IT"]),
+    "Nb93m": (16.12, "year", ["IT"]),
+    "Nb95m": (3.61, "day", ["IT", "B-"]),
+    "Tc99m": (6.0067, "hour", ["IT", "B-"]),
+    "Rh103m": (56.114, "minute", ["IT"]),
+    "Rh106m": (131.0, "minute", ["B-"]),
+    "Ag110m": (249.83, "day", ["B-", "IT"]),
+    "Cd113m": (14.1, "year", ["B-", "IT"]),
+    "Sn119m": (293.1, "day", ["IT"]),
+    "Sn121m": (43.9, "year", ["IT", "B-"]),
+    "Sb126m": (19.15, "minute", ["B-", "IT"]),
+    "Te127m": (106.1, "day", ["IT", "B-"]),
+    "Te129m": (33.6, "day", ["IT", "B-"]),
+    "Xe131m": (11.84, "day", ["IT"]),
+    "Xe133m": (2.198, "day", ["IT"]),
+    "Cs134m": (2.912, "hour", ["IT"]),
+    "Ba137m": (2.552, "minute", ["IT"]),
+    "Pr144m": (7.2, "minute", ["IT", "B-"]),
+    "Pm148m": (41.29, "day", ["B-", "IT"]),
+    "Pa234m": (1.159, "minute", ["B-", "IT"]),
+    "Am242m": (141.0, "year", ["IT", "A"]),
+}
+
+
+def _get_isomer_key(isotope_name: str) -> str | None:
+    """Return the key in the isomer table for a metastable state, or None if not."""
+    nuclide = get_nuclide(isotope_name)
+    if nuclide.isomer == 0:
+        return None
+    return nuclide.name
+
+
+def _has_isomer_data(isotope_name: str) -> bool:
+    """Return True unless the isotope is a metastable state without decay data."""
+    key = _get_isomer_key(isotope_name)
+    return key is None or key in _ISOMERS
+
+
 @cache
-def _get_isotope_properties_cached(isotope_name: str) -> IsotopeProperties:
-    """Return cached isotope properties loaded from mendeleev."""
-    element, mass_number = _parse_isotope(isotope_name)
-    mendeleev_isotope = isotope(element, mass_number)
+def _get_isotope_properties_cached(zai: int) -> IsotopeProperties:
+    """Return cached isotope properties, by ZAI id.
 
+    The properties are taken from the data bundles if any include the isotope, or
+    else loaded from mendeleev. The cache is cleared if the bundles change (see
+    data.bundle.get_data_bundles).
+    """
+    nuclide = get_nuclide(zai)
+    properties = get_bundle_properties(nuclide.name)
+    if properties is not None:
+        return properties
+    count("mendeleev.lookup")
+    mendeleev_isotope = isotope(nuclide.symbol, nuclide.mass_number)
+
+    # The excitation energy of a metastable state makes a negligible difference
+    # to the mass, so it's taken from the ground state.
     molar_mass = float(mendeleev_isotope.mass)  # ty: ignore
+    if nuclide.isomer > 0:
+        if nuclide.name not in _ISOMERS:
+            msg = f"No decay data for metastable isotope {nuclide.name}"
+            raise ValueError(msg)
+        half_life, unit, decay_modes = _ISOMERS[nuclide.name]
+        return IsotopeProperties(
+            molar_mass=molar_mass,
+            half_life=half_life * _UNITS_TO_SECONDS[unit] / _UNITS_TO_SECONDS["year"],
+            decay_modes=list(decay_modes),
+        )
     if mendeleev_isotope.half_life is not None:
         half_life = float(mendeleev_isotope.half_life)  # ty: ignore
         unit = str(mendeleev_isotope.half_life_unit)
         seconds_per_unit = _UNITS_TO_SECONDS.get(unit)
         if seconds_per_unit is None:
-            msg = f"Unsupported half-life unit for isotope {isotope_name}: {unit}. "
+            msg = f"Unsupported half-life unit for isotope {nuclide.name}: {unit}. "
             msg += "Supported units are: "
             msg += ", ".join(sorted(_UNITS_TO_SECONDS))
             raise ValueError(msg)
@@ -43,14 +110,19 @@ def _get_isotope_properties_cached(isotope_name: str) -> IsotopeProperties:
     )
 
 
+@profiled("data.get_isotope_properties")
 def get_isotope_properties(isotope_name: str) -> IsotopeProperties:
     """Get the mass, half-life and decay modes for the given isotope.
 
-    Uses data from the mendeleev package.
+    Uses data from the mendeleev package, except for the half-life and decay modes
+    of metastable states, which come from a table of common isomers. If the isotope
+    is in an offline data bundle (see data.bundle), the properties are taken from
+    the bundle instead.
 
     Args:
         isotope_name: Name of the isotope.
             Format should be 'ElementMass' (e.g. Ru106) or 'MassElement' (e.g. 106Ru).
+            Metastable states are given by an "m" or "n" suffix (e.g. Rh106m).
 
     Returns:
         Dictionary containing:
@@ -59,4 +131,4 @@ def get_isotope_properties(isotope_name: str) -> IsotopeProperties:
         - the decay modes of the isotope (as a list of strings)
 
     """
-    return _get_isotope_properties_cached(isotope_name)
+    return _get_isotope_properties_cached(get_zai(isotope_name))
@@ -0,0 +1,161 @@
+"""Module for the registry of nuclide names.
+
+Nuclides are identified internally by an integer ZAI id::
+
+    zai = 10000 * Z + 10 * A + I
+
+where Z is the atomic number, A the mass number and I the isomer number (0 for the
+ground state, 1 for the first metastable state "m" and 2 for the second "n"), e.g.
+380900 for Sr90 and 390901 for Y90m.
+
+Any accepted spelling of a name ("Sr90", "90Sr", "sr90", "SR 90" or "Y  90" from
+FISPIN files, or "Y90m") is only parsed the first time it is seen. Later lookups of
+the same spelling are a single dictionary lookup, so code that is called for every
+isotope can use the ids rather than parsing the names again.
+"""
+
+import re
+import threading
+from collections.abc import Iterable
+from typing import NamedTuple
+
+import numpy as np
+
+# Element symbols in order of atomic number.
+_SYMBOLS = (  # noqa: SIM905
+    "H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn "
+    "Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La "
+    "Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po "
+    "At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs Mt Ds Rg "
+    "Cn Nh Fl Mc Lv Ts Og"
+).split()
+_ATOMIC_NUMBERS = {symbol.upper(): z for z, symbol in enumerate(_SYMBOLS, start=1)}
+# FISPIN uses "A" as the symbol for argon.
+_ATOMIC_NUMBERS["A"] = _ATOMIC_NUMBERS["AR"]
+
+# Suffixes for the metastable states of a nuclide, in order of level energy.
+_ISOMER_SUFFIXES = "mn"
+
+# 'ElementMass' with an optional metastable suffix, or 'MassElement', with any
+# spaces between the element and mass number (e.g. "Y  90" in FISPIN files).
+_NAME_PATTERN = re.compile(
+    r"^\s*(?:([A-Za-z]+)\s*(\d+)([mn]?)|(\d+)\s*([A-Za-z]+))\s*$"
+)
+
+
+class Nuclide(NamedTuple):
+    """Class to represent a nuclide in the registry.
+
+    Attributes:
+        zai: The ZAI id, 10000 * Z + 10 * A + I.
+        z: The atomic number.
+        mass_number: The mass number.
+        isomer: 0 for the ground state, 1 for "m" and 2 for "n".
+        symbol: The element symbol, e.g. 'Sr'.
+        name: The name in the 'ElementMass' format, e.g. 'Sr90' or 'Y90m'.
+        iaea_name: The name of the nuclide (without any metastable suffix) in the
+            format used by the IAEA database, e.g. '90sr'.
+
+    """
+
+    zai: int
+    z: int
+    mass_number: int
+    isomer: int
+    symbol: str
+    name: str
+    iaea_name: str
+
+
+# The id for each spelling seen so far, and the nuclide for each id.
+_zais: dict[str, int] = {}
+_nuclides: dict[int, Nuclide] = {}
+_registry_lock = threading.Lock()
+
+
+def _parse_name(isotope_name: str) -> Nuclide:
+    """Parse an isotope name into a Nuclide."""
+    match = _NAME_PATTERN.match(isotope_name)
+    if match is None:
+        msg = f"Isotope format not recognized: {isotope_name}"
+        msg += " Use 'ElementMass' or 'MassElement', e.g., 'Ru106' or '106Ru'."
+        raise ValueError(msg)
+    if match.group(1) is not None:
+        element, mass_number, suffix = match.group(1, 2, 3)
+    else:
+        mass_number, element = match.group(4, 5)
+        suffix = ""
+    z = _ATOMIC_NUMBERS.get(element.upper())
+    if z is None:
+        msg = f"Unknown element symbol in isotope name: {isotope_name}"
+        raise ValueError(msg)
+    mass_number = int(mass_number)
+    isomer = _ISOMER_SUFFIXES.index(suffix) + 1 if suffix else 0
+    symbol = _SYMBOLS[z - 1]
+    return Nuclide(
+        zai=10000 * z + 10 * mass_number + isomer,
+        z=z,
+        mass_number=mass_number,
+        isomer=isomer,
+        symbol=symbol,
+        name=f"{symbol}{mass_number}{suffix}",
+        iaea_name=f"{mass_number}{symbol.lower()}",
+    )
+
+
+def get_zai(isotope_name: str) -> int:
+    """Get the ZAI id of an isotope.
+
+    Args:
+        isotope_name: Name of the isotope, e.g. 'Sr90', '90Sr', 'SR 90' or 'Y90m'.
+
+    Returns:
+        The ZAI id, e.g. 380900 for Sr90.
+
+    """
+    zai = _zais.get(isotope_name)
+    if zai is None:
+        nuclide = _parse_name(isotope_name)
+        zai = nuclide.zai
+        with _registry_lock:
+            _nuclides.setdefault(zai, nuclide)
+            _zais[isotope_name] = zai
+    return zai
+
+
+def get_zais(isotope_names: Iterable[str]) -> np.ndarray:
+    """Get the ZAI ids of a sequence of isotopes.
+
+    Args:
+        isotope_names: Names of the isotopes.
+
+    Returns:
+        Integer array of the ZAI ids, in the same order.
+
+    """
+    return np.array([get_zai(name) for name in isotope_names], dtype=np.int64)
+
+
+def get_nuclide(isotope: str | int) -> Nuclide:
+    """Get the registry entry for an isotope.
+
+    Args:
+        isotope: Name or ZAI id of the isotope.
+
+    Returns:
+        The Nuclide, giving the parts of the id and the standard names.
+
+    """
+    zai = get_zai(isotope) if isinstance(isotope, str) else int(isotope)
+    nuclide = _nuclides.get(zai)
+    if nuclide is None:
+        z, rest = divmod(zai, 10000)
+        mass_number, isomer = divmod(rest, 10)
+        if not 1 <= z <= len(_SYMBOLS) or isomer > len(_ISOMER_SUFFIXES):
+            msg = f"Invalid ZAI id: {zai}"
+            raise ValueError(msg)
+        suffix = _ISOMER_SUFFIXES[isomer - 1] if isomer else ""
+        nuclide = _nuclides.setdefault(
+            zai, _parse_name(f"{_SYMBOLS[z - 1]}{mass_number}{suffix}")
+        )
+    return nuclide
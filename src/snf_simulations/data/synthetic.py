@@ -0,0 +1,283 @@
+"""Module for writing synthetic input files for scaling tests and benchmarks.
+
+The files follow the formats of the real inputs, but the values are randomly
+generated, so they should only be used for testing the code and not for physics.
+"""
+
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .fispin import _UNITS_TO_YEARS
+from .iaea import _parse_nuclide
+from .nuclides import _SYMBOLS as _ALL_SYMBOLS
+from .utils import _parse_isotope
+
+# Element symbols in order of atomic number, up to californium.
+_SYMBOLS = _ALL_SYMBOLS[:98]
+
+# Nuclides in the example file, which are always written first so the default
+# isotopes can be loaded from any synthetic file.
+_COMMON_NUCLIDES = (
+    "Kr88",
+    "Rb88",
+    "Sr90",
+    "Y90",
+    "Zr93",
+    "Tc99",
+    "Ru106",
+    "Rh106",
+    "I129",
+    "Cs135",
+    "Cs137",
+    "Ce144",
+    "Pr144",
+    "Np239",
+    "Pu241",
+    "Am242",
+    "U235",
+    "Ar38",
+)
+
+_ELECTRON_MASS = 511.0  # keV
+
+
+def _get_atomic_number(element: str) -> int:
+    """Get the atomic number of an element from its symbol."""
+    try:
+        return _SYMBOLS.index(element.capitalize()) + 1
+    except ValueError:
+        msg = f"Unknown element symbol: {element}"
+        raise ValueError(msg) from None
+
+
+def _format_fispin_nuclide(isotope_name: str) -> str:
+    """Format an isotope name as it appears in a FISPIN file, e.g. "SR 90".
+
+    The element symbol is in uppercase and padded so the name is five characters,
+    which gives names containing spaces such as "U 235" and "Y  90".
+    FISPIN also uses "A" as the symbol for argon.
+    """
+    element, mass_number = _parse_isotope(isotope_name)
+    element = element.upper()
+    if element == "AR":
+        element = "A"
+    return f"{element:<2}{mass_number:>3}"
+
+
+def get_synthetic_nuclides(n_nuclides: int) -> list[str]:
+    """Get a list of distinct nuclide names for a synthetic file.
+
+    The list starts with the nuclides in the example .tbQ file, followed by
+    generated nuclides with plausible mass numbers for each element.
+
+    Args:
+        n_nuclides: Number of nuclides to return.
+
+    Returns:
+        List of isotope names, e.g. ["Kr88", "Rb88", ...].
+
+    """
+    nuclides = list(_COMMON_NUCLIDES[:n_nuclides])
+    existing = set(nuclides)
+    # Mass numbers range from roughly twice the atomic number up to the
+    # neutron-rich side of stability.
+    for z, symbol in enumerate(_SYMBOLS, start=1):
+        for mass_number in range(max(z, 2 * z - 2), int(2.6 * z) + 4):
+            if len(nuclides) >= n_nuclides:
+                return nuclides
+            name = f"{symbol}{mass_number}"
+            if name not in existing:
+                nuclides.append(name)
+                existing.add(name)
+    if len(nuclides) < n_nuclides:
+        msg = f"Cannot generate more than {len(nuclides)} distinct nuclides"
+        raise ValueError(msg)
+    return nuclides
+
+
+def write_tabqfile(  # noqa: PLR0913
+    filepath: str | Path,
+    n_nuclides: int = 1000,
+    n_steps: int = 100,
+    units: Sequence[str] = ("HOURS", "DAYS", "YEARS"),
+    max_time: float = 100,
+    include_other: bool = False,
+    seed: int | None = None,
+) -> Path:
+    """Write a synthetic FISPIN .tbQ file.
+
+    Each nuclide is given a random initial mass and half-life, and the masses in
+    each time section follow exponential decay.
+
+    Args:
+        filepath: Path to write the file to.
+        n_nuclides: Number of nuclides in each time section.
+        n_steps: Number of time sections.
+        units: Time units to use for the section headers, cycled through in order.
+            Must be from SECONDS, MINS, HOURS, DAYS and YEARS.
+        max_time: Time of the last section in years. The first section is always
+            at 1 day, with the sections spaced logarithmically in between.
+        include_other: If True, include an "<other>" row at the end of each section,
+            as in the example file.
+        seed: Random seed for reproducibility.
+
+    Returns:
+        The path to the file.
+
+    """
+    if n_nuclides < 1 or n_steps < 1:
+        msg = "n_nuclides and n_steps must be positive values"
+        raise ValueError(msg)
+    unknown = set(units) - set(_UNITS_TO_YEARS)
+    if not units or unknown:
+        msg = f"units must be from {', '.join(_UNITS_TO_YEARS)}"
+        raise ValueError(msg)
+
+    rng = np.random.default_rng(seed)
+    nuclides = [
+        _format_fispin_nuclide(name) for name in get_synthetic_nuclides(n_nuclides)
+    ]
+    initial_masses = 10 ** rng.uniform(-6, 3, n_nuclides)  # grams
+    half_lives = 10 ** rng.uniform(-2, 6, n_nuclides)  # years
+    day = _UNITS_TO_YEARS["DAYS"]
+    times = np.geomspace(day, max(max_time, day), n_steps)  # years
+
+    lines = []
+    for i, time in enumerate(times):
+        unit = units[i % len(units)]
+        masses = initial_masses * np.exp(-np.log(2) * time / half_lives)
+        lines.append(f"*** TIME    {time / _UNITS_TO_YEARS[unit]:.3E} {unit}\n")
+        lines.append("ALL-NUC       GRAMS\n")
+        lines.extend(
+            f"{nuclide:<14}{mass:.4E}\n"
+            for nuclide, mass in zip(nuclides, masses, strict=True)
+        )
+        total = masses.sum()
+        if include_other:
+            other = 1e3 * total
+            lines.append(f"{'<other>':<14}{other:.4E}\n")
+            total += other
+        lines.append(f"{'TOTAL':<14}{total:.4E}\n")
+
+    filepath = Path(filepath)
+    filepath.write_text("".join(lines), encoding="utf-8")
+    return filepath
+
+
+def _get_beta_shape(energy: np.ndarray, end_point: float) -> np.ndarray:
+    """Get an approximate allowed beta decay antineutrino spectrum shape."""
+    electron_energy = np.clip(end_point - energy, 0, None)
+    electron_total_energy = electron_energy + _ELECTRON_MASS
+    electron_momentum = np.sqrt(electron_total_energy**2 - _ELECTRON_MASS**2)
+    return energy**2 * electron_momentum * electron_total_energy
+
+
+def write_spectrum_file(  # noqa: PLR0913
+    filepath: str | Path,
+    isotope_name: str,
+    end_point: float | None = None,
+    bin_width: float | None = None,
+    n_branches: int = 1,
+    seed: int | None = None,
+) -> Path:
+    """Write a synthetic antineutrino spectrum in the IAEA database CSV format.
+
+    Args:
+        filepath: Path to write the file to.
+        isotope_name: Isotope the spectrum is for, e.g. "Sr90".
+        end_point: Maximum energy of the spectrum (keV).
+            If None, a random value between 500 and 5000 keV is used.
+        bin_width: Width of the energy bins (keV).
+            If None, the spectrum is split into about 1000 bins.
+        n_branches: Number of decay branches. The first feeds the ground state
+            (p_energy = 0), and any others feed excited levels with lower end points.
+        seed: Random seed for reproducibility.
+
+    Returns:
+        The path to the file.
+
+    """
+    if n_branches < 1:
+        msg = "n_branches must be a positive value"
+        raise ValueError(msg)
+    rng = np.random.default_rng(seed)
+    element, mass_number = _parse_isotope(isotope_name)
+    z = _get_atomic_number(element)
+    if end_point is None:
+        end_point = float(rng.uniform(500, 5000))
+    if bin_width is None:
+        bin_width = end_point / 1000
+
+    rows = []
+    for branch in range(n_branches):
+        level = 0.0 if branch == 0 else float(rng.uniform(0.1, 0.9) * end_point)
+        branch_end_point = end_point - level
+        energy = np.arange(0, branch_end_point + bin_width, bin_width)
+        shape = _get_beta_shape(energy, branch_end_point)
+        flux = shape / (np.sum(shape) * bin_width)
+        # The electron spectrum is the mirror image of the antineutrino spectrum.
+        electron_flux = flux[::-1]
+        rows.append(
+            pd.DataFrame(
+                {
+                    "p_z": z,
+                    "p_n": mass_number - z,
+                    "p_symbol": element.capitalize(),
+                    "p_energy": level,
+                    "d_z": z + 1,
+                    "d_n": mass_number - z - 1,
+                    "d_symbol": _SYMBOLS[z] if z < len(_SYMBOLS) else "",
+                    "bin_en": np.round(energy, 6),
+                    "dn_de": electron_flux,
+                    "unc_dn_de": electron_flux * 0.01,
+                    "dn_de_nu": flux,
+                    "unc_dn_de_nu": flux * 0.01,
+                    "extraction_date": "2000-01-01",
+                }
+            )
+        )
+
+    filepath = Path(filepath)
+    pd.concat(rows).to_csv(filepath, index=False)
+    return filepath
+
+
+def write_spectrum_files(
+    directory: str | Path,
+    isotope_names: Sequence[str],
+    bin_width: float | None = None,
+    n_branches: int = 1,
+    seed: int | None = None,
+) -> list[Path]:
+    """Write synthetic spectra for many isotopes, named as in the spectrum cache.
+
+    Setting the SNF_SIMULATIONS_CACHE_DIR environment variable to the directory
+    means these spectra are loaded instead of downloading the real ones.
+
+    Args:
+        directory: Directory to write the files to.
+        isotope_names: Isotopes to write spectra for.
+        bin_width: Width of the energy bins (keV), see write_spectrum_file.
+        n_branches: Number of decay branches, see write_spectrum_file.
+        seed: Random seed for reproducibility.
+
+    Returns:
+        List of paths to the files.
+
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    return [
+        write_spectrum_file(
+            directory / f"{_parse_nuclide(isotope_name)}.csv",
+            isotope_name,
+            bin_width=bin_width,
+            n_branches=n_branches,
+            seed=int(rng.integers(2**32)),
+        )
+        for isotope_name in isotope_names
+    ]
@@ -56,6 +56,27 @@ def _parse_isotope(isotope_name: str) -> tuple[str, int]:
         raise ValueError(msg)
 
 
+def _parse_isomer(isotope_name: str) -> tuple[str, int]:
+    """Split an isotope name into the ground state name and the isomer number.
+
+    Metastable states are given by an "m" (first) or "n" (second) suffix after the
+    mass number, e.g. 'Y90m' or 'Rh106m'.
+
+    Args:
+        isotope_name: Name of the isotope to parse.
+
+    Returns:
+        name: The isotope name without the metastable suffix.
+        isomer: 0 for the ground state, 1 for "m" and 2 for "n".
+
+    """
+    match = re.match(r"^([A-Za-z]+\d+)([mn])$", isotope_name)
+    if match:
+        name, suffix = match.groups()
+        return name, 1 if suffix == "m" else 2
+    return isotope_name, 0
+
+
 def get_example_tbq_path() -> Path:
     """Return the path to the bundled example .tbQ file."""
     return Path(
@@ -0,0 +1,430 @@
+"""Evaluate the spectrum of a cask at any cooling time from a precomputed table.
+
+Calculating the total spectrum of a cask at a new cooling time means weighting and
+summing the spectrum of every isotope. The CaskEvolution class does this once for
+a grid of cooling times, and then gets the spectrum at any other time by
+interpolating between the two nearest times on the grid, which only needs a
+handful of operations per energy bin however many isotopes there are.
+
+The grid is refined until the interpolation error is below a given tolerance, so
+a smooth animation of the spectrum over a long time range (e.g. a slider in the
+dashboard) doesn't need the full calculation for each frame.
+
+The TabqEvolution class instead gives the spectrum at every time step in a FISPIN
+.tbQ file from the masses tabulated by FISPIN, rather than from the decay of the
+masses at the first time step, e.g. to cross-check the decay model.
+"""
+
+from collections.abc import Collection, Iterator, Sequence
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from .cask import Cask, ComponentBasis, _select_isotopes
+from .data.fispin import iter_isotope_masses
+from .physics import get_isotope_activity
+from .spec import Spectrum
+
+# Number of time steps in the initial grid, before refining.
+_INITIAL_STEPS = 32
+
+# Shortest time step (years) in the initial log-spaced grid, of about one day.
+_MIN_STEP = 1 / 365.25
+
+# When checking the interpolation error, bins with a flux less than this fraction
+# of the peak flux are compared to the peak instead of their own flux.
+_PEAK_FRACTION = 1e-6
+
+
+def _interpolate(
+    lower: np.ndarray, upper: np.ndarray, weight: np.ndarray | float
+) -> np.ndarray:
+    """Interpolate between two arrays of non-negative values.
+
+    The values are interpolated exponentially (i.e. linearly in log space), which
+    is exact for a bin with a single decaying isotope, or linearly if either of
+    the values is zero.
+    """
+    weight = np.asarray(weight, dtype=float)
+    result = (1 - weight) * lower + weight * upper
+    positive = (lower > 0) & (upper > 0)
+    log_lower = np.log(lower, where=positive, out=np.zeros_like(lower))
+    log_upper = np.log(upper, where=positive, out=np.zeros_like(upper))
+    exponential = np.exp((1 - weight) * log_lower + weight * log_upper)
+    return np.where(positive, exponential, result)
+
+
+class CaskEvolution:
+    """Class holding the total spectrum of a cask over a range of cooling times.
+
+    Attributes:
+        cask: The Cask the spectra are calculated for.
+        max_time: The latest cooling time (years) that can be evaluated.
+            The earliest is the initial_cooling_time of the cask.
+        rtol: The relative tolerance on the interpolated flux in each bin.
+            Bins with a flux below a millionth of the peak flux at that time are
+            compared to the peak flux instead.
+        max_points: Maximum number of cooling times in the grid.
+        basis: The ComponentBasis of the cask, used for the exact spectra.
+        times: The cooling times (years) on the refined grid.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        cask: Cask,
+        max_time: float,
+        width: float = 1,
+        max_energy: float | None = None,
+        rtol: float = 1e-3,
+        max_points: int = 10000,
+    ) -> None:
+        """Initialize the CaskEvolution object, and calculate the grid of spectra.
+
+        Args:
+            cask: The Cask to calculate the spectra for.
+            max_time: The latest cooling time (years) that can be evaluated.
+            width: Bin width (keV) for the spectra.
+            max_energy: Maximum energy (keV) for the spectra.
+                If None, uses the maximum energy across all the component spectra.
+            rtol: The relative tolerance on the interpolated flux in each bin.
+            max_points: Maximum number of cooling times in the grid.
+
+        """
+        if max_time <= cask.initial_cooling_time:
+            msg = "max_time must be greater than "
+            msg += f"the initial cask cooling time ({cask.initial_cooling_time:.3e})"
+            raise ValueError(msg)
+        if rtol <= 0:
+            msg = "rtol must be a positive value"
+            raise ValueError(msg)
+        self.cask = cask
+        self.max_time = max_time
+        self.rtol = rtol
+        self.max_points = max_points
+        self.basis: ComponentBasis = cask.get_component_basis(
+            width=width, max_energy=max_energy
+        )
+        self.times, self._flux, self._variance = self._refine()
+
+    def __repr__(self) -> str:
+        """Return a string representation of the CaskEvolution object."""
+        return (
+            f"<CaskEvolution: {self.cask!r}, "
+            f"{len(self.times)} times up to {self.max_time:g} years>"
+        )
+
+    def _get_exact(self, cooling_times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Calculate the flux and variance at each time from the component basis."""
+        activities = self.cask.get_component_activities(cooling_times)
+        flux = activities @ self.basis.flux
+        variance = np.square(activities) @ np.square(
+            self.basis.errors, dtype=np.float64
+        )
+        return flux, variance
+
+    def _within_tolerance(
+        self,
+        lower: list[np.ndarray],
+        upper: list[np.ndarray],
+        exact: list[np.ndarray],
+    ) -> np.ndarray:
+        """Check if the (flux, variance) interpolated at the midpoints is accurate.
+
+        Returns:
+            Boolean array, True for each interval where the interpolated flux and
+            errors at the midpoint are both within the tolerance.
+
+        """
+        within = np.ones(len(exact[0]), dtype=bool)
+        for i, transform in enumerate([np.asarray, np.sqrt]):
+            interpolated = transform(_interpolate(lower[i], upper[i], 0.5))
+            expected = transform(exact[i])
+            peak = expected.max(axis=1, keepdims=True)
+            tolerance = self.rtol * np.maximum(expected, _PEAK_FRACTION * peak)
+            within &= np.all(np.abs(interpolated - expected) <= tolerance, axis=1)
+        return within
+
+    def _refine(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calculate the grid of spectra, adding times until within the tolerance.
+
+        The grid starts with log-spaced steps from the initial cooling time, as the
+        spectrum changes quickest at early times while short-lived isotopes decay.
+        Each interval is then split in half until the interpolated flux and errors
+        at its midpoint match the exact values.
+        """
+        start = self.cask.initial_cooling_time
+        span = self.max_time - start
+        steps = np.geomspace(min(_MIN_STEP, span / 2), span, _INITIAL_STEPS)
+        times = start + np.concatenate([[0], steps])
+        flux, variance = self._get_exact(times)
+        points = [[times, flux, variance]]
+        n_points = len(times)
+
+        # Each interval still to check, given by the times, flux and variance at
+        # its lower and upper ends.
+        lower = [times[:-1], flux[:-1], variance[:-1]]
+        upper = [times[1:], flux[1:], variance[1:]]
+        while len(lower[0]) > 0:
+            midpoints = (lower[0] + upper[0]) / 2
+            exact = [midpoints, *self._get_exact(midpoints)]
+            failed = ~self._within_tolerance(lower[1:], upper[1:], exact[1:])
+            n_points += np.count_nonzero(failed)
+            if n_points > self.max_points:
+                msg = f"Could not reach rtol={self.rtol:g} within "
+                msg += f"max_points={self.max_points} cooling times"
+                raise ValueError(msg)
+
+            # Add the midpoints of the failed intervals, and check both halves.
+            middle = [array[failed] for array in exact]
+            points.append(middle)
+            lower, upper = (
+                [
+                    np.concatenate([low[failed], mid])
+                    for low, mid in zip(lower, middle, strict=True)
+                ],
+                [
+                    np.concatenate([mid, high[failed]])
+                    for mid, high in zip(middle, upper, strict=True)
+                ],
+            )
+
+        times, flux, variance = (
+            np.concatenate(arrays) for arrays in zip(*points, strict=True)
+        )
+        order = np.argsort(times)
+        return times[order], flux[order], variance[order]
+
+    def _check_times(self, cooling_times: np.ndarray) -> None:
+        """Raise an error if any cooling times are outside the grid."""
+        if np.any(cooling_times < self.cask.initial_cooling_time) or np.any(
+            cooling_times > self.max_time
+        ):
+            msg = "cooling_times must be between the initial cask cooling time "
+            msg += f"({self.cask.initial_cooling_time:.3e}) and max_time "
+            msg += f"({self.max_time:g})"
+            raise ValueError(msg)
+
+    def get_spectra(
+        self, cooling_times: Sequence[float] | np.ndarray, exact: bool = False
+    ) -> dict[float, Spectrum]:
+        """Get the total spectrum of the cask at each cooling time.
+
+        Args:
+            cooling_times: The times in years since the cask was removed from the
+                reactor, between the initial_cooling_time of the cask and max_time.
+            exact: If True, calculate the spectra from the component basis instead
+                of interpolating, e.g. to check the interpolation error.
+
+        Returns:
+            Dictionary mapping each cooling time to the total Spectrum of the cask.
+
+        """
+        cooling_times = np.asarray(cooling_times, dtype=float)
+        self._check_times(cooling_times)
+        if exact:
+            flux, variance = self._get_exact(cooling_times)
+        else:
+            upper = np.clip(
+                np.searchsorted(self.times, cooling_times, side="right"),
+                1,
+                len(self.times) - 1,
+            )
+            lower = upper - 1
+            weight = (cooling_times - self.times[lower]) / (
+                self.times[upper] - self.times[lower]
+            )
+            weight = weight[:, None]
+            flux = _interpolate(self._flux[lower], self._flux[upper], weight)
+            variance = _interpolate(
+                self._variance[lower], self._variance[upper], weight
+            )
+
+        dtype = self.cask.dtype
+        return {
+            float(cooling_time): Spectrum(
+                self.basis.energy,
+                flux[i].astype(dtype),
+                np.sqrt(variance[i]).astype(dtype),
+                name=self.cask.name,
+            )
+            for i, cooling_time in enumerate(cooling_times)
+        }
+
+    def get_spectrum(self, cooling_time: float, exact: bool = False) -> Spectrum:
+        """Get the total spectrum of the cask at one cooling time.
+
+        Args:
+            cooling_time: The time in years since the cask was removed from the
+                reactor, between the initial_cooling_time of the cask and max_time.
+            exact: If True, calculate the spectrum from the component basis instead
+                of interpolating.
+
+        Returns:
+            The total Spectrum of the cask.
+
+        """
+        return self.get_spectra([cooling_time], exact=exact)[float(cooling_time)]
+
+
+class TabqEvolution:
+    """Class to stream the total spectrum of a cask at every time in a .tbQ file.
+
+    The file is read one time section at a time, and the spectra are calculated
+    in batches from a shared ComponentBasis, so the memory used doesn't depend on
+    how many time steps the file contains.
+
+    Attributes:
+        filepath: The .tbQ file (or the contents of one) the masses are read from.
+        cask: A Cask with the masses at the earliest time in the file, including
+            every selected isotope in any section of the file. Its spectra at later
+            times use the decay model, so can be compared to the spectra from the
+            tabulated masses.
+        scaling_factor: The factor the masses in the file are multiplied by, to give
+            the total_mass at the earliest time.
+        basis: The ComponentBasis of the cask. Only the isotope components are used,
+            as the tabulated masses already include any decay daughters.
+        cooling_times: The cooling time (years) of each section, in file order.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        filepath: str | Path,
+        total_mass: float | None = None,
+        isotopes: Collection[str] | str | None = None,
+        width: float = 1,
+        max_energy: float | None = None,
+        name: str | None = None,
+        dtype: DTypeLike = np.float64,
+    ) -> None:
+        """Initialize the TabqEvolution object, and load the isotope data.
+
+        Args:
+            filepath: Path to the .tbQ file, or the contents of the file as a string.
+            total_mass: The total mass of the cask at the earliest time (in kg).
+                If None, the masses from the file are used. If given, the masses
+                at every time are scaled by the same factor.
+            isotopes: Optional list of isotopes to include (see Cask.from_tabqfile).
+            width: Bin width (keV) for the spectra.
+            max_energy: Maximum energy (keV) for the spectra.
+                If None, uses the maximum energy across all the component spectra.
+            name: Optional name for the cask.
+                If None, a name is generated from the filename.
+            dtype: Floating point type to store the spectra as (see Cask).
+
+        """
+        # Read through the file once to find the isotopes and times, only keeping
+        # the masses of the earliest section.
+        available: dict[str, None] = {}
+        cooling_times = []
+        initial_masses: dict[str, float] = {}
+        initial_time = np.inf
+        for isotope_masses, cooling_time in iter_isotope_masses(filepath):
+            available.update(dict.fromkeys(isotope_masses))
+            if cooling_time < initial_time:
+                initial_masses = isotope_masses
+                initial_time = cooling_time
+            cooling_times.append(cooling_time)
+        if not cooling_times:
+            msg = f"No time sections found in file: {filepath}"
+            raise ValueError(msg)
+        self.filepath = filepath
+        self.cooling_times = np.array(cooling_times)
+
+        self.scaling_factor = 1.0
+        if total_mass is not None:
+            self.scaling_factor = total_mass / sum(initial_masses.values())
+
+        if name is None and (isinstance(filepath, Path) or filepath.endswith(".tbQ")):
+            name = Path(filepath).stem
+        self.cask = Cask(
+            isotope_masses={
+                isotope: initial_masses.get(isotope, 0.0) * self.scaling_factor
+                for isotope in _select_isotopes(available, isotopes)
+            },
+            initial_cooling_time=initial_time,
+            name=name,
+            dtype=dtype,
+        )
+        self.basis: ComponentBasis = self.cask.get_component_basis(
+            width=width, max_energy=max_energy
+        )
+
+        # The activity of 1 kg of each isotope, and the isotope rows of the basis.
+        arrays = self.cask.arrays
+        self._activity_per_kg = self.scaling_factor * get_isotope_activity(
+            time_elapsed=0,
+            mass=1.0,
+            molar_mass=arrays.molar_masses,
+            half_life=arrays.half_lives,
+        )
+        self._columns = {isotope: i for i, isotope in enumerate(self.cask.isotopes)}
+        n_isotopes = len(self.cask.isotopes)
+        self._flux = self.basis.flux[:n_isotopes]
+        self._variance = np.square(self.basis.errors[:n_isotopes], dtype=np.float64)
+
+    def __repr__(self) -> str:
+        """Return a string representation of the TabqEvolution object."""
+        return f"<TabqEvolution: {self.cask!r}, {len(self.cooling_times)} times>"
+
+    def __len__(self) -> int:
+        """Return the number of time sections in the file."""
+        return len(self.cooling_times)
+
+    def __iter__(self) -> Iterator[tuple[float, Spectrum]]:
+        """Iterate over the spectrum at each time, see iter_spectra."""
+        return self.iter_spectra()
+
+    def _get_spectra(
+        self, cooling_times: list[float], masses: np.ndarray
+    ) -> Iterator[tuple[float, Spectrum]]:
+        """Calculate the spectra for a batch of sections from the basis."""
+        activities = masses * self._activity_per_kg
+        flux = activities @ self._flux
+        variance = np.square(activities) @ self._variance
+        dtype = self.cask.dtype
+        for i, cooling_time in enumerate(cooling_times):
+            yield (
+                cooling_time,
+                Spectrum(
+                    self.basis.energy,
+                    flux[i].astype(dtype),
+                    np.sqrt(variance[i]).astype(dtype),
+                    name=self.cask.name,
+                ),
+            )
+
+    def iter_spectra(self, batch_size: int = 64) -> Iterator[tuple[float, Spectrum]]:
+        """Get the total spectrum of the cask at each time in the file.
+
+        The file is read again one section at a time, and the spectra for each
+        batch of sections are calculated together.
+
+        Args:
+            batch_size: Number of sections to calculate the spectra for at once.
+
+        Yields:
+            The cooling time (years) and total Spectrum of each section,
+            in the order they are in the file.
+
+        """
+        if batch_size < 1:
+            msg = "batch_size must be a positive value"
+            raise ValueError(msg)
+        masses = np.zeros((batch_size, len(self._columns)))
+        cooling_times: list[float] = []
+        for isotope_masses, cooling_time in iter_isotope_masses(self.filepath):
+            row = masses[len(cooling_times)]
+            row[:] = 0
+            for isotope, mass in isotope_masses.items():
+                column = self._columns.get(isotope)
+                if column is not None:
+                    row[column] = mass
+            cooling_times.append(cooling_time)
+            if len(cooling_times) == batch_size:
+                yield from self._get_spectra(cooling_times, masses)
+                cooling_times = []
+        if cooling_times:
+            yield from self._get_spectra(cooling_times, masses[: len(cooling_times)])
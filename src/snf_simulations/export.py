@@ -0,0 +1,290 @@
+"""Export spectra and result tables to columnar (Parquet or Arrow) and CSV files.
+
+Spectra are written in "long" format, with one row per energy bin and a key
+column (e.g. the cooling time or the cask name) identifying the spectrum. Each
+spectrum is written as its own row group (Parquet) or record batch (Arrow IPC)
+as soon as it is given, so a large scan can be streamed to disk without ever
+building a single table of every spectrum in memory, and one spectrum can be
+read back without reading the rest of the file.
+
+Parquet and Arrow support needs the optional pyarrow package, which can be
+installed with ``pip install snf_simulations[parquet]``.
+"""
+
+from collections.abc import Iterable, Iterator, Mapping
+from io import RawIOBase, StringIO
+from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .spec import Spectrum
+
+if TYPE_CHECKING:
+    import pyarrow
+
+# File suffixes for each of the supported columnar formats.
+_FORMATS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+
+# Number of rows in each chunk when writing tables for download.
+_DEFAULT_CHUNK_ROWS = 10000
+
+
+def _import_pyarrow() -> ModuleType:
+    """Import pyarrow, with a helpful error message if it isn't installed."""
+    try:
+        import pyarrow as pa  # noqa: PLC0415
+    except ImportError as error:
+        msg = (
+            "Parquet and Arrow export requires pyarrow, "
+            "install it with 'pip install snf_simulations[parquet]'"
+        )
+        raise ImportError(msg) from error
+    return pa
+
+
+def _get_format(filepath: Path, file_format: str | None) -> str:
+    """Get the columnar format to write, from the argument or the file suffix."""
+    if file_format is None:
+        if filepath.suffix.lower() not in _FORMATS:
+            msg = (
+                f"Cannot tell the format of {filepath}, use one of the suffixes "
+                f"{', '.join(_FORMATS)} or give the file_format"
+            )
+            raise ValueError(msg)
+        return _FORMATS[filepath.suffix.lower()]
+    if file_format not in {"parquet", "arrow"}:
+        msg = "file_format must be 'parquet' or 'arrow'"
+        raise ValueError(msg)
+    return file_format
+
+
+def _spectrum_batch(
+    pa: ModuleType, key_name: str, key: float | str, spec: Spectrum
+) -> "pyarrow.RecordBatch":
+    """Convert a single spectrum to an Arrow record batch."""
+    key_type = pa.string() if isinstance(key, str) else pa.float64()
+    return pa.record_batch(
+        [
+            pa.array([key] * len(spec.flux), type=key_type),
+            pa.array(spec.energy[:-1]),
+            pa.array(spec.energy[1:]),
+            pa.array(spec.flux),
+            pa.array(spec.errors),
+        ],
+        names=[key_name, "energy_min", "energy_max", "flux", "errors"],
+    )
+
+
+def write_spectra_table(
+    filepath: str | Path,
+    spectra: Mapping[float | str, Spectrum] | Iterable[tuple[float | str, Spectrum]],
+    key_name: str = "cooling_time_yrs",
+    file_format: str | None = None,
+) -> Path:
+    """Write spectra to a single Parquet or Arrow IPC file, one row group each.
+
+    The spectra are written one at a time, so they can be given as a generator
+    that calculates each spectrum only when it is needed, e.g.
+    ``((t, cask.get_total_spectrum(t)) for t in times)``, and only one spectrum is
+    held in memory at once.
+
+    Args:
+        filepath: Path to write the file to.
+        spectra: The spectra to write, either as a dictionary mapping keys to
+            spectra or as an iterable of (key, spectrum) pairs. The keys must all
+            be numbers (e.g. cooling times) or all be strings (e.g. cask names).
+        key_name: Name of the column holding the key for each spectrum.
+        file_format: Either "parquet" or "arrow" (the Arrow IPC file format, also
+            known as Feather v2). If None, the format is taken from the suffix of
+            the filepath.
+
+    Returns:
+        The path to the file.
+
+    """
+    pa = _import_pyarrow()
+    filepath = Path(filepath)
+    file_format = _get_format(filepath, file_format)
+    if isinstance(spectra, Mapping):
+        spectra = spectra.items()
+
+    writer = None
+    try:
+        for key, spec in spectra:
+            batch = _spectrum_batch(pa, key_name, key, spec)
+            if writer is None:
+                # The schema is set by the first spectrum.
+                if file_format == "parquet":
+                    import pyarrow.parquet as pq  # noqa: PLC0415
+
+                    writer = pq.ParquetWriter(filepath, batch.schema)
+                else:
+                    writer = pa.ipc.new_file(filepath, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        msg = "spectra must not be empty"
+        raise ValueError(msg)
+    return filepath
+
+
+def read_spectra_table(
+    filepath: str | Path,
+    key_name: str = "cooling_time_yrs",
+    keys: Iterable[float | str] | None = None,
+) -> dict[float | str, Spectrum]:
+    """Read spectra from a file written using write_spectra_table.
+
+    Each spectrum is read from its own row group, so only the requested spectra
+    are read from disk.
+
+    Args:
+        filepath: Path to the Parquet or Arrow IPC file.
+        key_name: Name of the column holding the key for each spectrum.
+        keys: Optional keys of the spectra to read. If None, all are read.
+
+    Returns:
+        Dictionary mapping the keys to the spectra, in the order they were written.
+
+    """
+    pa = _import_pyarrow()
+    filepath = Path(filepath)
+    file_format = _get_format(filepath, None)
+    wanted = None if keys is None else set(keys)
+
+    if file_format == "parquet":
+        import pyarrow.parquet as pq  # noqa: PLC0415
+
+        parquet_file = pq.ParquetFile(filepath)
+        batches = (
+            parquet_file.read_row_group(i) for i in range(parquet_file.num_row_groups)
+        )
+    else:
+        reader = pa.ipc.open_file(filepath)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    spectra = {}
+    for batch in batches:
+        key = batch.column(key_name)[0].as_py()
+        if wanted is not None and key not in wanted:
+            continue
+        energy_min = batch.column("energy_min").to_numpy()
+        energy = np.append(energy_min, batch.column("energy_max")[-1].as_py())
+        spectra[key] = Spectrum(
+            energy,
+            batch.column("flux").to_numpy(),
+            batch.column("errors").to_numpy(),
+            name=str(key),
+        )
+    if wanted is not None and len(spectra) != len(wanted):
+        missing = [str(key) for key in wanted if key not in spectra]
+        msg = f"Spectra not found in {filepath}: {', '.join(sorted(missing))}"
+        raise ValueError(msg)
+    return spectra
+
+
+def iter_csv_chunks(
+    df: pd.DataFrame, chunk_rows: int = _DEFAULT_CHUNK_ROWS
+) -> Iterator[str]:
+    """Convert a dataframe to CSV text in chunks of rows.
+
+    The header is included in the first chunk, so joining every chunk gives the
+    same text as ``df.to_csv(index=False)``. This means a download can start
+    before the whole table has been converted, and the full CSV text is never
+    held in memory at once.
+
+    Args:
+        df: The dataframe to convert.
+        chunk_rows: Maximum number of rows in each chunk.
+
+    Yields:
+        The CSV text for each chunk of rows.
+
+    """
+    if chunk_rows <= 0:
+        msg = "chunk_rows must be a positive value"
+        raise ValueError(msg)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        with StringIO() as buffer:
+            df.iloc[start : start + chunk_rows].to_csv(
+                buffer, index=False, header=start == 0
+            )
+            yield buffer.getvalue()
+
+
+class _ChunkSink(RawIOBase):
+    """A write-only file that holds the bytes written since they were last taken.
+
+    Unlike a BytesIO that is emptied after each read, the position still counts
+    every byte written, which Parquet needs to record where each row group starts.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty sink."""
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        """Return True, as the sink can be written to."""
+        return True
+
+    def write(self, data: bytes) -> int:
+        """Store the bytes until they are taken."""
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        """Return the total number of bytes written."""
+        return self._position
+
+    def take(self) -> bytes:
+        """Return the bytes written since the last call, and forget them."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet_chunks(
+    df: pd.DataFrame, chunk_rows: int = _DEFAULT_CHUNK_ROWS
+) -> Iterator[bytes]:
+    """Convert a dataframe to a Parquet file in chunks of rows.
+
+    Each chunk of rows is written as a row group, and the bytes written so far are
+    yielded after each one. Joining every chunk gives a complete Parquet file.
+
+    Args:
+        df: The dataframe to convert.
+        chunk_rows: Maximum number of rows in each chunk (row group).
+
+    Yields:
+        The bytes of the Parquet file after each row group.
+
+    """
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq  # noqa: PLC0415
+
+    if chunk_rows <= 0:
+        msg = "chunk_rows must be a positive value"
+        raise ValueError(msg)
+    sink = _ChunkSink()
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start : start + chunk_rows]
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            )
+            yield sink.take()
+    # The footer is written when the writer is closed.
+    yield sink.take()
@@ -0,0 +1,346 @@
+"""Model a site with many casks of spent fuel loaded at different times."""
+
+from collections.abc import Collection, Sequence
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import DTypeLike
+
+from .cask import Cask, ComponentBasis
+from .geometry import CaskShape, get_geometry_matrix
+from .spec import Spectrum
+
+
+class CaskFleet:
+    """Class representing a fleet of casks, e.g. all the casks stored at one site.
+
+    Each cask has a composition, a mass, a loading time and a position.
+    A composition is a Cask giving the relative isotope masses of the fuel when it
+    was loaded, so the many casks sharing a composition share one set of component
+    spectra and only differ in the weights applied to them.
+    The spectra for the whole fleet over a grid of times are then given by a single
+    matrix product of the weights with the component spectra.
+
+    Note the uncertainties from the isotope spectra are treated as fully correlated
+    between casks, the same as for a single Cask with the combined mass.
+
+    Attributes:
+        name: An optional name for the fleet.
+        width: Bin width (keV) for the fleet spectra.
+        max_energy: Maximum energy (keV) for the fleet spectra.
+            If None, uses the maximum energy across all the component spectra.
+        dtype: Floating point type to store the component and fleet spectra as.
+            Using np.float32 halves the memory needed for fleets with many
+            components, while the weighted sums are still in double precision.
+        compositions: Dictionary mapping composition names to their Casks.
+        cask_names: Names of each cask in the fleet.
+        cask_compositions: Name of the composition of each cask.
+        cask_masses: Array of the mass of each cask (kg).
+        loading_times: Array of the time each cask was loaded (years).
+        positions: Array of the position of each cask (m), with shape (N, 3).
+
+    """
+
+    def __init__(
+        self,
+        name: str | None = None,
+        width: float = 1,
+        max_energy: float | None = None,
+        dtype: DTypeLike = np.float64,
+    ) -> None:
+        """Initialize the CaskFleet object."""
+        if width <= 0:
+            msg = "width must be a positive value"
+            raise ValueError(msg)
+        if not np.issubdtype(dtype, np.floating):
+            msg = "dtype must be a floating point type"
+            raise ValueError(msg)
+        self.name = name
+        self.width = width
+        self.max_energy = max_energy
+        self.dtype = np.dtype(dtype)
+
+        self.compositions: dict[str, Cask] = {}
+        self._composition_masses: dict[str, float] = {}
+        self.cask_names: list[str] = []
+        self.cask_compositions: list[str] = []
+        self.cask_masses = np.empty(0)
+        self.loading_times = np.empty(0)
+        self.positions = np.empty((0, 3))
+
+        # The combined component basis, created when first needed.
+        self._basis: ComponentBasis | None = None
+        self._columns: dict[str, np.ndarray] = {}
+
+    def __repr__(self) -> str:
+        """Return a string representation of the CaskFleet object."""
+        try:
+            name_str = f' "{self.name}"' if self.name is not None else ""
+            repr_str = (
+                f"<CaskFleet{name_str}: "
+                f"{len(self.cask_names)} casks, "
+                f"{len(self.compositions)} compositions>"
+            )
+        except AttributeError:
+            return "<CaskFleet (uninitialized)>"
+        else:
+            return repr_str
+
+    def add_composition(
+        self, name: str, cask: Cask, total_mass: float | None = None
+    ) -> None:
+        """Add a fuel composition that casks in the fleet can be loaded with.
+
+        Args:
+            name: Name used to refer to the composition when adding casks.
+            cask: A Cask with the isotope masses of the composition.
+                The initial_cooling_time of the cask is the cooling time of the
+                fuel when it is loaded.
+            total_mass: The total mass of fuel (kg) the isotope masses correspond to.
+                If None, the sum of the isotope masses is used.
+
+        """
+        if name in self.compositions:
+            msg = f"Composition {name} is already in the fleet"
+            raise ValueError(msg)
+        if total_mass is None:
+            total_mass = float(cask.arrays.masses.sum())
+        if total_mass <= 0:
+            msg = "total_mass must be a positive value"
+            raise ValueError(msg)
+        self.compositions[name] = cask
+        self._composition_masses[name] = total_mass
+        self._basis = None
+
+    def add_composition_from_tabqfile(
+        self,
+        name: str,
+        filepath: str | Path,
+        isotopes: Collection[str] | str | None = None,
+        time_str: str | None = None,
+    ) -> None:
+        """Add a fuel composition from a FISPIN .tbQ output file.
+
+        The file is only read once, however many casks are loaded with it.
+
+        Args:
+            name: Name used to refer to the composition when adding casks.
+            filepath: Path to the file to load.
+            isotopes: Optional list of isotopes to include from the file
+                (see Cask.from_tabqfile for details).
+            time_str: Specific simulation time to extract data for
+                (see data.get_isotope_masses for details).
+
+        """
+        cask = Cask.from_tabqfile(
+            filepath,
+            total_mass=1,
+            isotopes=isotopes,
+            time_str=time_str,
+            name=name,
+            dtype=self.dtype,
+        )
+        self.add_composition(name, cask, total_mass=1)
+
+    def add_cask(
+        self,
+        composition: str,
+        mass: float,
+        loading_time: float = 0,
+        position: Sequence[float] = (0, 0, 0),
+        name: str | None = None,
+    ) -> None:
+        """Add a cask to the fleet.
+
+        Args:
+            composition: Name of the composition the cask is loaded with.
+            mass: Total mass of fuel in the cask (kg).
+            loading_time: Time the cask is loaded (years), on the same time axis as
+                the times passed to get_total_spectra. The cask does not contribute
+                to the spectra at earlier times.
+            position: Position (x, y, z) of the cask (m).
+            name: Optional name for the cask.
+                If None, a name is generated from the index of the cask.
+
+        """
+        if composition not in self.compositions:
+            msg = f"Composition {composition} is not in the fleet"
+            raise ValueError(msg)
+        if mass <= 0:
+            msg = "Cask mass must be a positive value"
+            raise ValueError(msg)
+        if len(position) != 3:  # noqa: PLR2004
+            msg = "position must have three coordinates"
+            raise ValueError(msg)
+        if name is None:
+            name = f"cask{len(self.cask_names)}"
+        self.cask_names.append(name)
+        self.cask_compositions.append(composition)
+        self.cask_masses = np.append(self.cask_masses, mass)
+        self.loading_times = np.append(self.loading_times, loading_time)
+        self.positions = np.vstack([self.positions, position])
+
+    def get_basis(self) -> ComponentBasis:
+        """Get the component spectra of every composition on a common binning.
+
+        Components that appear in more than one composition (e.g. the same isotope)
+        are only included once.
+
+        Returns:
+            The combined ComponentBasis for the fleet.
+
+        """
+        if self._basis is not None:
+            return self._basis
+
+        bases = {
+            name: cask.get_component_basis(width=self.width, max_energy=self.max_energy)
+            for name, cask in self.compositions.items()
+        }
+        if not bases:
+            msg = "The fleet does not have any compositions"
+            raise ValueError(msg)
+        # The bases all start at zero with the same width, so any shorter ones only
+        # need padding with zeros to match the longest.
+        energy = max((basis.energy for basis in bases.values()), key=len)
+        names: list[str] = []
+        flux = []
+        errors = []
+        self._columns = {}
+        for composition, basis in bases.items():
+            columns = []
+            for i, component in enumerate(basis.names):
+                if component not in names:
+                    names.append(component)
+                    padding = (0, len(energy) - len(basis.energy))
+                    flux.append(np.pad(basis.flux[i], padding))
+                    errors.append(np.pad(basis.errors[i], padding))
+                columns.append(names.index(component))
+            self._columns[composition] = np.array(columns)
+
+        self._basis = ComponentBasis(
+            energy=energy,
+            flux=np.array(flux, dtype=self.dtype),
+            errors=np.array(errors, dtype=self.dtype),
+            names=names,
+        )
+        return self._basis
+
+    def get_weights(
+        self, times: Sequence[float], cask_factors: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Get the activity of each basis component summed over the casks.
+
+        Args:
+            times: The times (years) to calculate the activities at.
+            cask_factors: Optional array of factors to scale each cask by before
+                summing, with shape (D, N) for D sets of factors and N casks.
+                If None, every cask has a factor of one.
+
+        Returns:
+            Array of activities (Bq) with shape (D, len(times), M) for the M
+            components in get_basis, or (len(times), M) if cask_factors is None.
+
+        """
+        basis = self.get_basis()
+        times = np.asarray(times, dtype=float)
+        factors = np.ones((1, len(self.cask_names)))
+        if cask_factors is not None:
+            factors = np.asarray(cask_factors, dtype=float)
+            if factors.ndim != 2 or factors.shape[1] != len(self.cask_names):  # noqa: PLR2004
+                msg = "cask_factors must have shape (D, number of casks)"
+                raise ValueError(msg)
+
+        compositions = np.array(self.cask_compositions)
+        weights = np.zeros((len(factors), len(times), len(basis.names)))
+        for name, cask in self.compositions.items():
+            selected = compositions == name
+            if not np.any(selected):
+                continue
+            # Every cask with this composition at every time, with shape (T, K).
+            time_loaded = times[:, None] - self.loading_times[selected]
+            loaded = time_loaded >= 0
+            cooling_times = cask.initial_cooling_time + np.where(loaded, time_loaded, 0)
+            activities = cask.get_component_activities(cooling_times).reshape(
+                (*cooling_times.shape, -1)
+            )
+            scale = loaded * self.cask_masses[selected] / self._composition_masses[name]
+            weights[:, :, self._columns[name]] += np.einsum(
+                "dk,tk,tkm->dtm", factors[:, selected], scale, activities
+            )
+        if cask_factors is None:
+            return weights[0]
+        return weights
+
+    def _make_spectra(
+        self, weights: np.ndarray, times: Sequence[float], name: str
+    ) -> dict[float, Spectrum]:
+        """Create spectra from the weights for each time, with shape (T, M)."""
+        basis = self.get_basis()
+        # The weights are float64, so the sums are in double precision whatever the
+        # basis is stored as. Every spectrum shares the read-only basis energy array.
+        flux = (weights @ basis.flux).astype(self.dtype)
+        errors = np.sqrt(weights**2 @ np.square(basis.errors, dtype=np.float64))
+        errors = errors.astype(self.dtype)
+        return {
+            time: Spectrum(
+                energy=basis.energy,
+                flux=flux[i],
+                errors=errors[i],
+                name=f"{name} after {time} years",
+            )
+            for i, time in enumerate(times)
+        }
+
+    def get_total_spectra(self, times: Sequence[float]) -> dict[float, Spectrum]:
+        """Calculate the combined spectrum of all the casks at each time.
+
+        Args:
+            times: The times (years) to calculate the spectra at.
+
+        Returns:
+            Dictionary mapping each time to the combined Spectrum of all casks.
+
+        """
+        if not self.cask_names:
+            msg = "The fleet does not have any casks"
+            raise ValueError(msg)
+        weights = self.get_weights(times)
+        return self._make_spectra(weights, times, "Total spectrum for all casks")
+
+    def get_detector_spectra(
+        self,
+        detector_positions: Sequence[Sequence[float]],
+        times: Sequence[float],
+        cask_shape: CaskShape | None = None,
+    ) -> list[dict[float, Spectrum]]:
+        """Calculate the spectrum of flux through each detector at each time.
+
+        The flux from each cask falls with the inverse square of its distance to
+        the detector, averaged over the cask volume if a cask_shape is given
+        (see geometry.get_geometry_matrix).
+
+        Args:
+            detector_positions: Positions (x, y, z) of each detector (m).
+            times: The times (years) to calculate the spectra at.
+            cask_shape: Dimensions of the casks.
+                If None, each cask is treated as a point source at its position.
+
+        Returns:
+            List with a dictionary for each detector mapping each time to the
+            Spectrum of the flux (cm^-2 keV^-1 s^-1) at the detector.
+
+        """
+        if not self.cask_names:
+            msg = "The fleet does not have any casks"
+            raise ValueError(msg)
+        geometry = get_geometry_matrix(
+            self.positions, np.asarray(detector_positions), shape=cask_shape
+        )
+        weights = self.get_weights(times, cask_factors=geometry)
+        return [
+            self._make_spectra(
+                detector_weights, times, f"Spectrum at detector {i} for all casks"
+            )
+            for i, detector_weights in enumerate(weights)
+        ]
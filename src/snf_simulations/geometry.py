@@ -0,0 +1,145 @@
+"""Calculate geometric flux factors for extended casks and many detector positions."""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .physics import calculate_flux_at_distance
+
+# Maximum number of detector-source-point distances to hold in memory at once.
+_BLOCK_SIZE = 1_000_000
+
+
+class CaskShape(NamedTuple):
+    """Class to hold the dimensions of a cylindrical cask.
+
+    The cask axis is vertical (along z), and the cask position is the centre of the
+    cylinder. The antineutrino source is assumed to be spread evenly through the
+    volume of the cylinder.
+
+    Attributes:
+        radius: Radius of the fuel volume in meters.
+        height: Height of the fuel volume in meters.
+
+    """
+
+    radius: float
+    height: float
+
+
+@lru_cache(maxsize=32)
+def _get_quadrature(
+    shape: CaskShape, n_radial: int, n_angular: int, n_axial: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get quadrature points and weights for the volume of a cylinder.
+
+    Radial points use Gauss-Legendre nodes in the squared radius (so each point
+    covers an equal share of the area), angles are evenly spaced, and heights use
+    Gauss-Legendre nodes along the axis.
+    The arrays are cached for each shape and order, and are read-only.
+
+    Returns:
+        points: Array of offsets from the cask centre (m), with shape (Q, 3).
+        weights: Array of weights summing to one, with shape (Q,).
+
+    """
+    # Gauss-Legendre nodes are on [-1, 1], so map them to [0, 1] and [-1/2, 1/2].
+    radial_nodes, radial_weights = np.polynomial.legendre.leggauss(n_radial)
+    radii = shape.radius * np.sqrt((radial_nodes + 1) / 2)
+    axial_nodes, axial_weights = np.polynomial.legendre.leggauss(n_axial)
+    heights = shape.height * axial_nodes / 2
+    angles = 2 * np.pi * (np.arange(n_angular) + 0.5) / n_angular
+
+    r, theta, z = np.meshgrid(radii, angles, heights, indexing="ij")
+    points = np.stack([r * np.cos(theta), r * np.sin(theta), z], axis=-1).reshape(-1, 3)
+    weights = np.einsum(
+        "i,j,k->ijk", radial_weights, np.ones(n_angular), axial_weights
+    ).ravel()
+    weights /= weights.sum()
+
+    points.flags.writeable = False
+    weights.flags.writeable = False
+    return points, weights
+
+
+def get_geometry_matrix(  # noqa: PLR0913
+    source_positions: np.ndarray,
+    detector_positions: np.ndarray,
+    shape: CaskShape | None = None,
+    n_radial: int = 4,
+    n_angular: int = 8,
+    n_axial: int = 4,
+) -> np.ndarray:
+    """Calculate the flux at each detector per unit emission from each source.
+
+    For point sources this is the inverse square law used by
+    physics.calculate_flux_at_distance. For extended casks the inverse square
+    factor is averaged over the cask volume with a fixed quadrature, which is
+    evaluated for every detector and cask at once.
+
+    Args:
+        source_positions: Positions (x, y, z) of the centre of each source (m),
+            with shape (N, 3).
+        detector_positions: Positions (x, y, z) of each detector (m),
+            with shape (D, 3).
+        shape: Dimensions of the casks. If None, each source is treated as a point.
+        n_radial: Number of radial quadrature points.
+        n_angular: Number of angular quadrature points.
+        n_axial: Number of axial quadrature points.
+
+    Returns:
+        Array of flux factors (cm^-2) with shape (D, N), so the flux at each
+        detector is this matrix multiplied by the total flux of each source.
+
+    """
+    source_positions = np.asarray(source_positions, dtype=float)
+    detector_positions = np.asarray(detector_positions, dtype=float)
+    for name, positions in [
+        ("source_positions", source_positions),
+        ("detector_positions", detector_positions),
+    ]:
+        if positions.ndim != 2 or positions.shape[1] != 3:  # noqa: PLR2004
+            msg = f"{name} must have shape (number of positions, 3)"
+            raise ValueError(msg)
+
+    # Displacement of each detector from each source centre, with shape (D, N, 3)
+    displacement = detector_positions[:, None, :] - source_positions[None, :, :]
+
+    if shape is None:
+        distances = np.linalg.norm(displacement, axis=2)
+        if np.any(distances == 0):
+            msg = "Detectors cannot be at the same position as a source"
+            raise ValueError(msg)
+        return calculate_flux_at_distance(1, distances)
+
+    if shape.radius <= 0 or shape.height <= 0:
+        msg = "Cask radius and height must be positive values"
+        raise ValueError(msg)
+    if min(n_radial, n_angular, n_axial) < 1:
+        msg = "Number of quadrature points must be a positive value"
+        raise ValueError(msg)
+    inside = (np.linalg.norm(displacement[:, :, :2], axis=2) <= shape.radius) & (
+        np.abs(displacement[:, :, 2]) <= shape.height / 2
+    )
+    if np.any(inside):
+        msg = "Detectors cannot be inside a cask"
+        raise ValueError(msg)
+
+    points, weights = _get_quadrature(shape, n_radial, n_angular, n_axial)
+    matrix = np.empty(displacement.shape[:2])
+    # Evaluate blocks of detectors at once, limiting the memory used to about
+    # _BLOCK_SIZE values per block.
+    n_sources = len(source_positions)
+    block = max(1, _BLOCK_SIZE // max(1, n_sources * len(weights)))
+    for start in range(0, len(detector_positions), block):
+        block_displacement = displacement[start : start + block]
+        # Expand |d - p|^2 so the cross term is a single matrix product.
+        distances_sq = (
+            np.sum(block_displacement**2, axis=2)[:, :, None]
+            - 2 * block_displacement @ points.T
+            + np.sum(points**2, axis=1)
+        )
+        # This is calculate_flux_at_distance, without taking the square root.
+        matrix[start : start + block] = (1 / distances_sq) @ weights
+    return matrix / (4 * np.pi * 100**2)
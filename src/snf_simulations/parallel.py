@@ -0,0 +1,231 @@
+"""Calculate spectra for many casks and cooling times in parallel processes."""
+
+import math
+import os
+import tempfile
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from .cask import Cask
+from .data import get_isotope_properties
+from .data.mendeleev import IsotopeProperties
+from .spec import Spectrum
+
+
+class _CaskState(TypedDict):
+    """The data needed to recreate a Cask in a worker process, without spectra."""
+
+    isotope_masses: dict[str, float]
+    initial_cooling_time: float
+    name: str | None
+    isotope_properties: dict[str, IsotopeProperties]
+
+
+# Casks recreated in each worker process by _init_worker.
+_worker_casks: list[Cask] = []
+
+
+def _write_shared_spectra(
+    spectra: dict[str, Spectrum], filepath: Path
+) -> dict[str, tuple[int, int]]:
+    """Pack spectra into one array file that can be memory-mapped by every worker.
+
+    Each spectrum is stored as its energy edges, flux and errors one after the other.
+
+    Returns:
+        Dictionary mapping each isotope to the offset and number of bins of its
+        spectrum in the array.
+
+    """
+    layout = {}
+    offset = 0
+    for isotope, spec in spectra.items():
+        layout[isotope] = (offset, len(spec.flux))
+        offset += 3 * len(spec.flux) + 1
+    data = np.empty(offset)
+    for isotope, spec in spectra.items():
+        start, n_bins = layout[isotope]
+        data[start : start + n_bins + 1] = spec.energy
+        data[start + n_bins + 1 : start + 2 * n_bins + 1] = spec.flux
+        data[start + 2 * n_bins + 1 : start + 3 * n_bins + 1] = spec.errors
+    np.save(filepath, data)
+    return layout
+
+
+def _read_shared_spectra(
+    filepath: Path, layout: dict[str, tuple[int, int]]
+) -> dict[str, Spectrum]:
+    """Create Spectrum objects backed by read-only views of the shared array file."""
+    data = np.load(filepath, mmap_mode="r")
+    spectra = {}
+    for isotope, (start, n_bins) in layout.items():
+        spectra[isotope] = Spectrum(
+            energy=data[start : start + n_bins + 1],
+            flux=data[start + n_bins + 1 : start + 2 * n_bins + 1],
+            errors=data[start + 2 * n_bins + 1 : start + 3 * n_bins + 1],
+            name=isotope,
+            frozen=True,
+        )
+    return spectra
+
+
+def _init_worker(
+    filepath: Path,
+    layout: dict[str, tuple[int, int]],
+    cask_states: list[_CaskState],
+) -> None:
+    """Recreate the casks in a worker process, sharing the memory-mapped spectra."""
+    spectra = _read_shared_spectra(filepath, layout)
+    _worker_casks.clear()
+    for state in cask_states:
+        _worker_casks.append(
+            Cask(
+                isotope_masses=state["isotope_masses"],
+                initial_cooling_time=state["initial_cooling_time"],
+                name=state["name"],
+                isotope_properties=state["isotope_properties"],
+                isotope_spectra=spectra,
+            )
+        )
+
+
+def _run_task(
+    task: tuple[int, float, float, float],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Calculate the equalised total spectrum for one cask at one cooling time.
+
+    Args:
+        task: The index of the cask, the cooling time, and the bin width and
+            maximum energy to equalise the spectrum to.
+
+    Returns:
+        The flux and errors of the spectrum.
+
+    """
+    cask_index, cooling_time, width, max_energy = task
+    spec = _worker_casks[cask_index].get_total_spectrum(cooling_time=cooling_time)
+    spec.equalise(width=width, min_energy=0, max_energy=max_energy)
+    return spec.flux, spec.errors
+
+
+def _collect_isotope_data(
+    casks: Sequence[Cask],
+) -> tuple[dict[str, Spectrum], dict[str, IsotopeProperties]]:
+    """Collect every spectrum and property any of the casks could need.
+
+    This includes the daughters of any decay chains, so the workers never have to
+    load them separately.
+    """
+    spectra: dict[str, Spectrum] = {}
+    properties: dict[str, IsotopeProperties] = {}
+    for cask in casks:
+        spectra.update(cask.isotope_spectra)
+        properties.update(cask.isotope_properties)
+        for chain in cask.get_decay_chains():
+            if chain.daughter not in spectra:
+                spectra[chain.daughter] = Spectrum.from_isotope(chain.daughter)
+                properties[chain.daughter] = get_isotope_properties(chain.daughter)
+    return spectra, properties
+
+
+def get_total_spectra(  # noqa: PLR0913
+    casks: Sequence[Cask],
+    cooling_times: Sequence[float],
+    cooling_offsets: Sequence[float] | None = None,
+    width: float = 1,
+    max_energy: float | None = None,
+    max_workers: int | None = None,
+    chunksize: int | None = None,
+) -> dict[float, Spectrum]:
+    """Calculate the combined spectrum of many casks at each cooling time.
+
+    The spectrum of every cask at every time is an independent task, so the tasks
+    are split into chunks and spread over a pool of worker processes.
+    The isotope spectra are written once to a temporary file which every worker
+    memory-maps read-only, rather than each worker holding its own copy.
+    Results are always combined in the order of the casks, so the output does not
+    depend on the number of workers.
+
+    Args:
+        casks: The Casks to combine.
+        cooling_times: The times in years to calculate the combined spectra at.
+        cooling_offsets: Optional time in years that each cask has already been
+            cooling for at a cooling time of zero, e.g. for casks that were removed
+            from the reactor at different times. Defaults to zero for every cask.
+        width: Bin width (keV) for the combined spectra.
+        max_energy: Maximum energy (keV) for the combined spectra.
+            If None, uses the maximum energy across all the isotope spectra.
+        max_workers: Number of worker processes to use.
+            If None, uses the number of CPUs. If 1, runs in the current process.
+        chunksize: Number of tasks sent to a worker at once.
+            If None, the tasks are split into about four chunks per worker.
+
+    Returns:
+        Dictionary mapping each cooling time to the combined Spectrum of all casks.
+
+    """
+    if not casks:
+        msg = "casks must not be empty"
+        raise ValueError(msg)
+    if cooling_offsets is None:
+        cooling_offsets = [0.0] * len(casks)
+    if len(cooling_offsets) != len(casks):
+        msg = "cooling_offsets must have the same length as casks"
+        raise ValueError(msg)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1:
+        msg = "max_workers must be a positive value"
+        raise ValueError(msg)
+
+    spectra, properties = _collect_isotope_data(casks)
+    if max_energy is None:
+        max_energy = max(float(spec.energy[-1]) for spec in spectra.values())
+
+    tasks = [
+        (i, offset + cooling_time, width, max_energy)
+        for cooling_time in cooling_times
+        for i, offset in enumerate(cooling_offsets)
+    ]
+    cask_states = [
+        _CaskState(
+            isotope_masses=dict(cask.isotope_masses),
+            initial_cooling_time=cask.initial_cooling_time,
+            name=cask.name,
+            isotope_properties=properties,
+        )
+        for cask in casks
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filepath = Path(tmp_dir) / "spectra.npy"
+        layout = _write_shared_spectra(spectra, filepath)
+        if max_workers == 1:
+            _init_worker(filepath, layout, cask_states)
+            results = [_run_task(task) for task in tasks]
+        else:
+            if chunksize is None:
+                chunksize = max(1, math.ceil(len(tasks) / (4 * max_workers)))
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(filepath, layout, cask_states),
+            ) as executor:
+                results = list(executor.map(_run_task, tasks, chunksize=chunksize))
+        _worker_casks.clear()
+
+    # Combine the results for each time, in the same order as the casks.
+    edges = np.arange(0, max_energy + width, width)
+    total_spectra = {}
+    for i, cooling_time in enumerate(cooling_times):
+        time_results = results[i * len(casks) : (i + 1) * len(casks)]
+        total_spec = Spectrum(edges, *time_results[0])
+        for flux, errors in time_results[1:]:
+            total_spec = total_spec + Spectrum(edges, flux, errors)
+        total_spec.name = f"Total spectrum for all casks after {cooling_time} years"
+        total_spectra[cooling_time] = total_spec
+    return total_spectra
@@ -0,0 +1,231 @@
+"""Lightweight timers and counters for the main stages of the calculations.
+
+Profiling is off by default. It can be turned on by setting the
+SNF_SIMULATIONS_PROFILE environment variable to "1" before the package is imported,
+by calling enable(), or with the --profile option of the snf-sim command.
+
+While profiling is off, timed functions only check a single flag before running,
+so the instrumentation can be left in place without slowing down the calculations.
+
+Note only the current process is recorded, so any time spent in worker processes
+(e.g. from parallel.get_total_spectra) is not included.
+
+Example:
+    >>> from snf_simulations import profiling
+    >>> profiling.enable()
+    >>> cask.get_total_spectrum(10)
+    >>> print(profiling.format_summary())
+
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ParamSpec, TypedDict, TypeVar
+
+_PROFILE_ENV_VAR = "SNF_SIMULATIONS_PROFILE"
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+class StageSummary(TypedDict):
+    """Class to represent the timing summary for a single stage."""
+
+    calls: int
+    total: float
+    mean: float
+    min: float
+    max: float
+
+
+_enabled = os.environ.get(_PROFILE_ENV_VAR, "").lower() in {"1", "true", "yes", "on"}
+_lock = threading.Lock()
+# Time (seconds) of each call to each stage, in the order they finished.
+_timings: dict[str, list[float]] = {}
+_counters: dict[str, int] = {}
+# Trace events in the Chrome trace event format (timestamps in microseconds).
+_events: list[dict] = []
+_start = time.perf_counter()
+
+
+def enable() -> None:
+    """Start recording timings and counters."""
+    global _enabled  # noqa: PLW0603
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording timings and counters, keeping anything already recorded."""
+    global _enabled  # noqa: PLW0603
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Return True if timings and counters are being recorded."""
+    return _enabled
+
+
+def reset() -> None:
+    """Clear all the recorded timings, counters and trace events."""
+    global _start  # noqa: PLW0603
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+        _events.clear()
+        _start = time.perf_counter()
+
+
+def _record(name: str, start: float, end: float) -> None:
+    """Record a single timed call to a stage."""
+    with _lock:
+        _timings.setdefault(name, []).append(end - start)
+        _events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - _start) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """Time the code inside the context as a call to the given stage.
+
+    Args:
+        name: Name of the stage, e.g. "Spectrum.equalise".
+
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter())
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increase the counter with the given name, if profiling is enabled.
+
+    Args:
+        name: Name of the counter, e.g. "iaea.download".
+        n: Amount to increase the counter by.
+
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def profiled(
+    name: str | None = None,
+) -> Callable[[Callable[_P, _R]], Callable[_P, _R]]:
+    """Decorate a function so each call is timed as a stage.
+
+    Args:
+        name: Name of the stage. If None, the qualified name of the function is used.
+
+    """
+
+    def decorator(func: Callable[_P, _R]) -> Callable[_P, _R]:
+        stage = name if name is not None else func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(stage, start, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+
+def get_summary() -> dict[str, dict]:
+    """Get a summary of everything recorded so far.
+
+    Note the time for each stage includes any other stages called within it,
+    e.g. the time for Cask.get_component_spectra includes loading the spectra.
+
+    Returns:
+        Dictionary containing:
+        - "stages": the StageSummary for each stage, with times in seconds
+        - "counters": the value of each counter
+
+    """
+    with _lock:
+        stages = {
+            name: StageSummary(
+                calls=len(times),
+                total=sum(times),
+                mean=sum(times) / len(times),
+                min=min(times),
+                max=max(times),
+            )
+            for name, times in _timings.items()
+        }
+        counters = dict(_counters)
+    return {"stages": stages, "counters": counters}
+
+
+def format_summary() -> str:
+    """Format the summary as a table, with the slowest stages first."""
+    summary = get_summary()
+    stages = sorted(
+        summary["stages"].items(), key=lambda item: item[1]["total"], reverse=True
+    )
+    width = max([len(name) for name in summary["stages"]] + [len("Stage")])
+    lines = [
+        f"{'Stage':<{width}} {'Calls':>8} {'Total [s]':>10} {'Mean [ms]':>10}",
+    ]
+    lines.extend(
+        f"{name:<{width}} {stage['calls']:>8} "
+        f"{stage['total']:>10.3f} {stage['mean'] * 1e3:>10.3f}"
+        for name, stage in stages
+    )
+    if summary["counters"]:
+        lines.append("")
+        width = max(len(name) for name in summary["counters"])
+        lines.extend(
+            f"{name:<{width}} {value:>8}"
+            for name, value in sorted(summary["counters"].items())
+        )
+    return "\n".join(lines)
+
+
+def write_report(filepath: str | Path, trace: bool = False) -> None:
+    """Write everything recorded so far to a JSON file.
+
+    Args:
+        filepath: Path to write the report to.
+        trace: If True, write the individual calls in the Chrome trace event format,
+            which can be opened in chrome://tracing or https://ui.perfetto.dev.
+            Otherwise write the summary from get_summary.
+
+    """
+    if trace:
+        with _lock:
+            report = {
+                "traceEvents": list(_events),
+                "displayTimeUnit": "ms",
+                "otherData": {"counters": dict(_counters)},
+            }
+    else:
+        report = get_summary()
+    Path(filepath).write_text(json.dumps(report, indent=2), encoding="utf-8")
@@ -0,0 +1,381 @@
+"""Run declarative simulation scenarios from TOML files, without any display.
+
+A scenario file lists the casks to simulate, the times to simulate them at,
+the detectors to calculate event rates for and the outputs to write, e.g.
+
+.. code-block:: toml
+
+    name = "site"
+
+    [simulation]
+    times = [0.5, 5, 10, 20]  # years
+    width = 1  # keV
+    max_energy = 6000  # keV
+
+    [[casks]]
+    name = "recent"
+    file = "example.tbQ"  # relative to the scenario file, omit to use the example
+    mass = 10000  # kg per cask
+    count = 10
+    cooling_time = 0  # years already cooled at the start of the simulation
+    isotopes = "default"  # or "all", or a list of isotope names
+
+    [[detectors]]
+    name = "prototype"
+    volume = 1.2  # m^3
+    proton_density = 4.6e22  # cm^-3
+    distance = 40  # m
+    efficiency = 0.3
+
+    [output]
+    directory = "results"  # relative to the scenario file
+    spectra = true  # write the total spectrum at each time
+    format = "csv"  # file format of the spectra, "csv", "parquet" or "arrow"
+    plot = false  # write a PDF plot of the total spectra
+    summary = "summary.json"  # optional copy of the run summary
+
+"""
+
+import hashlib
+import json
+import sys
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, TypedDict
+
+from matplotlib.figure import Figure
+
+from .cask import Cask
+from .data import get_example_tbq_path
+from .detector import Detector
+from .export import write_spectra_table
+from .parallel import get_total_spectra
+from .physics import calculate_flux_at_distance
+from .spec import Spectrum
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+_CACHE_FILENAME = ".snf_sim_cache.json"
+_IBD_THRESHOLD = 1806  # keV
+_OUTPUT_FORMATS = ("csv", "parquet", "arrow")
+
+
+class CaskConfig(TypedDict):
+    """Settings for a set of identical casks in a scenario."""
+
+    name: str
+    file: str
+    mass: float
+    count: int
+    cooling_time: float
+    isotopes: str | list[str]
+    time_str: str | None
+
+
+class DetectorConfig(TypedDict):
+    """Settings for a detector in a scenario."""
+
+    name: str
+    volume: float
+    proton_density: float
+    distance: float
+    efficiency: float
+
+
+class SimulationConfig(TypedDict):
+    """Settings for the simulated times and spectrum binning."""
+
+    times: list[float]
+    width: float
+    max_energy: float
+
+
+class OutputConfig(TypedDict):
+    """Settings for the files written by a scenario."""
+
+    directory: str
+    spectra: bool
+    format: str
+    plot: bool
+    summary: str | None
+
+
+class Scenario(TypedDict):
+    """A full scenario, with defaults filled in and file paths resolved."""
+
+    name: str
+    simulation: SimulationConfig
+    casks: list[CaskConfig]
+    detectors: list[DetectorConfig]
+    output: OutputConfig
+
+
+def _check_keys(table: dict[str, Any], allowed: set[str], section: str) -> None:
+    """Raise an error if a scenario table has any unrecognised keys."""
+    unknown = set(table) - allowed
+    if unknown:
+        msg = f"Unknown keys in scenario [{section}]: {', '.join(sorted(unknown))}"
+        raise ValueError(msg)
+
+
+def load_scenario(filepath: str | Path) -> Scenario:
+    """Load and validate a scenario TOML file.
+
+    Args:
+        filepath: Path to the scenario file.
+            Relative paths inside the file are resolved from its directory.
+
+    Returns:
+        The Scenario, with default values filled in.
+
+    """
+    filepath = Path(filepath)
+    with open(filepath, "rb") as f:
+        data = tomllib.load(f)
+    base_dir = filepath.resolve().parent
+    _check_keys(data, {"name", "simulation", "casks", "detectors", "output"}, "")
+
+    simulation = data.get("simulation", {})
+    _check_keys(simulation, set(SimulationConfig.__annotations__), "simulation")
+    simulation_config = SimulationConfig(
+        times=[float(t) for t in simulation.get("times", [])],
+        width=float(simulation.get("width", 1)),
+        max_energy=float(simulation.get("max_energy", 6000)),
+    )
+    if not simulation_config["times"]:
+        msg = "Scenario must include at least one simulation time"
+        raise ValueError(msg)
+
+    casks = []
+    for i, cask in enumerate(data.get("casks", [])):
+        _check_keys(cask, set(CaskConfig.__annotations__), "casks")
+        if "mass" not in cask:
+            msg = "Each cask in the scenario must have a mass"
+            raise ValueError(msg)
+        if "file" in cask:
+            file = str((base_dir / cask["file"]).resolve())
+        else:
+            file = str(get_example_tbq_path())
+        casks.append(
+            CaskConfig(
+                name=str(cask.get("name", f"cask{i}")),
+                file=file,
+                mass=float(cask["mass"]),
+                count=int(cask.get("count", 1)),
+                cooling_time=float(cask.get("cooling_time", 0)),
+                isotopes=cask.get("isotopes", "default"),
+                time_str=cask.get("time_str"),
+            )
+        )
+    if not casks:
+        msg = "Scenario must include at least one cask"
+        raise ValueError(msg)
+    if any(cask["count"] < 1 for cask in casks):
+        msg = "Cask count must be a positive value"
+        raise ValueError(msg)
+
+    detectors = []
+    for i, detector in enumerate(data.get("detectors", [])):
+        _check_keys(detector, set(DetectorConfig.__annotations__), "detectors")
+        missing = [key for key in ("volume", "distance") if key not in detector]
+        if missing:
+            msg = f"Each detector in the scenario must have a {' and '.join(missing)}"
+            raise ValueError(msg)
+        detectors.append(
+            DetectorConfig(
+                name=str(detector.get("name", f"detector{i}")),
+                volume=float(detector["volume"]),
+                proton_density=float(detector.get("proton_density", 4.6e22)),
+                distance=float(detector["distance"]),
+                efficiency=float(detector.get("efficiency", 1)),
+            )
+        )
+
+    output = data.get("output", {})
+    _check_keys(output, set(OutputConfig.__annotations__), "output")
+    output_config = OutputConfig(
+        directory=str((base_dir / output.get("directory", ".")).resolve()),
+        spectra=bool(output.get("spectra", True)),
+        format=str(output.get("format", "csv")).lower(),
+        plot=bool(output.get("plot", False)),
+        summary=output.get("summary"),
+    )
+    if output_config["format"] not in _OUTPUT_FORMATS:
+        msg = f"Output format must be one of {', '.join(_OUTPUT_FORMATS)}"
+        raise ValueError(msg)
+
+    return Scenario(
+        name=str(data.get("name", filepath.stem)),
+        simulation=simulation_config,
+        casks=casks,
+        detectors=detectors,
+        output=output_config,
+    )
+
+
+def get_scenario_key(scenario: Scenario) -> str:
+    """Return a hash identifying the scenario, its input files and package version.
+
+    Any change to the scenario settings, the contents of the .tbQ files or the
+    installed version of snf_simulations gives a different key.
+    """
+    try:
+        package_version = version("snf_simulations")
+    except PackageNotFoundError:
+        package_version = "unknown"
+    digest = hashlib.sha256()
+    digest.update(package_version.encode())
+    digest.update(json.dumps(scenario, sort_keys=True).encode())
+    for file in sorted({cask["file"] for cask in scenario["casks"]}):
+        digest.update(Path(file).read_bytes())
+    return digest.hexdigest()
+
+
+def _create_cask(config: CaskConfig) -> Cask:
+    """Create the combined Cask for a set of identical casks."""
+    isotopes = config["isotopes"]
+    return Cask.from_tabqfile(
+        config["file"],
+        total_mass=config["mass"] * config["count"],
+        isotopes=None if isotopes == "default" else isotopes,
+        time_str=config["time_str"],
+        name=config["name"],
+    )
+
+
+def _write_plot(spectra: dict[float, Spectrum], scenario: Scenario, path: Path) -> None:
+    """Save a plot of the total spectra at each time, without using pyplot."""
+    figure = Figure(figsize=(12, 6))
+    axes = figure.add_subplot(1, 1, 1)
+    for simulation_time, spec in spectra.items():
+        axes.step(
+            spec.energy[:-1],
+            spec.flux,
+            where="post",
+            label=f"Spectrum after {simulation_time:g} years",
+        )
+    axes.set_xlim(0, scenario["simulation"]["max_energy"])
+    axes.set_xlabel("Energy [keV]")
+    axes.set_ylabel("Relative Flux [keV^-1 s^-1]")
+    axes.set_title(f"{scenario['name']} total spectra")
+    axes.set_yscale("log")
+    axes.legend()
+    figure.savefig(path)
+
+
+def run_scenario(
+    filepath: str | Path,
+    use_cache: bool = True,
+    max_workers: int | None = 1,
+) -> dict[str, Any]:
+    """Run a scenario file and write the requested outputs.
+
+    Results are cached in the output directory, so re-running a scenario where
+    the settings, input files and outputs are all unchanged returns immediately.
+
+    Args:
+        filepath: Path to the scenario TOML file.
+        use_cache: If False, always re-run the scenario.
+        max_workers: Number of processes to spread the casks and times over
+            (see parallel.get_total_spectra). If None, uses the number of CPUs.
+
+    Returns:
+        A JSON-serialisable summary of the run, with the total flux above the
+        inverse beta decay threshold and the detector rates at each time and the
+        list of files written.
+
+    """
+    scenario = load_scenario(filepath)
+    key = get_scenario_key(scenario)
+    output_dir = Path(scenario["output"]["directory"])
+    cache_file = output_dir / _CACHE_FILENAME
+
+    if use_cache and cache_file.is_file():
+        cached = json.loads(cache_file.read_text(encoding="utf-8"))
+        summary = cached.get("summary", {})
+        if cached.get("key") == key and all(
+            Path(path).is_file() for path in summary.get("outputs", [])
+        ):
+            summary["cached"] = True
+            return summary
+
+    # Calculate the total spectrum for all the casks at each time.
+    simulation = scenario["simulation"]
+    spectra = get_total_spectra(
+        casks=[_create_cask(config) for config in scenario["casks"]],
+        cooling_times=simulation["times"],
+        cooling_offsets=[config["cooling_time"] for config in scenario["casks"]],
+        width=simulation["width"],
+        max_energy=simulation["max_energy"],
+        max_workers=max_workers,
+    )
+    for simulation_time, spec in spectra.items():
+        spec.name = f"{scenario['name']} after {simulation_time:g} years"
+
+    # Calculate fluxes and event rates for each detector.
+    results = []
+    for simulation_time, spec in spectra.items():
+        # Only the flux above the inverse beta decay threshold can be detected.
+        threshold_flux = spec.integrate(lower_energy=_IBD_THRESHOLD)
+        detector_results = {}
+        for config in scenario["detectors"]:
+            detector = Detector(
+                volume=config["volume"],
+                proton_density=config["proton_density"],
+                name=config["name"],
+            )
+            detector_results[config["name"]] = {
+                "distance_m": config["distance"],
+                "flux_cm-2_s-1": calculate_flux_at_distance(
+                    threshold_flux, config["distance"]
+                ),
+                "event_rate_s-1": detector.calculate_event_rate(
+                    spec, config["distance"], efficiency=config["efficiency"]
+                ),
+            }
+        results.append(
+            {
+                "cooling_time_yrs": simulation_time,
+                "flux_above_threshold_s-1": threshold_flux,
+                "detectors": detector_results,
+            }
+        )
+
+    # Write the output files.
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs = []
+    output_format = scenario["output"]["format"]
+    if scenario["output"]["spectra"] and output_format == "csv":
+        for simulation_time, spec in spectra.items():
+            path = output_dir / f"{scenario['name']}_{simulation_time:g}y.csv"
+            spec.write_csv(path)
+            outputs.append(str(path))
+    elif scenario["output"]["spectra"]:
+        # All the times go in one file, with a row group for each time.
+        path = output_dir / f"{scenario['name']}_spectra.{output_format}"
+        write_spectra_table(path, spectra, key_name="cooling_time_yrs")
+        outputs.append(str(path))
+    if scenario["output"]["plot"]:
+        path = output_dir / f"{scenario['name']}.pdf"
+        _write_plot(spectra, scenario, path)
+        outputs.append(str(path))
+
+    summary: dict[str, Any] = {
+        "scenario": scenario["name"],
+        "key": key,
+        "cached": False,
+        "results": results,
+        "outputs": outputs,
+    }
+    if scenario["output"]["summary"] is not None:
+        path = output_dir / scenario["output"]["summary"]
+        summary["outputs"].append(str(path))
+        path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+    cache_file.write_text(
+        json.dumps({"key": key, "summary": summary}), encoding="utf-8"
+    )
+    return summary
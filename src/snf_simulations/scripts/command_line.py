@@ -1,15 +1,32 @@
 """Command line script to run SNF simulations and generate plots."""
 
 import argparse
+import json
+import sys
 from collections.abc import Mapping, Sequence
+from contextlib import redirect_stdout
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 
-from snf_simulations.cask import Cask
-from snf_simulations.data import get_example_tbq_path
+from snf_simulations import profiling
+from snf_simulations.cask import DECAY_CHAINS, DEFAULT_ISOTOPES, Cask
+from snf_simulations.data import (
+    get_example_tbq_path,
+    get_isotope_masses,
+    get_nuclide_index,
+)
+from snf_simulations.data.bundle import (
+    BUNDLE_SUFFIX,
+    DataBundle,
+    build_bundle,
+    import_bundle,
+)
+from snf_simulations.data.cache import get_cache_dir, prune_cache, verify_cache
+from snf_simulations.data.synthetic import write_spectrum_files, write_tabqfile
 from snf_simulations.detector import Detector
 from snf_simulations.physics import calculate_flux_at_distance
+from snf_simulations.scenario import run_scenario
 from snf_simulations.spec import Spectrum
 
 
@@ -228,24 +245,21 @@ def run_multiple_full(
     print("Generating multiple cask spectra for different cooling times...")
     # Now we do a full simulation of multiple sets of casks removed at different times,
     # and simulate their spectra into the future.
-    # We don't have a set number of casks per set now, so we have to create
-    # a Cask object for each set with the overall mass.
-    casks = {}
-    for cooling_time, n_casks in cask_cooling_times.items():
-        casks[cooling_time] = Cask.from_tabqfile(
-            filepath, total_mass=cask_mass * n_casks, name=filepath.stem
-        )
+    # Every set has the same composition, so we only need to load the file once
+    # and scale the spectrum of a single cask by the number of casks in each set.
+    # The sets are independent, so their uncertainties are added in quadrature.
+    cask = Cask.from_tabqfile(filepath, total_mass=cask_mass, name=filepath.stem)
 
     # Now get the spectra for all the sets of casks at each of the simulation times.
     spectra: dict[float, Spectrum] = {}
     for simulation_time in simulation_times:
         # We need to get the total spectrum for each set at this time,
         # and then combine them.
-        time_spectra = []
-        for cooling_time, cask in casks.items():
-            new_cooling_time = cooling_time + simulation_time
-            spec = cask.get_total_spectrum(cooling_time=new_cooling_time)
-            time_spectra.append(spec)
+        time_spectra = [
+            cask.get_total_spectrum(cooling_time=cooling_time + simulation_time)
+            * n_casks
+            for cooling_time, n_casks in cask_cooling_times.items()
+        ]
         total_spec = time_spectra[0]
         for spec in time_spectra[1:]:
             total_spec = total_spec + spec
@@ -389,10 +403,332 @@ def run(filepath: Path) -> None:
     run_sample(spec_multiple)
 
 
-def main() -> None:
+def run_batch(argv: Sequence[str]) -> None:
+    """Run a scenario file without a display and print a JSON summary.
+
+    Args:
+        argv: Command line arguments following the "batch" subcommand.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="snf-sim batch",
+        description="Run a scenario file without plotting, and print a JSON summary",
+    )
+    parser.add_argument(
+        "scenario",
+        type=Path,
+        help="Path to the scenario TOML file",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-run the scenario even if the cached results are up to date",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to use, or 0 to use all available CPUs",
+    )
+    args = parser.parse_args(argv)
+
+    # Progress messages go to stderr, so stdout only contains the summary.
+    with redirect_stdout(sys.stderr):
+        summary = run_scenario(
+            args.scenario,
+            use_cache=not args.no_cache,
+            max_workers=args.workers or None,
+        )
+    print(json.dumps(summary, indent=2))
+
+
+def run_synthetic(argv: Sequence[str]) -> None:
+    """Write synthetic input files for scaling tests and benchmarks.
+
+    Args:
+        argv: Command line arguments following the "synthetic" subcommand.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="snf-sim synthetic",
+        description="Write synthetic .tbQ files or IAEA spectrum files for testing",
+    )
+    subparsers = parser.add_subparsers(dest="file_type", required=True)
+
+    tbq_parser = subparsers.add_parser("tbq", help="Write a synthetic .tbQ file")
+    tbq_parser.add_argument("output", type=Path, help="Path to write the file to")
+    tbq_parser.add_argument(
+        "--nuclides", type=int, default=1000, help="Number of nuclides per time step"
+    )
+    tbq_parser.add_argument(
+        "--steps", type=int, default=100, help="Number of time steps"
+    )
+    tbq_parser.add_argument(
+        "--units",
+        default="HOURS,DAYS,YEARS",
+        help="Comma-separated time units to cycle through in the section headers",
+    )
+    tbq_parser.add_argument(
+        "--max-time", type=float, default=100, help="Time of the last step in years"
+    )
+    tbq_parser.add_argument(
+        "--include-other",
+        action="store_true",
+        help="Include an '<other>' row in each time step, as in the example file",
+    )
+    tbq_parser.add_argument("--seed", type=int, help="Random seed")
+
+    spectra_parser = subparsers.add_parser(
+        "spectra", help="Write synthetic IAEA-format spectrum files"
+    )
+    spectra_parser.add_argument(
+        "directory", type=Path, help="Directory to write the files to"
+    )
+    spectra_parser.add_argument(
+        "isotopes", nargs="+", help="Isotopes to write spectra for, e.g. Sr90"
+    )
+    spectra_parser.add_argument(
+        "--bin-width", type=float, help="Width of the energy bins in keV"
+    )
+    spectra_parser.add_argument(
+        "--branches", type=int, default=1, help="Number of decay branches"
+    )
+    spectra_parser.add_argument("--seed", type=int, help="Random seed")
+    args = parser.parse_args(argv)
+
+    if args.file_type == "tbq":
+        filepath = write_tabqfile(
+            args.output,
+            n_nuclides=args.nuclides,
+            n_steps=args.steps,
+            units=args.units.upper().split(","),
+            max_time=args.max_time,
+            include_other=args.include_other,
+            seed=args.seed,
+        )
+        print(f"Saved to {filepath}")
+    else:
+        filepaths = write_spectrum_files(
+            args.directory,
+            args.isotopes,
+            bin_width=args.bin_width,
+            n_branches=args.branches,
+            seed=args.seed,
+        )
+        print(f"Saved {len(filepaths)} spectrum files to {args.directory}")
+
+
+def _get_isotopes(isotopes: Sequence[str], tbq_filepaths: Sequence[Path]) -> list[str]:
+    """Get the isotopes given on the command line and in .tbQ files.
+
+    Args:
+        isotopes: Isotope names, e.g. Sr90.
+        tbq_filepaths: Paths to .tbQ files, every isotope in which is included.
+
+    Returns:
+        The isotopes, or the default cask isotopes if none are given, along with
+        the daughters of any decay chains.
+
+    """
+    isotopes = list(isotopes)
+    for filepath in tbq_filepaths:
+        isotope_masses, _ = get_isotope_masses(filepath)
+        # Skip the "<other>" row for the remaining mass.
+        isotopes += [name for name in isotope_masses if not name.startswith("<")]
+    if not isotopes and not tbq_filepaths:
+        isotopes = list(DEFAULT_ISOTOPES)
+    isotopes += [chain.daughter for chain in DECAY_CHAINS if chain.parent in isotopes]
+    return list(dict.fromkeys(isotopes))
+
+
+def run_cache(argv: Sequence[str]) -> None:
+    """Check, clean or fill the cache of IAEA spectrum files.
+
+    Args:
+        argv: Command line arguments following the "cache" subcommand.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="snf-sim cache",
+        description="Check, clean or fill the cache of IAEA spectrum files",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser(
+        "verify", help="Check the cached files against the checksums in the manifest"
+    )
+    prune_parser = subparsers.add_parser(
+        "prune", help="Remove damaged files and leftover temporary files"
+    )
+    prune_parser.add_argument(
+        "--all", action="store_true", help="Remove every cached spectrum file"
+    )
+    prune_parser.add_argument(
+        "--bundles",
+        action="store_true",
+        help="Also remove imported data bundles, which can't be fetched again",
+    )
+    warm_parser = subparsers.add_parser(
+        "warm", help="Fetch spectra into the cache, e.g. before starting many workers"
+    )
+    warm_parser.add_argument(
+        "isotopes",
+        nargs="*",
+        help="Isotopes to fetch, e.g. Sr90 (default: the default cask isotopes)",
+    )
+    warm_parser.add_argument(
+        "--tbq",
+        type=Path,
+        action="append",
+        default=[],
+        help="Also fetch every isotope in a .tbQ file (can be given more than once)",
+    )
+    args = parser.parse_args(argv)
+
+    cache_dir = get_cache_dir()
+    if args.action == "verify":
+        problems = verify_cache()
+        for filename, problem in problems.items():
+            print(f"{filename}: {problem}")
+        # Files saved by hand or by older versions aren't in the manifest.
+        damaged = [
+            name for name, problem in problems.items() if problem != "not in manifest"
+        ]
+        print(f"Found {len(damaged)} damaged files in {cache_dir}")
+        if damaged:
+            sys.exit(1)
+    elif args.action == "prune":
+        removed = prune_cache(remove_all=args.all, include_bundles=args.bundles)
+        for filename in removed:
+            print(f"Removed {filename}")
+        print(f"Removed {len(removed)} files from {cache_dir}")
+    else:
+        isotopes = _get_isotopes(args.isotopes, args.tbq)
+        eligible = get_nuclide_index().filter(isotopes)
+        print(
+            f"Found spectra for {len(eligible)} of {len(isotopes)} isotopes "
+            f"in {cache_dir}"
+        )
+
+
+def run_data(argv: Sequence[str]) -> None:
+    """Build or import offline nuclear data bundles.
+
+    Args:
+        argv: Command line arguments following the "data" subcommand.
+
+    """
+    parser = argparse.ArgumentParser(
+        prog="snf-sim data",
+        description=(
+            "Build or import offline bundles of spectrum data and isotope properties"
+        ),
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    bundle_parser = subparsers.add_parser(
+        "bundle",
+        help="Build a bundle, downloading any spectra that aren't available locally",
+    )
+    bundle_parser.add_argument(
+        "output",
+        type=Path,
+        help=f"Path to save the bundle to, e.g. data{BUNDLE_SUFFIX}",
+    )
+    bundle_parser.add_argument(
+        "isotopes",
+        nargs="*",
+        help="Isotopes to include, e.g. Sr90 (default: the default cask isotopes)",
+    )
+    bundle_parser.add_argument(
+        "--tbq",
+        type=Path,
+        action="append",
+        default=[],
+        help="Also include every isotope in a .tbQ file (can be given more than once)",
+    )
+    import_parser = subparsers.add_parser(
+        "import", help="Check a bundle and add it to the spectrum data cache"
+    )
+    import_parser.add_argument("bundle", type=Path, help="Path to the bundle")
+    args = parser.parse_args(argv)
+
+    if args.action == "bundle":
+        isotopes = _get_isotopes(args.isotopes, args.tbq)
+        filepath = build_bundle(args.output, isotopes, verbose=True)
+        with DataBundle(filepath) as bundle:
+            print(
+                f"Saved {len(bundle.spectra)} spectra for {len(bundle.properties)} "
+                f"isotopes to {filepath}"
+            )
+    else:
+        filepath = import_bundle(args.bundle)
+        print(f"Imported {args.bundle} to {filepath}")
+
+
+def _get_profile_parser() -> argparse.ArgumentParser:
+    """Get a parser for the profiling options, which apply to every subcommand."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time the main calculation stages and print a summary at the end",
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        help="Also save the timing of every call as a JSON trace event file",
+    )
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
     """Parse command line arguments and run the simulation."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    profile_args, argv = _get_profile_parser().parse_known_args(argv)
+    profile = profile_args.profile or profile_args.profile_output is not None
+    was_enabled = profiling.is_enabled()
+    if profile:
+        profiling.reset()
+        profiling.enable()
+    try:
+        _run_command(argv)
+    finally:
+        if profile:
+            if not was_enabled:
+                profiling.disable()
+            # Print to stderr, so the batch JSON summary on stdout is unaffected.
+            print(profiling.format_summary(), file=sys.stderr)
+            if profile_args.profile_output is not None:
+                profiling.write_report(profile_args.profile_output, trace=True)
+                print(
+                    f"Saved profile to {profile_args.profile_output}", file=sys.stderr
+                )
+
+
+def _run_command(argv: Sequence[str]) -> None:
+    """Run the subcommand given by the command line arguments."""
+    if argv and argv[0] == "batch":
+        run_batch(argv[1:])
+        return
+    if argv and argv[0] == "synthetic":
+        run_synthetic(argv[1:])
+        return
+    if argv and argv[0] == "cache":
+        run_cache(argv[1:])
+        return
+    if argv and argv[0] == "data":
+        run_data(argv[1:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Run SNF simulations and generate plots",
+        parents=[_get_profile_parser()],
+        epilog=(
+            "Use 'snf-sim batch SCENARIO' to run a scenario file without plots, "
+            "'snf-sim synthetic' to write synthetic input files for testing, "
+            "'snf-sim cache' to check and fill the spectrum data cache, "
+            "or 'snf-sim data' to build offline data bundles."
+        ),
     )
     parser.add_argument(
         "filepath",
@@ -401,7 +737,7 @@ def main() -> None:
         help="Path to the input file",
         default=get_example_tbq_path(),
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     run(filepath=args.filepath)
 
 
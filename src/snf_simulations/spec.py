@@ -1,11 +1,32 @@
 """Functions for loading and manipulating spectra."""
 
 from pathlib import Path
+from typing import Any
 
 import numpy as np
+from numpy.typing import DTypeLike
 
 from .data import get_antineutrino_spectrum
-from .utils import linear_interpolate_with_errors, sample_histogram
+from .profiling import profiled
+from .utils import (
+    get_energy_grid,
+    get_histogram_cdf,
+    intern_energy_grid,
+    linear_interpolate_with_errors,
+    sample_histogram,
+)
+
+# Attributes that cannot be changed on a frozen Spectrum.
+_FROZEN_ATTRIBUTES = frozenset({"energy", "flux", "errors", "name"})
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Return a read-only version of an array, copying it if it is writeable."""
+    if not array.flags.writeable:
+        return array
+    array = array.copy()
+    array.flags.writeable = False
+    return array
 
 
 class Spectrum:
@@ -21,6 +42,17 @@ class Spectrum:
             Array length should be the same as flux.
         name: An optional name for the spectrum.
 
+    The flux and errors can be stored as float32 to save memory (see astype),
+    but any sums are always calculated in double precision.
+    Spectra created by equalise share a single read-only energy array with any
+    other spectra with the same binning (see utils.intern_energy_grid).
+
+    A frozen spectrum (created with frozen=True or by freeze) can't be changed:
+    its arrays are read-only, its attributes can't be reassigned and it can't be
+    equalised in place. This means it can be safely shared without copying, e.g.
+    the isotope spectra loaded by a Cask, and its hash only has to be calculated
+    once. Operations such as equalised, + and * return new spectra.
+
     """
 
     def __init__(
@@ -29,12 +61,23 @@ class Spectrum:
         flux: np.ndarray,
         errors: np.ndarray,
         name: str | None = None,
+        frozen: bool = False,
     ) -> None:
         """Initialize the Spectrum object."""
+        if frozen:
+            # Any writeable arrays are copied, so they can't be changed elsewhere.
+            energy = _read_only(energy)
+            flux = _read_only(flux)
+            errors = _read_only(errors)
         self.energy = energy
         self.flux = flux
         self.errors = errors
         self.name = name
+        # Cached cumulative integral and sampling CDF of a frozen spectrum.
+        self._cumulative: np.ndarray | None = None
+        self._cdf: np.ndarray | None = None
+        self._hash: int | None = None
+        self._frozen = frozen
 
         if self.energy.ndim != 1 or self.flux.ndim != 1 or self.errors.ndim != 1:
             msg = "Energy, flux and errors must be 1D arrays"
@@ -46,6 +89,49 @@ class Spectrum:
             msg = "Flux and errors arrays must have the same length"
             raise ValueError(msg)
 
+    def __setattr__(self, name: str, value: Any) -> None:  # noqa: ANN401
+        """Prevent changing the arrays or name of a frozen spectrum."""
+        if name in _FROZEN_ATTRIBUTES and getattr(self, "_frozen", False):
+            msg = f"Cannot set {name} on a frozen Spectrum"
+            raise AttributeError(msg)
+        super().__setattr__(name, value)
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """Restore the spectrum after unpickling, keeping frozen arrays read-only."""
+        self.__dict__.update(state)
+        if state.get("_frozen", False):
+            for array in (self.energy, self.flux, self.errors):
+                array.flags.writeable = False
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "Spectrum":
+        """Copy the spectrum. Frozen spectra can't change, so aren't copied."""
+        if self._frozen:
+            return self
+        copied = Spectrum(
+            self.energy.copy(), self.flux.copy(), self.errors.copy(), name=self.name
+        )
+        memo[id(self)] = copied
+        return copied
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the spectrum is frozen, and so can't be changed."""
+        return self._frozen
+
+    def freeze(self) -> "Spectrum":
+        """Get a frozen version of this spectrum.
+
+        Returns:
+            This spectrum if it is already frozen, otherwise a new frozen Spectrum
+            with read-only copies of any writeable arrays.
+
+        """
+        if self._frozen:
+            return self
+        return Spectrum(
+            self.energy, self.flux, self.errors, name=self.name, frozen=True
+        )
+
     def __repr__(self) -> str:
         """Return a string representation of the Spectrum object."""
         try:
@@ -73,8 +159,13 @@ class Spectrum:
         )
 
     def __hash__(self) -> int:
-        """Return a hash consistent with __eq__."""
-        return hash(
+        """Return a hash consistent with __eq__.
+
+        The hash of a frozen spectrum is only calculated once.
+        """
+        if self._hash is not None:
+            return self._hash
+        value = hash(
             (
                 self.name,
                 self.energy.dtype.str,
@@ -88,13 +179,25 @@ class Spectrum:
                 self.errors.tobytes(),
             )
         )
+        if self._frozen:
+            self._hash = value
+        return value
 
     @classmethod
     def from_isotope(
         cls,
         name: str,
+        dtype: DTypeLike = np.float64,
+        frozen: bool = False,
     ) -> "Spectrum":
-        """Create a Spectrum object from an isotope name."""
+        """Create a Spectrum object from an isotope name.
+
+        Args:
+            name: Name of the isotope, e.g. "Sr90".
+            dtype: Floating point type to store the flux and errors as.
+            frozen: If True, return a frozen Spectrum that can be shared safely.
+
+        """
         # The IAEA data files give equal arrays of energy, flux, and uncertainty.
         data = get_antineutrino_spectrum(name)
         if len(data) == 0:
@@ -106,14 +209,19 @@ class Spectrum:
         # The last energy point is used as the upper edge of the final bin,
         # so the last flux/error value is discarded.
         energy_points, flux_points, error_points = data[:, 0], data[:, 1], data[:, 2]
-        energy = energy_points
-        flux = flux_points[:-1]
-        errors = error_points[:-1]
+        energy = intern_energy_grid(energy_points)
+        flux = flux_points[:-1].astype(dtype)
+        errors = error_points[:-1].astype(dtype)
+        if frozen:
+            # These are new arrays, so they can be made read-only without copying.
+            flux.flags.writeable = False
+            errors.flags.writeable = False
         return cls(
             energy,
             flux,
             errors,
             name=name,
+            frozen=frozen,
         )
 
     @classmethod
@@ -126,8 +234,8 @@ class Spectrum:
             header = f.readline()
             # If the first has text after the # it should be the name.
             name = header[1:].strip() if len(header) > 1 else None
-        # The data should have columns: energy_lower, energy_upper, flux, error
-        data = np.loadtxt(filename, delimiter=",", skiprows=2)
+            # The data should have columns: energy_lower, energy_upper, flux, error
+            data = np.loadtxt(f, delimiter=",", skiprows=1, ndmin=2)
         lower_edges = data[:, 0]
         upper_edges = data[:, 1]
         energy = np.concatenate((lower_edges, [upper_edges[-1]]))
@@ -140,6 +248,29 @@ class Spectrum:
             name=name,
         )
 
+    @classmethod
+    def from_npz(
+        cls,
+        filename: Path | str,
+        frozen: bool = False,
+    ) -> "Spectrum":
+        """Create a Spectrum object from a file written using write_npz.
+
+        Args:
+            filename: Path to the file to load.
+            frozen: If True, return a frozen Spectrum.
+
+        """
+        with np.load(filename, allow_pickle=False) as data:
+            name = str(data["name"]) if "name" in data else None
+            return cls(
+                data["energy"],
+                data["flux"],
+                data["errors"],
+                name=name,
+                frozen=frozen,
+            )
+
     def equalise(
         self,
         width: float = 1,
@@ -148,6 +279,34 @@ class Spectrum:
     ) -> None:
         """Convert the spectrum to have equal bin widths.
 
+        Bins are spaced from min_energy to max_energy with the requested width.
+        This changes the spectrum in place, see equalised to get a new Spectrum.
+
+        Args:
+            width: Target bin width (keV). Must be positive.
+            min_energy: Minimum energy for the new spectrum (keV).
+                If None, uses the current minimum energy edge.
+            max_energy: Maximum energy for the new spectrum (keV).
+                If None, uses the current maximum energy edge.
+
+        """
+        if self._frozen:
+            msg = "Cannot equalise a frozen Spectrum in place, use equalised instead"
+            raise ValueError(msg)
+        new = self.equalised(width=width, min_energy=min_energy, max_energy=max_energy)
+        self.energy = new.energy
+        self.flux = new.flux
+        self.errors = new.errors
+
+    @profiled("Spectrum.equalise")
+    def equalised(
+        self,
+        width: float = 1,
+        min_energy: float | None = None,
+        max_energy: float | None = None,
+    ) -> "Spectrum":
+        """Get a copy of the spectrum with equal bin widths.
+
         Bins are spaced from min_energy to max_energy with the requested width.
 
         Args:
@@ -157,6 +316,9 @@ class Spectrum:
             max_energy: Maximum energy for the new spectrum (keV).
                 If None, uses the current maximum energy edge.
 
+        Returns:
+            A new Spectrum object, which is frozen if this spectrum is frozen.
+
         """
         if width <= 0:
             msg = "width must be a positive value"
@@ -173,7 +335,7 @@ class Spectrum:
             raise ValueError(msg)
 
         # Interpolate to the new binning and propagate errors
-        new_edges = np.arange(min_energy, max_energy + width, width)
+        new_edges = get_energy_grid(min_energy, max_energy, width)
         new_flux, new_errors = linear_interpolate_with_errors(
             self.energy,
             self.flux,
@@ -181,10 +343,40 @@ class Spectrum:
             new_edges,
         )
 
-        # Apply the new values to this Spectrum instance in place
-        self.energy = new_edges
-        self.flux = new_flux
-        self.errors = new_errors
+        # Keep the same storage type for the flux and errors.
+        new_flux = new_flux.astype(self.flux.dtype, copy=False)
+        new_errors = new_errors.astype(self.errors.dtype, copy=False)
+        if self._frozen:
+            new_flux.flags.writeable = False
+            new_errors.flags.writeable = False
+        return Spectrum(
+            new_edges, new_flux, new_errors, name=self.name, frozen=self._frozen
+        )
+
+    def astype(self, dtype: DTypeLike) -> "Spectrum":
+        """Get a copy of the spectrum with the flux and errors stored as dtype.
+
+        Storing the flux and errors as float32 halves the memory they use, which can
+        be useful when holding many spectra at once. The energy array is shared
+        with the new spectrum, which is frozen if this spectrum is frozen.
+
+        Args:
+            dtype: Floating point type to store the flux and errors as,
+                e.g. np.float32.
+
+        Returns:
+            A new Spectrum object.
+
+        """
+        if not np.issubdtype(dtype, np.floating):
+            msg = "dtype must be a floating point type"
+            raise ValueError(msg)
+        flux = self.flux.astype(dtype)
+        errors = self.errors.astype(dtype)
+        if self._frozen:
+            flux.flags.writeable = False
+            errors.flags.writeable = False
+        return Spectrum(self.energy, flux, errors, name=self.name, frozen=self._frozen)
 
     def __add__(self, other: "Spectrum") -> "Spectrum":
         """Add another Spectrum to this one by summing the flux values.
@@ -201,8 +393,10 @@ class Spectrum:
         if not np.allclose(self.energy, other.energy):
             msg = "Energy bins of the two spectra must be the same to add them."
             raise ValueError(msg)
-        new_flux = self.flux + other.flux
-        new_errors = np.sqrt(self.errors**2 + other.errors**2)
+        # Add in double precision, then store using the larger of the two types.
+        dtype = np.result_type(self.flux, other.flux)
+        new_flux = np.add(self.flux, other.flux, dtype=np.float64).astype(dtype)
+        new_errors = np.hypot(self.errors, other.errors, dtype=np.float64).astype(dtype)
         if self.name is not None and other.name is not None:
             new_name = self.name + " + " + other.name
         else:
@@ -219,10 +413,15 @@ class Spectrum:
             A new Spectrum object representing the scaled spectrum.
 
         """
-        new_flux = self.flux * factor
-        new_errors = self.errors * abs(factor)
+        new_flux = np.multiply(self.flux, factor, dtype=np.float64).astype(
+            self.flux.dtype
+        )
+        new_errors = np.multiply(self.errors, abs(factor), dtype=np.float64).astype(
+            self.errors.dtype
+        )
         return Spectrum(self.energy, new_flux, new_errors, name=self.name)
 
+    @profiled("Spectrum.sample")
     def sample(self, n_samples: int = 100, seed: int | None = None) -> np.ndarray:
         """Sample the spectrum to simulate what a detector could observe.
 
@@ -234,7 +433,37 @@ class Spectrum:
             Array of sampled energies.
 
         """
-        return sample_histogram(self.energy, self.flux, n_samples, seed)
+        # The flux of a frozen spectrum can't change, so the CDF is cached.
+        cdf = self._cdf
+        if cdf is None and self._frozen:
+            cdf = get_histogram_cdf(self.flux)
+            self._cdf = cdf
+        return sample_histogram(self.energy, self.flux, n_samples, seed, cdf=cdf)
+
+    def _get_cumulative_flux(self) -> np.ndarray:
+        """Get the integral of the flux from the first energy edge up to each edge.
+
+        The arrays of a frozen spectrum can't change, so the result is cached.
+        Otherwise it is recalculated on every call, as the energy or flux values
+        could have been changed in place.
+        """
+        if self._cumulative is not None:
+            return self._cumulative
+        cumulative = np.zeros(len(self.energy))
+        np.cumsum(self.flux * np.diff(self.energy), out=cumulative[1:])
+        if self._frozen:
+            self._cumulative = cumulative
+        return cumulative
+
+    def _integrate_to(self, energies: np.ndarray) -> np.ndarray:
+        """Integrate the spectrum from the first energy edge up to each energy."""
+        cumulative = self._get_cumulative_flux()
+        # Find the bin each energy is in, then add the part of that bin below it
+        # to the integral up to the lower edge of the bin.
+        energies = np.clip(energies, self.energy[0], self.energy[-1])
+        bins = np.searchsorted(self.energy, energies, side="right") - 1
+        bins = np.clip(bins, 0, len(self.flux) - 1)
+        return cumulative[bins] + self.flux[bins] * (energies - self.energy[bins])
 
     def integrate(
         self,
@@ -264,26 +493,41 @@ class Spectrum:
             msg = "upper_energy must be greater than lower_energy"
             raise ValueError(msg)
 
-        # We need to account for if the upper or lower bounds fall partially within a
-        # bin instead of at a bin edge.
-        # Calculate the overlap of each bin with the integration range,
-        # and weight the flux in each bin by this overlap length.
-        # For most bins this will be either 0 (outside the range) or the full bin width
-        # (fully within the range), but for the two bins at the edges of the range
-        # it could be a partial overlap.
-        # Using np.clip gives an array where each value is the length of the overlap of
-        # that bin with the integration range.
-        # Then multiply the flux in each bin by the overlap length, and sum to get the
-        # total integrated flux.
-        lower_edges = self.energy[:-1]
-        upper_edges = self.energy[1:]
-        overlap_length = np.clip(
-            np.minimum(upper_edges, upper_energy)
-            - np.maximum(lower_edges, lower_energy),
-            a_min=0,
-            a_max=None,
+        # The bounds could fall partially within a bin instead of at a bin edge.
+        # Rather than calculating the overlap of every bin with the range, the
+        # cumulative integral up to each bin edge is used (and cached for frozen
+        # spectra), so only the two bins containing the bounds need to be found
+        # (with a binary search) and the part of each bin within the range added on.
+        lower, upper = self._integrate_to(np.array([lower_energy, upper_energy]))
+        return float(upper - lower)
+
+    def integrate_many(
+        self,
+        lower_energies: np.ndarray | float,
+        upper_energies: np.ndarray | float,
+    ) -> np.ndarray:
+        """Integrate the spectrum over many energy ranges at once.
+
+        This is much faster than calling integrate in a loop, e.g. to scan over
+        detection thresholds or energy windows.
+
+        Args:
+            lower_energies: Array of lower energy bounds in keV.
+            upper_energies: Array of upper energy bounds in keV.
+                Must broadcast with lower_energies.
+
+        Returns:
+            Array of the integrated spectrum over each range.
+
+        """
+        lower_energies, upper_energies = np.broadcast_arrays(
+            np.asarray(lower_energies, dtype=float),
+            np.asarray(upper_energies, dtype=float),
         )
-        return float(np.sum(self.flux * overlap_length))
+        if np.any(upper_energies <= lower_energies):
+            msg = "upper_energies must be greater than lower_energies"
+            raise ValueError(msg)
+        return self._integrate_to(upper_energies) - self._integrate_to(lower_energies)
 
     def write_csv(self, output_filename: Path | str = "") -> None:
         """Output energy and flux data to CSV file.
@@ -321,3 +565,35 @@ class Spectrum:
             header=header,
             comments="",
         )
+
+    def write_npz(self, output_filename: Path | str = "") -> Path:
+        """Output the spectrum to a binary NumPy .npz file.
+
+        Unlike write_csv this is lossless (all values are stored at full precision)
+        and much faster to write and read back with from_npz.
+        To store many spectra in one file see archive.write_spectra.
+
+        Args:
+            output_filename: The name of the output file.
+                If not given, the name is generated in the same way as write_csv.
+
+        Returns:
+            The path to the file.
+
+        """
+        if not output_filename:
+            if self.name is not None:
+                output_filename = self.name.replace(" ", "_") + ".npz"
+            else:
+                output_filename = "spectrum.npz"
+        if isinstance(output_filename, str) and not output_filename.endswith(".npz"):
+            output_filename += ".npz"
+        elif isinstance(output_filename, Path) and output_filename.suffix != ".npz":
+            output_filename = output_filename.with_suffix(".npz")
+        output_filename = Path(output_filename)
+
+        arrays = {"energy": self.energy, "flux": self.flux, "errors": self.errors}
+        if self.name is not None:
+            arrays["name"] = np.array(self.name)
+        np.savez(output_filename, **arrays)
+        return output_filename
@@ -0,0 +1,302 @@
+"""Monte Carlo propagation of nuclear data uncertainties to cask spectra."""
+
+from collections.abc import Mapping, Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from .cask import Cask
+from .data import get_isotope_properties
+from .physics import get_decay_mass, get_isotope_activity
+from .spec import Spectrum
+from .utils import linear_interpolate_with_errors
+
+
+class UncertaintyResult(NamedTuple):
+    """Class to hold the Monte Carlo uncertainty results for one cooling time.
+
+    Attributes:
+        spectrum: Spectrum with the mean flux over all variations, and the standard
+            deviation of the variations in each bin as the errors.
+        covariance: Covariance matrix of the integrated flux (s^-1) in each of the
+            coarse covariance bins, with shape (M, M).
+        covariance_energy: Array of M+1 bin edges (keV) for the covariance matrix.
+        n_variations: Number of Monte Carlo variations used.
+
+    """
+
+    spectrum: Spectrum
+    covariance: np.ndarray
+    covariance_energy: np.ndarray
+    n_variations: int
+
+
+def _get_interpolation_weights(
+    original_bins: np.ndarray, new_bins: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Get the linear map used by linear_interpolate_with_errors for the content.
+
+    The interpolated content of each new bin is
+    ``content[lower] * weight_lower + content[upper] * weight_upper``, which lets
+    the same interpolation be applied to a whole batch of varied spectra at once.
+
+    Returns:
+        lower: Index of the original bin below each new bin centre.
+        upper: Index of the original bin above each new bin centre.
+        weight_lower: Weight given to the lower original bin.
+        weight_upper: Weight given to the upper original bin.
+
+    """
+    original_centres = (original_bins[:-1] + original_bins[1:]) / 2
+    new_centres = (new_bins[:-1] + new_bins[1:]) / 2
+
+    # Match np.interp, which clamps to the edge values outside the original centres.
+    upper = np.searchsorted(original_centres, new_centres, side="left")
+    upper = np.clip(upper, 0, len(original_centres) - 1)
+    lower = np.clip(upper - 1, 0, None)
+    c_lower = original_centres[lower]
+    c_upper = original_centres[upper]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight_upper = np.where(
+            upper > lower, (new_centres - c_lower) / (c_upper - c_lower), 1.0
+        )
+    weight_upper = np.clip(weight_upper, 0, 1)
+    weight_lower = 1.0 - weight_upper
+
+    # Bins fully outside the original range are set to zero.
+    extrapolated = (new_bins[1:] <= original_bins[0]) | (
+        new_bins[:-1] >= original_bins[-1]
+    )
+    weight_lower[extrapolated] = 0
+    weight_upper[extrapolated] = 0
+    return lower, upper, weight_lower, weight_upper
+
+
+def _get_relative_uncertainties(
+    uncertainty: float | Mapping[str, float], isotopes: Sequence[str]
+) -> np.ndarray:
+    """Convert a global or per-isotope relative uncertainty into an array."""
+    if isinstance(uncertainty, Mapping):
+        values = np.array([uncertainty.get(isotope, 0.0) for isotope in isotopes])
+    else:
+        values = np.full(len(isotopes), float(uncertainty))
+    if np.any(values < 0):
+        msg = "Relative uncertainties must be non-negative"
+        raise ValueError(msg)
+    return values
+
+
+def _draw_factors(rng: np.random.Generator, relative: np.ndarray, k: int) -> np.ndarray:
+    """Draw k sets of random factors to scale values with relative uncertainties.
+
+    The factors are lognormal, with a mean of 1 and a standard deviation equal to
+    each relative uncertainty, so they are always positive even for large
+    uncertainties (a normal distribution could give zero or negative masses and
+    half-lives).
+
+    Returns:
+        Array of factors with shape (k, len(relative)).
+
+    """
+    sigma = np.sqrt(np.log1p(relative**2))
+    return np.exp(sigma * rng.standard_normal((k, len(relative))) - sigma**2 / 2)
+
+
+def propagate_uncertainties(  # noqa: PLR0912, PLR0913, PLR0915
+    cask: Cask,
+    cooling_times: Sequence[float],
+    n_variations: int = 1000,
+    mass_uncertainty: float | Mapping[str, float] = 0.0,
+    half_life_uncertainty: float | Mapping[str, float] = 0.0,
+    vary_spectra: bool = True,
+    width: float = 1,
+    covariance_width: float = 100,
+    batch_size: int = 50,
+    seed: int | None = None,
+) -> dict[float, UncertaintyResult]:
+    """Propagate input uncertainties to the total cask spectrum by Monte Carlo.
+
+    Each variation draws a new set of isotope masses, half-lives and IAEA spectrum
+    shapes, which are shared between all cooling times and between each isotope
+    and any decay chain creating the same isotope. This keeps the correlations
+    from shared nuclear data that are lost when combining errors in quadrature.
+
+    Variations are evaluated in batches of shape (batch_size, cooling times, bins),
+    and only running sums are kept between batches, so memory use does not grow
+    with n_variations.
+
+    Args:
+        cask: The Cask to calculate the spectra for.
+        cooling_times: The times in years since the cask was removed from the
+            reactor. Each has to be greater than or equal to the
+            initial_cooling_time of the cask.
+        n_variations: Number of Monte Carlo variations to draw.
+        mass_uncertainty: Relative (fractional) uncertainty on the isotope masses.
+            Either a single value for all isotopes, or a mapping of isotope names
+            to values (isotopes not in the mapping are not varied).
+        half_life_uncertainty: Relative (fractional) uncertainty on the isotope
+            half-lives, given in the same way as mass_uncertainty.
+            Masses and half-lives are varied with lognormal distributions, so they
+            stay positive even for large uncertainties.
+        vary_spectra: If True, vary the flux in each bin of the isotope spectra
+            within the IAEA uncertainties.
+        width: Bin width (keV) for the output spectra, which go from 0 to the
+            maximum energy across all component spectra.
+        covariance_width: Bin width (keV) for the covariance matrix.
+            Must be a multiple of width.
+        batch_size: Number of variations to evaluate at once.
+        seed: Random seed for reproducibility.
+
+    Returns:
+        Dictionary mapping each cooling time to the UncertaintyResult at that time.
+
+    """
+    if n_variations < 2:  # noqa: PLR2004
+        msg = "n_variations must be at least 2"
+        raise ValueError(msg)
+    if batch_size < 1:
+        msg = "batch_size must be a positive value"
+        raise ValueError(msg)
+    if width <= 0:
+        msg = "width must be a positive value"
+        raise ValueError(msg)
+    step = round(covariance_width / width)
+    if step < 1 or not np.isclose(step * width, covariance_width):
+        msg = "covariance_width must be a positive multiple of width"
+        raise ValueError(msg)
+    times = np.asarray(cooling_times, dtype=float)
+    if times.ndim != 1 or len(times) == 0:
+        msg = "cooling_times must be a non-empty list of times"
+        raise ValueError(msg)
+    if np.any(times < cask.initial_cooling_time):
+        msg = "cooling_times cannot be less than "
+        msg += f"the initial cask cooling time ({cask.initial_cooling_time:.3e})"
+        raise ValueError(msg)
+    time_elapsed = times - cask.initial_cooling_time
+
+    # Collect every isotope with a spectrum in the cask, including any daughters
+    # created from decays that aren't already in the cask.
+    chains = cask.get_decay_chains()
+    isotopes = list(cask.isotopes)
+    properties = dict(cask.isotope_properties)
+    spectra = dict(cask.isotope_spectra)
+    for chain in chains:
+        if chain.daughter not in spectra:
+            isotopes.append(chain.daughter)
+            properties[chain.daughter] = get_isotope_properties(chain.daughter)
+            spectra[chain.daughter] = Spectrum.from_isotope(chain.daughter)
+    index = {isotope: i for i, isotope in enumerate(isotopes)}
+    n_direct = len(cask.isotopes)
+
+    # Interpolate all the spectra onto a common binning, storing the linear map
+    # so the varied spectra can be interpolated in the same way.
+    max_energy = max(float(spec.energy[-1]) for spec in spectra.values())
+    edges = np.arange(0, max_energy + width, width)
+    n_bins = len(edges) - 1
+    nominal_basis = np.empty((len(isotopes), n_bins))
+    weights = []
+    for i, isotope in enumerate(isotopes):
+        spec = spectra[isotope]
+        nominal_basis[i], _ = linear_interpolate_with_errors(
+            spec.energy, spec.flux, spec.errors, edges
+        )
+        weights.append(_get_interpolation_weights(spec.energy, edges))
+
+    masses = cask.arrays.masses
+    molar_masses = np.array([properties[isotope]["molar_mass"] for isotope in isotopes])
+    half_lives = np.array([properties[isotope]["half_life"] for isotope in isotopes])
+    mass_rel = _get_relative_uncertainties(mass_uncertainty, cask.isotopes)
+    half_life_rel = _get_relative_uncertainties(half_life_uncertainty, isotopes)
+
+    def _evaluate(
+        basis: np.ndarray, batch_masses: np.ndarray, batch_half_lives: np.ndarray
+    ) -> np.ndarray:
+        """Calculate total spectra with shape (k, n_times, n_bins)."""
+        # Activities have shape (k, n_times, n_isotopes)
+        t = time_elapsed[None, :, None]
+        activity = get_isotope_activity(
+            time_elapsed=t,
+            mass=batch_masses[:, None, :],
+            molar_mass=molar_masses[:n_direct],
+            half_life=batch_half_lives[:, None, :n_direct],
+        )
+        total = np.einsum("ktc,kcb->ktb", activity, basis[:, :n_direct])
+        for chain in chains:
+            parent = index[chain.parent]
+            daughter = index[chain.daughter]
+            daughter_mass = get_decay_mass(
+                time_elapsed=time_elapsed[None, :],
+                parent_mass=batch_masses[:, None, parent],
+                parent_half_life=batch_half_lives[:, None, parent],
+                daughter_half_life=batch_half_lives[:, None, daughter],
+                branching_ratio=chain.branching_ratio,
+            )
+            daughter_activity = get_isotope_activity(
+                time_elapsed=0,
+                mass=daughter_mass,
+                molar_mass=molar_masses[daughter],
+                half_life=batch_half_lives[:, None, daughter],
+            )
+            total += daughter_activity[:, :, None] * basis[:, None, daughter, :]
+        return total
+
+    # The nominal spectra are used as a shift when accumulating the sums,
+    # which avoids losing precision when calculating the variance.
+    nominal = _evaluate(nominal_basis[None], masses[None], half_lives[None])[0]
+    bin_widths = np.diff(edges)
+    coarse_idx = np.arange(0, n_bins, step)
+    coarse_edges = np.append(edges[coarse_idx], edges[-1])
+
+    sum_diff = np.zeros_like(nominal)
+    sum_diff_sq = np.zeros_like(nominal)
+    sum_coarse = np.zeros((len(times), len(coarse_idx)))
+    sum_coarse_outer = np.zeros((len(times), len(coarse_idx), len(coarse_idx)))
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_variations, batch_size):
+        k = min(batch_size, n_variations - start)
+
+        # Draw the varied inputs for this batch
+        batch_masses = masses * _draw_factors(rng, mass_rel, k)
+        batch_half_lives = half_lives * _draw_factors(rng, half_life_rel, k)
+        basis = np.repeat(nominal_basis[None], k, axis=0)
+        if vary_spectra:
+            for i, isotope in enumerate(isotopes):
+                errors = spectra[isotope].errors
+                noise = errors * rng.standard_normal((k, len(errors)))
+                lower, upper, weight_lower, weight_upper = weights[i]
+                basis[:, i] += noise[:, lower] * weight_lower
+                basis[:, i] += noise[:, upper] * weight_upper
+
+        # Accumulate the running sums
+        diff = _evaluate(basis, batch_masses, batch_half_lives) - nominal
+        sum_diff += diff.sum(axis=0)
+        sum_diff_sq += (diff**2).sum(axis=0)
+        coarse = np.add.reduceat(diff * bin_widths, coarse_idx, axis=2)
+        sum_coarse += coarse.sum(axis=0)
+        sum_coarse_outer += np.einsum("ktm,ktn->tmn", coarse, coarse)
+
+    # Convert the sums into the sample mean, variance and covariance
+    mean_diff = sum_diff / n_variations
+    variance = (sum_diff_sq - n_variations * mean_diff**2) / (n_variations - 1)
+    mean_coarse = sum_coarse / n_variations
+    covariance = (
+        sum_coarse_outer
+        - n_variations * np.einsum("tm,tn->tmn", mean_coarse, mean_coarse)
+    ) / (n_variations - 1)
+
+    results = {}
+    for i, cooling_time in enumerate(cooling_times):
+        spec = Spectrum(
+            edges,
+            nominal[i] + mean_diff[i],
+            np.sqrt(np.clip(variance[i], 0, None)),
+            name=cask.name,
+        )
+        results[cooling_time] = UncertaintyResult(
+            spectrum=spec,
+            covariance=covariance[i],
+            covariance_energy=coarse_edges,
+            n_variations=n_variations,
+        )
+    return results
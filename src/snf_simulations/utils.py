@@ -1,7 +1,59 @@
 """Utility functions for spectrum interpolation and sampling."""
 
+import threading
+import weakref
+
 import numpy as np
 
+# Interned energy grids, so spectra with the same binning share a single array.
+# Entries are removed once no spectra are using the grid.
+_energy_grids: weakref.WeakValueDictionary[bytes, np.ndarray] = (
+    weakref.WeakValueDictionary()
+)
+_energy_grids_lock = threading.Lock()
+
+
+def intern_energy_grid(energy: np.ndarray) -> np.ndarray:
+    """Get a shared, read-only copy of an array of energy bin edges.
+
+    Every call with the same edges returns the same array object, so many spectra
+    with the same binning only store the edges once.
+    The returned array is read-only, as changing it would change every spectrum
+    using it.
+
+    Args:
+        energy: 1D array of bin edges.
+
+    Returns:
+        The shared float64 array with the same values.
+
+    """
+    energy = np.ascontiguousarray(energy, dtype=np.float64)
+    key = energy.tobytes()
+    with _energy_grids_lock:
+        grid = _energy_grids.get(key)
+        if grid is None:
+            grid = energy.copy()
+            grid.flags.writeable = False
+            _energy_grids[key] = grid
+    return grid
+
+
+def get_energy_grid(min_energy: float, max_energy: float, width: float) -> np.ndarray:
+    """Get shared, read-only bin edges spaced from min_energy to max_energy.
+
+    Args:
+        min_energy: Lower edge of the first bin (keV).
+        max_energy: Upper edge of the last bin (keV). If the range is not a multiple
+            of the width, the last bin extends past max_energy.
+        width: Bin width (keV).
+
+    Returns:
+        The shared array of bin edges (see intern_energy_grid).
+
+    """
+    return intern_energy_grid(np.arange(min_energy, max_energy + width, width))
+
 
 def linear_interpolate_with_errors(
     original_bins: np.ndarray,
@@ -97,11 +149,42 @@ def linear_interpolate_with_errors(
     return new_content, new_errors
 
 
+def get_histogram_cdf(bin_contents: np.ndarray) -> np.ndarray:
+    """Get the cumulative probability of selecting each bin when sampling.
+
+    Args:
+        bin_contents: 1D array of bin contents with length N.
+
+    Returns:
+        Array of N cumulative probabilities, with the last value equal to one.
+
+    """
+    if np.any(bin_contents < 0):
+        msg = "bin_contents must be non-negative"
+        raise ValueError(msg)
+
+    # Match ROOT TH1::GetRandom behaviour: bin selection probability is
+    # proportional to bin content.
+    # The probabilities are always calculated in double precision.
+    weights = bin_contents.astype(np.float64, copy=False)
+    total_weight = np.sum(weights)
+    if total_weight <= 0:  # Avoid division by zero errors
+        msg = "Histogram has zero total area; cannot sample"
+        raise ValueError(msg)
+    probabilities = weights / total_weight
+
+    # This is the same as numpy's random choice uses for the given probabilities.
+    cdf = probabilities.cumsum()
+    cdf /= cdf[-1]
+    return cdf
+
+
 def sample_histogram(
     bin_edges: np.ndarray,
     bin_contents: np.ndarray,
     n_samples: int = 100,
     seed: int | None = None,
+    cdf: np.ndarray | None = None,
 ) -> np.ndarray:
     """Sample x values from histogram bins, similar to ROOT TH1::GetRandom.
 
@@ -110,6 +193,8 @@ def sample_histogram(
         bin_contents: 1D array of bin contents with length N.
         n_samples: Number of samples to draw.
         seed: Seed for reproducible random sampling.
+        cdf: Optional pre-calculated output of get_histogram_cdf for the bin
+            contents, e.g. when sampling the same histogram many times.
 
     Returns:
         Array of sampled x values.
@@ -125,23 +210,13 @@ def sample_histogram(
     if np.any(widths <= 0):
         msg = "bin_edges must be strictly increasing"
         raise ValueError(msg)
-    if np.any(bin_contents < 0):
-        msg = "bin_contents must be non-negative"
-        raise ValueError(msg)
-
-    # Match ROOT TH1::GetRandom behaviour: bin selection probability is
-    # proportional to bin content, then sample uniformly within the selected bin.
-    weights = bin_contents
-    total_weight = np.sum(weights)
-    if total_weight <= 0:  # Avoid division by zero errors
-        msg = "Histogram has zero total area; cannot sample"
-        raise ValueError(msg)
-    probabilities = weights / total_weight
+    if cdf is None:
+        cdf = get_histogram_cdf(bin_contents)
 
-    # Use numpy's random choice to select X bins according to their probabilities,
-    # for the requested number of samples.
+    # Select bins according to their probabilities for the requested number of
+    # samples, by inverting the CDF (the same as numpy's random choice).
     rng = np.random.default_rng(seed)
-    sampled_indices = rng.choice(len(bin_contents), size=n_samples, p=probabilities)
+    sampled_indices = cdf.searchsorted(rng.random(n_samples), side="right")
 
     # Finally, for each bin take a uniform sample between the upper and lower edges.
     # This gives a continuous distribution of sampled x values from within the bins.
@@ -0,0 +1,18 @@
+"""Shared fixtures for the unit tests."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(
+    monkeypatch: pytest.MonkeyPatch, tmp_path_factory: pytest.TempPathFactory
+) -> None:
+    """Use an empty spectrum cache directory, so tests don't change user files.
+
+    Tests that need a specific cache directory can still set it themselves.
+    """
+    monkeypatch.setenv(
+        "SNF_SIMULATIONS_CACHE_DIR", str(tmp_path_factory.mktemp("cache"))
+    )
+    monkeypatch.delenv("SNF_SIMULATIONS_SITE_CACHE_DIR", raising=False)
+    monkeypatch.delenv("SNF_SIMULATIONS_DATA_BUNDLE", raising=False)
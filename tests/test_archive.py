@@ -0,0 +1,107 @@
+"""Unit tests for the spectrum archive functions."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.archive import (
+    load_spectra_directory,
+    read_metadata,
+    read_spectra,
+    write_spectra,
+)
+from snf_simulations.spec import Spectrum
+
+# Suppress warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def _make_spectra() -> dict[str, Spectrum]:
+    """Create spectra with two different binnings and storage types."""
+    rng = np.random.default_rng(1)
+    energy1 = np.linspace(0, 100, 11)
+    energy2 = np.array([0.0, 0.5, 1.25, 3.0])
+    return {
+        "a": Spectrum(energy1, rng.random(10), rng.random(10), name="a"),
+        "b": Spectrum(energy2, rng.random(3), rng.random(3), name="b"),
+        "c": Spectrum(energy1.copy(), rng.random(10), rng.random(10), name="c"),
+    }
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_write_read_spectra(tmp_path: Path, mmap: bool) -> None:
+    """Test spectra are stored without any loss."""
+    spectra = _make_spectra()
+    filepath = write_spectra(tmp_path / "archive", spectra, metadata={"seed": 1})
+    assert filepath == tmp_path / "archive.npz"
+
+    loaded = read_spectra(filepath, mmap=mmap)
+    assert list(loaded) == ["a", "b", "c"]
+    for name, spec in spectra.items():
+        assert loaded[name] == spec
+        assert loaded[name].frozen == mmap
+    # The same binning is only stored once
+    assert loaded["a"].energy is loaded["c"].energy
+    if mmap:
+        assert isinstance(loaded["a"].flux.base, np.memmap)
+    assert read_metadata(filepath) == {"seed": 1}
+
+    # Selected spectra can be loaded on their own
+    loaded = read_spectra(filepath, names=["c"], mmap=mmap)
+    assert list(loaded) == ["c"]
+    assert loaded["c"] == spectra["c"]
+
+
+def test_write_spectra_list(tmp_path: Path) -> None:
+    """Test writing a list of spectra, named by their names or positions."""
+    spectra = list(_make_spectra().values())
+    spectra[1] = Spectrum(spectra[1].energy, spectra[1].flux, spectra[1].errors)
+    spectra[2] = spectra[2].astype(np.float32)
+    filepath = write_spectra(tmp_path / "archive.npz", spectra)
+
+    loaded = read_spectra(filepath)
+    assert list(loaded) == ["a", "1", "c"]
+    # The larger storage type is used for every spectrum
+    assert loaded["a"].flux.dtype == np.float64
+    assert np.array_equal(loaded["c"].flux, spectra[2].flux)
+    assert read_metadata(filepath) == {}
+
+
+def test_archive_inputs(tmp_path: Path) -> None:
+    """Test invalid inputs raise errors."""
+    spectra = _make_spectra()
+    with pytest.raises(ValueError, match="spectra must not be empty"):
+        write_spectra(tmp_path / "archive.npz", {})
+    with pytest.raises(ValueError, match="Spectrum names must be unique"):
+        write_spectra(tmp_path / "archive.npz", [spectra["a"], spectra["a"]])
+
+    filepath = write_spectra(tmp_path / "archive.npz", spectra)
+    with pytest.raises(ValueError, match="Spectra not found in .*: d"):
+        read_spectra(filepath, names=["a", "d"])
+
+    filepath = spectra["a"].write_npz(tmp_path / "single.npz")
+    with pytest.raises(ValueError, match="is not a spectrum archive"):
+        read_spectra(filepath)
+
+
+def test_load_spectra_directory(tmp_path: Path) -> None:
+    """Test loading a directory of CSV, npz and archive files."""
+    spectra = _make_spectra()
+    spectra["a"].write_csv(tmp_path / "first.csv")
+    spectra["b"].write_npz(tmp_path / "second.npz")
+    write_spectra(tmp_path / "third.npz", spectra)
+    (tmp_path / "notes.txt").write_text("Not a spectrum")
+
+    loaded = load_spectra_directory(tmp_path)
+    assert list(loaded) == ["first", "second", "third/a", "third/b", "third/c"]
+    assert np.allclose(loaded["first"].flux, spectra["a"].flux, rtol=1e-6)
+    assert loaded["second"] == spectra["b"]
+    assert loaded["third/c"] == spectra["c"]
+
+    loaded = load_spectra_directory(tmp_path, pattern="s*")
+    assert list(loaded) == ["second"]
+
+    with pytest.raises(ValueError, match="is not a directory"):
+        load_spectra_directory(tmp_path / "missing")
@@ -1,11 +1,14 @@
 """Unit tests for the Cask class."""
 
+from copy import deepcopy
 from pathlib import Path
 
+import numpy as np
 import pytest
 
-from snf_simulations.cask import Cask, _filter_isotopes
+from snf_simulations.cask import Cask, IsotopeArrays, _filter_isotopes
 from snf_simulations.data import get_example_tbq_path, get_isotope_properties
+from snf_simulations.physics import get_isotope_activity
 from snf_simulations.spec import Spectrum
 
 from .test_data_fispin import _write_tabqfile
@@ -154,6 +157,31 @@ def test_from_tabqfile_default_isotopes(
     )
 
 
+def test_from_tabqfiles(tmp_path: Path) -> None:
+    """Test that from_tabqfiles creates a Cask for each file with shared data."""
+    filepath = _write_tabqfile(tmp_path)
+    other = tmp_path / "other.tbQ"
+    other.write_text(
+        "*** TIME    1.000E+00 YEARS\nALL-NUC      GRAMS\nSR90         4.0\n",
+        encoding="utf-8",
+    )
+
+    casks = Cask.from_tabqfiles(tmp_path, total_mass=1000.0, isotopes="all")
+
+    assert [cask.name for cask in casks] == ["other", "sample"]
+    # Isotopes that aren't in a file are included with no mass
+    assert casks[0].isotope_masses == {"Sr90": 1000.0, "Cs137": 0.0}
+    assert casks[0].initial_cooling_time == pytest.approx(1.0)
+    single = Cask.from_tabqfile(filepath, total_mass=1000.0, isotopes="all")
+    assert casks[1].isotope_masses == pytest.approx(single.isotope_masses)
+    assert casks[1].initial_cooling_time == pytest.approx(single.initial_cooling_time)
+    # The spectra are only loaded once
+    assert casks[1].isotope_spectra["Sr90"] is casks[0].isotope_spectra["Sr90"]
+
+    casks = Cask.from_tabqfiles([filepath], isotopes=["Cs137"])
+    assert casks[0].isotope_masses == {"Cs137": 3.0e-3}
+
+
 def test_get_total_spectrum() -> None:
     """Test that get_total_spectrum returns a Spectrum object."""
     isotope_masses = {"Sr90": 1000.0, "Cs137": 1000.0}  # kg
@@ -170,6 +198,32 @@ def test_get_total_spectrum() -> None:
     )
 
 
+def test_get_total_spectrum_float32() -> None:
+    """Test storing the cask spectra in single precision."""
+    isotope_masses = {"Sr90": 1000.0, "Cs137": 1000.0}  # kg
+    cask = Cask(isotope_masses, 10.0)
+    cask32 = Cask(isotope_masses, 10.0, dtype=np.float32)
+    assert cask32.isotope_spectra["Sr90"].flux.dtype == np.float32
+    assert cask32.get_component_basis().flux.dtype == np.float32
+
+    spec = cask.get_total_spectrum(cooling_time=20.0)
+    spec32 = cask32.get_total_spectrum(cooling_time=20.0)
+    assert spec32.flux.dtype == np.float32
+    assert spec32.energy is spec.energy
+    assert np.allclose(spec32.flux, spec.flux, rtol=1e-6)
+    assert np.allclose(spec32.errors, spec.errors, rtol=1e-6)
+
+    # Spectra given in a different type are converted
+    cask32 = Cask(
+        isotope_masses, 10.0, isotope_spectra=cask.isotope_spectra, dtype="f4"
+    )
+    assert cask32.isotope_spectra["Sr90"].flux.dtype == np.float32
+    assert cask.isotope_spectra["Sr90"].flux.dtype == np.float64
+
+    with pytest.raises(ValueError, match="dtype must be a floating point type"):
+        Cask(isotope_masses, 10.0, dtype=int)
+
+
 def test_get_total_spectrum_inputs() -> None:
     """Test that get_total_spectrum validates its inputs."""
     isotope_masses = {"Sr90": 1000.0, "Cs137": 1000.0}  # kg
@@ -185,6 +239,23 @@ def test_get_total_spectrum_inputs() -> None:
         cask.get_total_spectrum(cooling_time=initial_cooling_time - 1.0)
 
 
+def test_get_total_spectrum_metastable() -> None:
+    """Test metastable states use the spectrum of their excited parent level."""
+    cask = Cask({"Y90": 1.0, "Y90m": 1.0}, 0.0)
+    ground_state = cask.isotope_spectra["Y90"]
+    isomer = cask.isotope_spectra["Y90m"]
+    # Y90m decays almost entirely by internal transition
+    assert isomer.integrate() < 1e-4 * ground_state.integrate()
+    assert isomer.energy[-1] < ground_state.energy[-1]
+    properties = cask.isotope_properties
+    assert properties["Y90m"]["half_life"] < properties["Y90"]["half_life"]
+
+    # The short-lived isomer has a high activity, so adds to the total spectrum
+    spec = cask.get_total_spectrum(cooling_time=0.0)
+    ground_state_spec = Cask({"Y90": 1.0}, 0.0).get_total_spectrum(cooling_time=0.0)
+    assert spec.integrate() > ground_state_spec.integrate()
+
+
 def test_get_total_spectrum_daughter() -> None:
     """Test that get_total_spectrum includes daughter isotope spectra."""
     isotope_masses = {"Sr90": 1000.0, "Y90": 1000.0}  # kg
@@ -233,13 +304,14 @@ def test_cask_from_example_tbq() -> None:
 
 
 def test_filter_isotopes(
-    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture, tmp_path: Path
 ) -> None:
     """Test _filter_isotopes logic for all filter cases."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
     props = {
         "Sr90": {"decay_modes": ["B-"]},
         "Cs137": {"decay_modes": ["B-"]},
-        "Y90m": {"decay_modes": ["B-"]},  # Metastable
+        "Y90m": {"decay_modes": ["IT", "B-"]},  # Metastable
         "Am242": {"decay_modes": ["EC"]},  # No B-
         "Xe135": {"decay_modes": ["B-"]},  # No spectrum
     }
@@ -248,27 +320,29 @@ def test_filter_isotopes(
         return props[isotope]
 
     monkeypatch.setattr(
-        "snf_simulations.cask.get_isotope_properties", fake_get_isotope_properties
+        "snf_simulations.data.index.get_isotope_properties",
+        fake_get_isotope_properties,
     )
 
-    def fake_from_isotope(isotope: str) -> str:
+    def fake_get_antineutrino_spectrum(isotope: str) -> np.ndarray:
         if isotope == "Xe135":
-            raise ValueError("No antineutrino spectrum data found for isotope Xe135")
-        return f"Spectrum({isotope})"
+            return np.empty((0, 3))
+        return np.ones((10, 3))
 
     monkeypatch.setattr(
-        "snf_simulations.cask.Spectrum.from_isotope", staticmethod(fake_from_isotope)
+        "snf_simulations.data.iaea.get_antineutrino_spectrum",
+        fake_get_antineutrino_spectrum,
     )
 
-    isotopes = ["Sr90", "Cs137", "Am242", "Y90m", "Xe135"]
+    isotopes = ["Sr90", "Cs137", "Am242", "Y90m", "Xe135", "Sb124m"]
     filtered = _filter_isotopes(isotopes)
-    assert set(filtered) == {"Sr90", "Cs137"}
+    assert set(filtered) == {"Sr90", "Cs137", "Y90m"}
 
     # Check that the expected verbose messages were printed
     _filter_isotopes(isotopes, verbose=True)
     out = capsys.readouterr().out
-    assert "Excluding metastable isotope: Y90m" in out, (
-        "Should print message about excluding metastable isotope"
+    assert "Excluding metastable isotope without decay data: Sb124m" in out, (
+        "Should print message about excluding metastable isotope without decay data"
     )
     assert "Excluding isotope without B- decay: Am242" in out, (
         "Should print message about excluding isotope with no B- decay"
@@ -276,3 +350,180 @@ def test_filter_isotopes(
     assert "Excluding isotope with empty spectrum data: Xe135" in out, (
         "Should print message about excluding isotope with empty spectrum data"
     )
+
+
+def test_get_decay_chains() -> None:
+    """Test get_decay_chains only returns chains with a parent in the cask."""
+    cask = Cask({"Sr90": 1000.0, "Ce144": 0.0, "Cs137": 1000.0}, name="test_cask")
+
+    chains = cask.get_decay_chains()
+
+    assert [(chain.parent, chain.daughter) for chain in chains] == [("Sr90", "Y90")]
+
+
+def test_create_cask_preloaded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that pre-loaded isotope data is used instead of loading it again."""
+    properties = {"Sr90": get_isotope_properties("Sr90")}
+    spectra = {"Sr90": Spectrum.from_isotope("Sr90")}
+    monkeypatch.setattr(
+        "snf_simulations.cask.Spectrum.from_isotope",
+        lambda isotope: pytest.fail(f"Unexpected load for {isotope}"),
+    )
+
+    cask = Cask(
+        {"Sr90": 1000.0},
+        isotope_properties=properties,
+        isotope_spectra=spectra,
+    )
+
+    assert cask.isotope_properties == properties
+    assert cask.isotope_spectra["Sr90"] is spectra["Sr90"]
+
+
+def test_create_cask_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test isotopes are loaded in threads, and every failed isotope is reported."""
+    isotope_masses = {"Sr90": 1000.0, "Cs137": 500.0, "Ce144": 10.0}
+    cask = Cask(isotope_masses, 10.0)
+    serial = Cask(isotope_masses, 10.0, max_workers=1)
+    assert list(cask.isotope_spectra) == list(serial.isotope_spectra)
+    assert cask.isotope_properties == serial.isotope_properties
+    for isotope, spec in cask.isotope_spectra.items():
+        assert np.array_equal(spec.flux, serial.isotope_spectra[isotope].flux)
+
+    def fake_from_isotope(isotope: str, **kwargs: object) -> Spectrum:
+        if isotope != "Sr90":
+            msg = f"No antineutrino spectrum data found for isotope {isotope}"
+            raise ValueError(msg)
+        return spec
+
+    monkeypatch.setattr(
+        "snf_simulations.cask.Spectrum.from_isotope", staticmethod(fake_from_isotope)
+    )
+    with pytest.raises(ValueError, match="Could not load data for 2 isotope") as err:
+        Cask(isotope_masses, 10.0)
+    assert "\n  Cs137: No antineutrino spectrum" in str(err.value)
+    assert "\n  Ce144: No antineutrino spectrum" in str(err.value)
+
+    with pytest.raises(ValueError, match="max_workers must be a positive value"):
+        Cask(isotope_masses, 10.0, max_workers=0)
+
+
+def test_get_component_basis() -> None:
+    """Test the component basis reproduces the total spectrum."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=1.0)
+
+    basis = cask.get_component_basis(width=1, max_energy=6000)
+    assert basis.names == ["Sr90", "Cs137", "Sr90->Y90"]
+    assert basis.flux.shape == (3, 6000)
+    assert basis.errors.shape == basis.flux.shape
+
+    activities = cask.get_component_activities(np.array([1.0, 5.0]))
+    assert activities.shape == (2, 3)
+    assert activities[0, 2] == 0, "No daughter should have been created yet"
+    for i, cooling_time in enumerate([1.0, 5.0]):
+        expected = cask.get_total_spectrum(cooling_time=cooling_time)
+        expected.equalise(width=1, min_energy=0, max_energy=6000)
+        assert np.allclose(activities[i] @ basis.flux, expected.flux)
+
+    with pytest.raises(ValueError, match="cannot be less than the initial cask"):
+        cask.get_component_activities(np.array([0.5]))
+
+
+def test_cask_frozen_spectra() -> None:
+    """Test the loaded isotope spectra are frozen, and not changed by calculations."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 1000.0}, initial_cooling_time=1.0)
+    spec = cask.isotope_spectra["Sr90"]
+    assert spec.frozen
+    original = deepcopy(spec)
+
+    spectra = cask.get_component_spectra(cooling_time=5.0)
+    assert [s.name for s in spectra] == ["Sr90", "Cs137", "Sr90->Y90"]
+    for component in spectra:
+        assert not component.frozen
+        component.equalise(width=10)
+    cask.get_total_spectrum(cooling_time=5.0)
+    assert cask.isotope_spectra["Sr90"] is spec
+    assert spec == original
+
+
+def test_isotope_arrays() -> None:
+    """Test the isotope data is stored as aligned, read-only arrays."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=1.0)
+
+    arrays = cask.arrays
+    assert isinstance(arrays, IsotopeArrays)
+    assert arrays.names == cask.isotopes == ["Sr90", "Cs137"]
+    np.testing.assert_array_equal(arrays.zais, [380900, 551370])
+    np.testing.assert_array_equal(arrays.masses, [1000.0, 500.0])
+    properties = [cask.isotope_properties[isotope] for isotope in cask.isotopes]
+    np.testing.assert_array_equal(
+        arrays.half_lives, [p["half_life"] for p in properties]
+    )
+    np.testing.assert_allclose(arrays.decay_constants, np.log(2) / arrays.half_lives)
+    expected = [
+        get_isotope_activity(
+            time_elapsed=10.0,
+            mass=cask.isotope_masses[isotope],
+            molar_mass=p["molar_mass"],
+            half_life=p["half_life"],
+        )
+        for isotope, p in zip(cask.isotopes, properties, strict=True)
+    ]
+    np.testing.assert_allclose(arrays.get_activities(10.0), expected, rtol=1e-12)
+    assert arrays.get_activities(np.array([[0.0], [10.0]])).shape == (2, 2)
+    with pytest.raises(ValueError, match="read-only"):
+        arrays.masses[0] = 0
+
+    # The masses can still be read as a dictionary
+    assert cask.isotope_masses == {"Sr90": 1000.0, "Cs137": 500.0}
+    assert "Sr90" in cask.isotope_masses
+    assert "Y90" not in cask.isotope_masses
+    assert repr(cask.isotope_masses) == "{'Sr90': 1000.0, 'Cs137': 500.0}"
+    with pytest.raises(TypeError):
+        cask.isotope_masses["Sr90"] = 0  # type: ignore[index]
+    with pytest.raises(AttributeError):
+        cask.extra = 1  # type: ignore[attr-defined]
+
+
+def test_component_basis_cached() -> None:
+    """Test the basis is kept, and used for the total spectrum at any time."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=1.0)
+
+    basis = cask.get_component_basis()
+    assert cask.get_component_basis() is basis
+    other = cask.get_component_basis(max_energy=3000)
+    assert other is not basis
+    assert cask.get_component_basis() is basis
+    assert cask.get_component_basis(max_energy=3000) is other
+    assert not basis.flux.flags.writeable
+
+    for cooling_time in [1.0, 10.0]:
+        spectra = cask.get_component_spectra(cooling_time)
+        max_energy = max(spec.energy[-1] for spec in spectra)
+        equalised = [
+            spec.equalised(width=1, min_energy=0, max_energy=max_energy)
+            for spec in spectra
+        ]
+        total = cask.get_total_spectrum(cooling_time)
+        np.testing.assert_array_equal(total.energy, equalised[0].energy)
+        np.testing.assert_allclose(
+            total.flux, np.sum([spec.flux for spec in equalised], axis=0), rtol=1e-12
+        )
+
+
+def test_total_spectrum_uses_wider_basis(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test the total spectrum uses a cached basis covering a wider energy range."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=1.0)
+    expected = cask.get_total_spectrum(10.0)
+
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=1.0)
+    cask.get_component_basis(max_energy=6000)
+
+    def _fail(*_args: object, **_kwargs: object) -> None:
+        msg = "basis should not be recalculated"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr(Cask, "get_component_basis", _fail)
+    total = cask.get_total_spectrum(10.0)
+    np.testing.assert_array_equal(total.energy, expected.energy)
+    np.testing.assert_allclose(total.flux, expected.flux, rtol=1e-12)
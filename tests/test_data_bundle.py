@@ -0,0 +1,135 @@
+"""Unit tests for offline nuclear data bundles."""
+
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.data import get_antineutrino_spectrum, get_isotope_properties
+from snf_simulations.data.bundle import DataBundle, build_bundle, import_bundle
+from snf_simulations.data.cache import add_cache_file, prune_cache, verify_cache
+from snf_simulations.data.synthetic import write_spectrum_file
+from snf_simulations.scripts.command_line import main
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+@pytest.fixture
+def bundle_path(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Build a bundle, with the Xe140 spectrum downloaded from a synthetic file."""
+    (tmp_path / "source").mkdir()
+    source = write_spectrum_file(tmp_path / "source" / "140xe.csv", "Xe140", seed=1)
+
+    def fake_download(nuclide: str) -> str:
+        return str(add_cache_file(f"{nuclide}.csv", source.read_bytes(), "test"))
+
+    with monkeypatch.context() as m:
+        m.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path / "online"))
+        m.setattr("snf_simulations.data.iaea._download_spectrum_data", fake_download)
+        return build_bundle(tmp_path / "data.snfdata", ["Xe140", "Sr90", "Am241"])
+
+
+def _fail(*args: object) -> None:
+    pytest.fail(f"Unexpected call with {args}")
+
+
+def test_build_bundle(bundle_path: Path) -> None:
+    """Test the bundle includes spectra for beta-minus isotopes and all properties."""
+    with DataBundle(bundle_path) as bundle:
+        # Am241 has no beta-minus decay, so doesn't need a spectrum
+        assert set(bundle.spectra) == {"140xe.csv", "90sr.csv"}
+        assert set(bundle.properties) == {"Xe140", "Sr90", "Am241"}
+        assert bundle.get_properties("90Sr") == get_isotope_properties("Sr90")
+        assert bundle.get_spectrum_file("241am.csv") is None
+        assert bundle.verify() == []
+        assert repr(bundle) == f"<DataBundle: 2 spectra, 3 isotopes, {bundle_path}>"
+    with zipfile.ZipFile(bundle_path) as archive:
+        info = archive.getinfo("spectra/90sr.csv")
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.compress_size < info.file_size
+
+
+def test_bundle_used_offline(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, bundle_path: Path
+) -> None:
+    """Test spectra and properties are loaded from a bundle without a download."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path / "offline"))
+    monkeypatch.setattr("snf_simulations.data.iaea._download_spectrum_data", _fail)
+    monkeypatch.setattr("snf_simulations.data.mendeleev.isotope", _fail)
+    expected = np.loadtxt(
+        tmp_path / "source" / "140xe.csv",
+        delimiter=",",
+        skiprows=1,
+        usecols=(7, 10, 11),
+    )
+
+    monkeypatch.setenv("SNF_SIMULATIONS_DATA_BUNDLE", str(bundle_path))
+    np.testing.assert_allclose(get_antineutrino_spectrum("Xe140"), expected)
+    assert "B-" in get_isotope_properties("140Xe")["decay_modes"]
+    assert not (tmp_path / "offline").exists()
+
+    monkeypatch.setenv("SNF_SIMULATIONS_DATA_BUNDLE", str(tmp_path / "missing"))
+    with pytest.raises(ValueError, match="Data bundle .* not found"):
+        get_antineutrino_spectrum("Xe140")
+
+
+def test_bundle_properties_cached(
+    monkeypatch: pytest.MonkeyPatch, bundle_path: Path
+) -> None:
+    """Test the bundles are only checked the first time an isotope is used."""
+    monkeypatch.setenv("SNF_SIMULATIONS_DATA_BUNDLE", str(bundle_path))
+    properties = get_isotope_properties("Am241")
+    monkeypatch.setattr("snf_simulations.data.bundle.get_data_bundles", _fail)
+    assert get_isotope_properties("241Am") == properties
+
+
+def test_import_bundle(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    bundle_path: Path,
+) -> None:
+    """Test an imported bundle is checked, added to the cache, and then used."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path / "offline"))
+    monkeypatch.setattr("snf_simulations.data.iaea._download_spectrum_data", _fail)
+    main(["data", "import", str(bundle_path)])
+    assert "Imported" in capsys.readouterr().out
+    assert (tmp_path / "offline" / "data.snfdata").is_file()
+    assert verify_cache() == {}
+    assert len(get_antineutrino_spectrum("Xe140")) > 0
+
+    damaged = tmp_path / "damaged.snfdata"
+    damaged.write_bytes(b"not a zip file")
+    with pytest.raises(ValueError, match="not a valid data bundle"):
+        import_bundle(damaged)
+
+
+def test_prune_keeps_bundles(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, bundle_path: Path
+) -> None:
+    """Test pruning the cache only removes imported bundles if asked to."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path / "offline"))
+    import_bundle(bundle_path)
+    imported = tmp_path / "offline" / "data.snfdata"
+
+    main(["cache", "prune", "--all"])
+    assert prune_cache(remove_all=True) == []
+    assert imported.is_file()
+
+    assert prune_cache(remove_all=True, include_bundles=True) == ["data.snfdata"]
+    assert not imported.exists()
+
+
+def test_main_data_bundle(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, capsys: pytest.CaptureFixture
+) -> None:
+    """Test building a bundle from the command line."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr("snf_simulations.data.iaea._download_spectrum_data", _fail)
+    main(["data", "bundle", str(tmp_path / "default.snfdata"), "Sr90", "Y90m"])
+    out = capsys.readouterr().out
+    # The Y90 daughter of Sr90 is also included
+    assert "Saved 2 spectra for 3 isotopes" in out
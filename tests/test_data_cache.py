@@ -0,0 +1,142 @@
+"""Unit tests for the cache directory manager."""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.data.cache import (
+    add_cache_file,
+    get_manifest,
+    prune_cache,
+    verify_cache,
+)
+from snf_simulations.data.iaea import get_antineutrino_spectrum
+from snf_simulations.data.synthetic import write_spectrum_file
+from snf_simulations.scripts.command_line import main
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_add_cache_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test files are recorded in the manifest and no temporary files are left."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    data = write_spectrum_file(tmp_path / "source.csv", "Xe140", seed=1).read_bytes()
+    add_cache_file("140xe.csv", data, source="test")
+
+    entry = get_manifest()["140xe.csv"]
+    assert entry["sha256"] == hashlib.sha256(data).hexdigest()
+    assert entry["size"] == len(data)
+    assert entry["source"] == "test"
+    assert not list(tmp_path.glob(".tmp-*"))
+
+    filepath = add_cache_file("test.csv", b"a,b\n1,2\n", source="test")
+    assert filepath.read_bytes() == b"a,b\n1,2\n"
+    assert set(get_manifest()) == {"140xe.csv", "test.csv"}
+    (tmp_path / "source.csv").unlink()
+    assert verify_cache() == {}
+
+
+def test_concurrent_fetch(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test only one of many threads fetching the same spectrum downloads it."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    source = write_spectrum_file(tmp_path / "source.csv", "Xe140", seed=1)
+    downloads = []
+
+    def fake_download(nuclide: str) -> str:
+        downloads.append(nuclide)
+        time.sleep(0.1)
+        return str(add_cache_file(f"{nuclide}.csv", source.read_bytes(), "test"))
+
+    monkeypatch.setattr(
+        "snf_simulations.data.iaea._download_spectrum_data", fake_download
+    )
+    results = []
+
+    def fetch() -> None:
+        results.append(get_antineutrino_spectrum("Xe140"))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert downloads == ["140xe"]
+    assert len(results) == 8
+    assert all(np.array_equal(result, results[0]) for result in results)
+
+
+def test_verify_prune_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test damaged and temporary files are found and removed."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    add_cache_file("90sr.csv", b"sr\n", source="test")
+    add_cache_file("137cs.csv", b"cs\n", source="test")
+    with (tmp_path / "137cs.csv").open("ab") as file:
+        file.write(b"1,2,3\n")
+    (tmp_path / "90y.csv").write_text("saved by hand\n")
+    (tmp_path / ".tmp-144ce.csv.abc").write_text("partial")
+    new_temp_file = tmp_path / ".tmp-88kr.csv.def"
+    new_temp_file.write_text("partial")
+    old_time = time.time() - 7200
+    os.utime(tmp_path / ".tmp-144ce.csv.abc", (old_time, old_time))
+
+    assert verify_cache() == {
+        "137cs.csv": "size mismatch",
+        "90y.csv": "not in manifest",
+        ".tmp-144ce.csv.abc": "temporary file",
+        ".tmp-88kr.csv.def": "temporary file",
+    }
+
+    # Only old temporary files are removed, as others may still be being written
+    assert prune_cache() == ["137cs.csv", ".tmp-144ce.csv.abc"]
+    assert set(get_manifest()) == {"90sr.csv"}
+    assert (tmp_path / "90y.csv").is_file()
+    assert new_temp_file.is_file()
+
+    assert prune_cache(remove_all=True) == ["90sr.csv", "90y.csv"]
+    assert get_manifest() == {}
+    assert not list(tmp_path.glob("*.csv"))
+
+
+def test_main_cache(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """Test the cache subcommands."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    source = write_spectrum_file(tmp_path / "source.csv", "Xe140", seed=1)
+
+    def fake_download(nuclide: str) -> str:
+        return str(add_cache_file(f"{nuclide}.csv", source.read_bytes(), "test"))
+
+    monkeypatch.setattr(
+        "snf_simulations.data.iaea._download_spectrum_data", fake_download
+    )
+    main(["cache", "warm", "Sr90", "Am241", "Xe140"])
+    out = capsys.readouterr().out
+    # The Y90 daughter of Sr90 is also found, and packaged data isn't copied
+    assert f"Found spectra for 3 of 4 isotopes in {tmp_path}" in out
+    assert (tmp_path / "140xe.csv").is_file()
+    assert not (tmp_path / "90y.csv").exists()
+    source.unlink()
+
+    main(["cache", "verify"])
+    assert "Found 0 damaged files" in capsys.readouterr().out
+
+    (tmp_path / "140xe.csv").write_text("damaged\n")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["cache", "verify"])
+    assert exit_info.value.code == 1
+    assert "140xe.csv: size mismatch" in capsys.readouterr().out
+
+    main(["cache", "prune"])
+    assert "Removed 140xe.csv" in capsys.readouterr().out
+    assert not (tmp_path / "140xe.csv").exists()
@@ -2,13 +2,18 @@
 
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from snf_simulations.data.fispin import (
     _convert_sim_time_to_years,
     get_isotope_masses,
+    iter_isotope_masses,
     load_tabqfile,
+    load_tabqfiles,
 )
+from snf_simulations.data.nuclides import get_zai
+from snf_simulations.data.synthetic import write_tabqfile
 
 # Suppress assert warnings from ruff
 # ruff: noqa: S101  # asserts
@@ -112,9 +117,73 @@ def test_get_isotope_masses_selected_time(tmp_path: Path) -> None:
     assert masses["Cs137"] == pytest.approx(0.008)
 
 
+def test_iter_isotope_masses(tmp_path: Path) -> None:
+    """Test the masses from every section are given in file order."""
+    filepath = _write_tabqfile(tmp_path)
+
+    sections = list(iter_isotope_masses(filepath))
+
+    assert len(sections) == 2
+    assert sections[0][0] == pytest.approx({"Sr90": 3.0e-3, "Cs137": 3.0e-3})
+    assert sections[0][1] == pytest.approx(0.5 / 365.2425)
+    assert sections[1][0] == pytest.approx({"Sr90": 2.0e-3, "Cs137": 8.0e-3})
+    assert sections[1][1] == pytest.approx(2 / 365.2425)
+    # The contents of a file can also be given
+    assert list(iter_isotope_masses(EXAMPLE_TABQ_CONTENT)) == sections
+
+
 def test_get_isotope_masses_invalid_time(tmp_path: Path) -> None:
     """Test requesting a missing simulation time raises ValueError."""
     filepath = _write_tabqfile(tmp_path)
 
     with pytest.raises(ValueError, match=r"Specified time string"):
         get_isotope_masses(filepath, "1.000E+01 YEARS")
+
+
+def test_load_tabqfiles(tmp_path: Path) -> None:
+    """Test the masses from many files are aligned on a shared nuclide axis."""
+    for i, burnup in enumerate([30, 45.5, 60]):
+        write_tabqfile(
+            tmp_path / f"batch{i}_bu{burnup}.tbQ",
+            n_nuclides=20 + 10 * i,
+            n_steps=5,
+            include_other=True,
+            seed=i,
+        )
+
+    inventory = load_tabqfiles(
+        tmp_path, filename_pattern=r"batch(?P<batch>\d+)_bu(?P<burnup>[\d.]+)"
+    )
+
+    assert [path.name for path in inventory.filepaths] == [
+        "batch0_bu30.tbQ",
+        "batch1_bu45.5.tbQ",
+        "batch2_bu60.tbQ",
+    ]
+    assert inventory.tags[1] == {"batch": 1.0, "burnup": 45.5}
+    assert np.all(np.diff(inventory.zais) > 0)
+    assert inventory.masses.shape == (3, len(inventory.zais))
+    for i, filepath in enumerate(inventory.filepaths):
+        isotope_masses, cooling_time = get_isotope_masses(filepath)
+        assert inventory.cooling_times[i] == pytest.approx(cooling_time)
+        assert inventory.total_masses[i] == pytest.approx(sum(isotope_masses.values()))
+        # Only the "<other>" row isn't included in the matrix
+        assert np.count_nonzero(inventory.masses[i]) == len(isotope_masses) - 1
+        for name, mass in isotope_masses.items():
+            if name != "<other>":
+                column = np.searchsorted(inventory.zais, get_zai(name))
+                assert inventory.masses[i, column] == pytest.approx(mass)
+
+    # The same files given by a glob pattern and parsed in parallel
+    parallel = load_tabqfiles(tmp_path / "batch*.tbQ", max_workers=2)
+    np.testing.assert_array_equal(parallel.zais, inventory.zais)
+    np.testing.assert_array_equal(parallel.masses, inventory.masses)
+    assert parallel.tags == [{}, {}, {}]
+
+
+def test_load_tabqfiles_invalid(tmp_path: Path) -> None:
+    """Test an error is raised if there are no files or max_workers is invalid."""
+    with pytest.raises(ValueError, match="No .tbQ files found"):
+        load_tabqfiles(tmp_path)
+    with pytest.raises(ValueError, match="max_workers must be a positive value"):
+        load_tabqfiles([_write_tabqfile(tmp_path)], max_workers=0)
@@ -1,5 +1,6 @@
 """Unit tests for IAEA antineutrino spectrum data functions."""
 
+import os
 import urllib.error
 from io import BytesIO
 from pathlib import Path
@@ -7,11 +8,13 @@ from pathlib import Path
 import numpy as np
 import pytest
 
+from snf_simulations import profiling
+from snf_simulations.data.cache import get_cache_dir
 from snf_simulations.data.iaea import (
-    _copy_packaged_spectrum_to_cache,
     _download_spectrum_data,
-    _get_cache_dir,
+    _find_spectrum_file,
     _load_spectrum_file,
+    get_antineutrino_branches,
     get_antineutrino_spectrum,
 )
 
@@ -27,7 +30,7 @@ def test_get_cache_dir_uses_xdg_cache_home(
     monkeypatch.delenv("SNF_SIMULATIONS_CACHE_DIR", raising=False)
     monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
 
-    cache_dir = _get_cache_dir()
+    cache_dir = get_cache_dir()
 
     assert cache_dir == tmp_path / "snf_simulations" / "spec_data"
     assert cache_dir.is_dir()
@@ -41,38 +44,38 @@ def test_get_cache_dir_defaults_to_home(
     monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
     monkeypatch.setattr("snf_simulations.data.iaea.Path.home", lambda: tmp_path)
 
-    cache_dir = _get_cache_dir()
+    cache_dir = get_cache_dir()
 
     assert cache_dir == tmp_path / ".cache" / "snf_simulations" / "spec_data"
     assert cache_dir.is_dir()
 
 
-def test_copy_packaged_spectrum_to_cache_copies_existing_file(
-    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
-) -> None:
-    """Test bundled spectrum files are copied into the writable cache."""
-    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
-
-    copied = _copy_packaged_spectrum_to_cache("Sr90")
-
-    assert copied
-    copied_file = tmp_path / "90sr.csv"
-    assert copied_file.is_file()
-    header = copied_file.read_text(encoding="utf-8").splitlines()[0]
-    assert "bin_en" in header
-    assert "dn_de_nu" in header
-
-
-def test_copy_packaged_spectrum_to_cache_returns_false_when_missing(
-    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
-) -> None:
-    """Test helper returns False when there is no bundled file for isotope."""
-    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
-
-    copied = _copy_packaged_spectrum_to_cache("Xe999")
+def test_find_spectrum_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test spectrum files are found in the user cache, site caches, then package."""
+    user_dir = tmp_path / "user"
+    site_dirs = [tmp_path / "site1", tmp_path / "site2"]
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(user_dir))
+    monkeypatch.setenv(
+        "SNF_SIMULATIONS_SITE_CACHE_DIR", os.pathsep.join(map(str, site_dirs))
+    )
 
-    assert not copied
-    assert not (tmp_path / "999xe.csv").exists()
+    # Packaged data is read in place
+    packaged = _find_spectrum_file("Sr90")
+    assert packaged is not None
+    assert packaged.name == "90sr.csv"
+    assert "bin_en" in packaged.read_text(encoding="utf-8").splitlines()[0]
+    assert _find_spectrum_file("Xe999") is None
+    assert not user_dir.exists()
+
+    site_dirs[1].mkdir()
+    (site_dirs[1] / "90sr.csv").write_text("site\n")
+    assert _find_spectrum_file("90Sr") == site_dirs[1] / "90sr.csv"
+    site_dirs[0].mkdir()
+    (site_dirs[0] / "90sr.csv").write_text("site\n")
+    assert _find_spectrum_file("90Sr") == site_dirs[0] / "90sr.csv"
+    user_dir.mkdir()
+    (user_dir / "90sr.csv").write_text("user\n")
+    assert _find_spectrum_file("90Sr") == user_dir / "90sr.csv"
 
 
 def test_download_spectrum_data_uses_cache(
@@ -111,6 +114,7 @@ def test_download_spectrum_data_removes_duplicates(
         "38,52,Sr,0,39,51,Y,0.0,0.1,0.01,0.2,0.02,2026-04-15\n"
         "38,52,Sr,0,39,51,Y,0.0,0.1,0.01,0.2,0.02,2026-04-15\n"
         "38,52,Sr,0,39,51,Y,0.5,0.2,0.02,0.4,0.04,2026-04-15\n"
+        "38,52,Sr,100,39,51,Y,0.5,0.2,0.02,0.4,0.04,2026-04-15\n"
     )
 
     class _MockResponse:
@@ -126,7 +130,8 @@ def test_download_spectrum_data_removes_duplicates(
     filepath = Path(_download_spectrum_data("Sr90"))
     cached_data = np.genfromtxt(filepath, delimiter=",", skip_header=1, dtype=str)
 
-    assert cached_data.shape[0] == 2, "Caching file should remove duplicate rows"
+    # Rows for other parent levels with the same energy are kept
+    assert cached_data.shape[0] == 3, "Caching file should remove duplicate rows"
 
 
 def test_download_spectrum_data_does_not_overwrite_existing_cache(
@@ -223,11 +228,11 @@ def test_download_spectrum_data_reports_cloudflare_block(
 def test_load_spectrum_file_missing_cache_raises(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
-    """Test that loading a missing cached spectrum raises ValueError."""
+    """Test that loading a missing spectrum raises ValueError."""
     monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
 
-    with pytest.raises(ValueError, match=r"not found in cache"):
-        _load_spectrum_file("Sr90")
+    with pytest.raises(ValueError, match=r"Spectrum data file for 140xe not found"):
+        _load_spectrum_file("Xe140")
 
 
 def test_load_spectrum_file_contents(
@@ -305,8 +310,7 @@ def test_get_antineutrino_spectrum_downloads_when_cache_missing(
         "snf_simulations.data.iaea._download_spectrum_data", _fake_download
     )
     monkeypatch.setattr(
-        "snf_simulations.data.iaea._copy_packaged_spectrum_to_cache",
-        lambda _: False,
+        "snf_simulations.data.iaea._find_packaged_spectrum", lambda _: None
     )
 
     spectrum = get_antineutrino_spectrum("Sr90")
@@ -337,32 +341,84 @@ def test_get_antineutrino_spectrum_uses_cached_file(
     np.testing.assert_allclose(spectrum, np.array([[1.5, 2.5, 0.25]]))
 
 
-def test_get_antineutrino_spectrum_copies_packaged_file(
+def test_get_antineutrino_spectrum_reads_packaged_file(
     monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
-    """Test that packaged data is copied to cache before any download attempt."""
-    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    """Test that packaged data is read without copying it to the cache."""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(
+        "snf_simulations.data.iaea._download_spectrum_data",
+        lambda isotope_name: pytest.fail(f"Unexpected download for {isotope_name}"),
+    )
 
-    def _fake_copy_packaged(isotope_name: str) -> bool:
-        cache_file = tmp_path / "90sr.csv"
-        cache_file.write_text(
-            "p_z,p_n,p_symbol,p_energy,d_z,d_n,d_symbol,bin_en,dn_de,unc_dn_de,"
-            "dn_de_nu,unc_dn_de_nu,extraction_date\n"
-            "38,52,Sr,0,39,51,Y,3.0,0.1,0.01,4.0,0.4,2026-04-15\n",
-            encoding="utf-8",
-        )
-        return True
+    spectrum = get_antineutrino_spectrum("Sr90")
 
-    monkeypatch.setattr(
-        "snf_simulations.data.iaea._copy_packaged_spectrum_to_cache",
-        _fake_copy_packaged,
+    assert spectrum.shape[0] > 0
+    assert not cache_dir.exists()
+
+
+def test_get_antineutrino_spectrum_uses_site_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that spectra in a read-only site cache are used without a download."""
+    site_dir = tmp_path / "site"
+    site_dir.mkdir()
+    (site_dir / "140xe.csv").write_text(
+        "p_z,p_n,p_symbol,p_energy,d_z,d_n,d_symbol,bin_en,dn_de,unc_dn_de,"
+        "dn_de_nu,unc_dn_de_nu,extraction_date\n"
+        "54,86,Xe,0,55,85,Cs,3.0,0.1,0.01,4.0,0.4,2026-04-15\n",
+        encoding="utf-8",
     )
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("SNF_SIMULATIONS_SITE_CACHE_DIR", str(site_dir))
     monkeypatch.setattr(
         "snf_simulations.data.iaea._download_spectrum_data",
         lambda isotope_name: pytest.fail(f"Unexpected download for {isotope_name}"),
     )
 
-    spectrum = get_antineutrino_spectrum("Sr90")
+    spectrum = get_antineutrino_spectrum("Xe140")
 
     np.testing.assert_allclose(spectrum, np.array([[3.0, 4.0, 0.4]]))
-    assert (tmp_path / "90sr.csv").is_file()
+    assert not (tmp_path / "cache").exists()
+
+
+def test_get_antineutrino_branches(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test each parent level is loaded, and the file is only read once."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    cache_file = tmp_path / "90y.csv"
+    cache_file.write_text(
+        "p_z,p_n,p_symbol,p_energy,d_z,d_n,d_symbol,bin_en,dn_de,unc_dn_de,"
+        "dn_de_nu,unc_dn_de_nu,extraction_date\n"
+        "39,51,Y,0,40,50,Zr,0.0,0.5,0.01,0.5,0.05,2026-04-15\n"
+        "39,51,Y,0,40,50,Zr,1.0,0.5,0.01,0.5,0.05,2026-04-15\n"
+        "39,51,Y,0,40,50,Zr,2.0,0.0,0.01,0.0,0.05,2026-04-15\n"
+        "39,51,Y,682.01,40,50,Zr,0.0,1e-5,1e-7,1e-5,1e-6,2026-04-15\n"
+        "39,51,Y,682.01,40,50,Zr,1.0,0.0,1e-7,0.0,1e-6,2026-04-15\n",
+        encoding="utf-8",
+    )
+    profiling.enable()
+    profiling.reset()
+    try:
+        branches = get_antineutrino_branches("Y90")
+        ground = get_antineutrino_spectrum("Y90")
+        isomer = get_antineutrino_spectrum("Y90m")
+        counters = profiling.get_summary()["counters"]
+    finally:
+        profiling.disable()
+        profiling.reset()
+
+    assert counters["iaea.read_csv"] == 1
+    assert [branch.level_energy for branch in branches] == [0, 682.01]
+    assert branches[0].branching_fraction == pytest.approx(1)
+    assert branches[1].branching_fraction == pytest.approx(1e-5)
+    assert ground is branches[0].data
+    assert not ground.flags.writeable
+    np.testing.assert_allclose(isomer[:, 0], [0.0, 1.0])
+    assert len(get_antineutrino_spectrum("Y90n")) == 0
+
+    # A changed file is read again
+    cache_file.write_text(cache_file.read_text().replace("682.01", "0"))
+    assert len(get_antineutrino_branches("Y90")) == 1
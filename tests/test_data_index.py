@@ -0,0 +1,118 @@
+"""Unit tests for the nuclide eligibility index."""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.data import get_antineutrino_spectrum, get_nuclide_index
+from snf_simulations.data.cache import add_cache_file
+from snf_simulations.data.index import NuclideIndex
+from snf_simulations.data.synthetic import write_spectrum_file
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_nuclide_index_persisted(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test isotopes are only checked once, and the index is saved to the cache."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    index = get_nuclide_index()
+    assert get_nuclide_index() is index
+    assert index.filepath == tmp_path / "eligibility.json"
+
+    isotopes = ["Sr90", "Cs137", "Am241", "Y90m", "Sb124m"]
+    assert index.filter(isotopes) == ["Sr90", "Cs137", "Y90m"]
+    assert index.get_eligible() == {"90sr", "137cs", "90y:m"}
+    data = json.loads(index.filepath.read_text())
+    assert {"90sr", "137cs", "241am", "90y:m", "124sb:m"} <= set(data["nuclides"])
+    assert data["nuclides"]["241am"]["beta_minus"] is False
+    assert data["nuclides"]["241am"]["has_spectrum"] is None
+
+    # A new index loaded from the file doesn't need to check anything again
+    def fail(isotope: str) -> None:
+        msg = f"{isotope} should already be indexed"
+        raise AssertionError(msg)
+
+    monkeypatch.setattr("snf_simulations.data.index.get_isotope_properties", fail)
+    monkeypatch.setattr("snf_simulations.data.iaea.get_antineutrino_spectrum", fail)
+    loaded = NuclideIndex(index.filepath)
+    assert loaded.filter(["Am241", "137Cs", "Sr90", "Y90m"]) == [
+        "137Cs",
+        "Sr90",
+        "Y90m",
+    ]
+
+
+def test_nuclide_index_updated(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Test new and changed spectrum files update the index."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    index = get_nuclide_index()
+    (tmp_path / "source").mkdir()
+    source = write_spectrum_file(tmp_path / "source" / "140xe.csv", "Xe140", seed=1)
+    monkeypatch.setattr(
+        "snf_simulations.data.iaea._download_spectrum_data",
+        lambda nuclide: str(add_cache_file(f"{nuclide}.csv", source.read_bytes(), "")),
+    )
+
+    # Downloading a spectrum records all of its levels in the index,
+    # so only the decay modes need to be checked when filtering
+    get_antineutrino_spectrum("Xe140")
+    data = json.loads(index.filepath.read_text())
+    assert data["nuclides"]["140xe:m"]["has_spectrum"] is False
+    with monkeypatch.context() as m:
+        m.setattr(
+            "snf_simulations.data.iaea.get_antineutrino_spectrum",
+            lambda _: pytest.fail("Xe140 spectrum should already be indexed"),
+        )
+        assert index.filter(["Xe140"]) == ["Xe140"]
+    assert index.get_eligible() == {"140xe"}
+    assert NuclideIndex(index.filepath).get_eligible() == {"140xe"}
+
+    # A spectrum file changed after it was indexed is checked again when loaded
+    cache_file = tmp_path / "140xe.csv"
+    cache_file.write_text(cache_file.read_text().splitlines()[0] + "\n")
+    mtime_ns = cache_file.stat().st_mtime_ns + 1_000_000_000
+    os.utime(cache_file, ns=(mtime_ns, mtime_ns))
+    loaded = NuclideIndex(index.filepath)
+    assert loaded.get_eligible() == set()
+    monkeypatch.setattr(
+        "snf_simulations.data.index.get_isotope_properties",
+        lambda _: {"decay_modes": ["B-"]},
+    )
+    monkeypatch.setattr(
+        "snf_simulations.data.iaea.get_antineutrino_spectrum",
+        lambda _: np.empty((0, 3)),
+    )
+    assert loaded.filter(["Xe140"]) == []
+
+
+def test_nuclide_index_read_only_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test the index is still used if the cache directory can't be written."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+
+    def read_only(path: Path, data: bytes) -> None:
+        raise PermissionError(path)
+
+    monkeypatch.setattr("snf_simulations.data.index.atomic_write", read_only)
+    index = get_nuclide_index()
+    assert index.filter(["Sr90", "Am241"]) == ["Sr90"]
+    assert index.get_eligible() == {"90sr"}
+    assert not index.filepath.exists()
+
+
+def test_nuclide_index_damaged_file(tmp_path: Path) -> None:
+    """Test a damaged or old index file is ignored."""
+    filepath = tmp_path / "eligibility.json"
+    filepath.write_text("{not json")
+    assert NuclideIndex(filepath).get_eligible() == set()
+
+    filepath.write_text(json.dumps({"version": 0, "nuclides": {"90sr": {}}}))
+    assert repr(NuclideIndex(filepath)) == f"<NuclideIndex: 0 nuclides, {filepath}>"
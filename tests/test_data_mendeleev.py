@@ -157,3 +157,15 @@ def test_get_isotope_properties_cache(
     assert call_count == 2, (
         "mendeleev.isotope should not be called again for a cached isotope"
     )
+
+
+def test_get_isotope_properties_metastable() -> None:
+    """Test metastable states use the isomer table and the ground state mass."""
+    ground_state = get_isotope_properties("Rh106")
+    properties = get_isotope_properties("Rh106m")
+    assert properties["molar_mass"] == ground_state["molar_mass"]
+    assert properties["half_life"] == pytest.approx(131 / (365.2422 * 24 * 60))
+    assert properties["decay_modes"] == ["B-"]
+
+    with pytest.raises(ValueError, match="No decay data for metastable isotope"):
+        get_isotope_properties("Sb124m")
@@ -0,0 +1,52 @@
+"""Unit tests for the nuclide name registry."""
+
+import numpy as np
+import pytest
+
+from snf_simulations.data.nuclides import get_nuclide, get_zai, get_zais
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_get_zai() -> None:
+    """Test every accepted spelling of a name gives the same id."""
+    for name in ["Sr90", "90Sr", "sr90", "90sr", "SR 90", " SR  90  "]:
+        assert get_zai(name) == 380900
+    assert get_zai("Y  90") == 390900
+    assert get_zai("Y90m") == 390901
+    assert get_zai("Sn119n") == 501192
+    # FISPIN uses "A" for argon
+    assert get_zai("A  38") == get_zai("Ar38") == 180380
+
+    zais = get_zais(["U 235", "Pu241"])
+    assert zais.dtype == np.int64
+    np.testing.assert_array_equal(zais, [922350, 942410])
+
+    with pytest.raises(ValueError, match=r"Isotope format not recognized"):
+        get_zai("Ru-106")
+    with pytest.raises(ValueError, match=r"Isotope format not recognized"):
+        get_zai("Ru")
+    with pytest.raises(ValueError, match=r"Unknown element symbol"):
+        get_zai("Xx90")
+
+
+def test_get_nuclide() -> None:
+    """Test the standard names are given for a name or id."""
+    nuclide = get_nuclide("90Y")
+    assert (nuclide.z, nuclide.mass_number, nuclide.isomer) == (39, 90, 0)
+    assert nuclide.symbol == "Y"
+    assert nuclide.name == "Y90"
+    assert nuclide.iaea_name == "90y"
+
+    # Ids that haven't been seen as a name are added when first used
+    metastable = get_nuclide(451061)
+    assert metastable.name == "Rh106m"
+    assert metastable.iaea_name == "106rh"
+    assert get_nuclide("Rh106m") is metastable
+
+    with pytest.raises(ValueError, match=r"Invalid ZAI id"):
+        get_nuclide(1200900)
+    with pytest.raises(ValueError, match=r"Invalid ZAI id"):
+        get_nuclide(380903)
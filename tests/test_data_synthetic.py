@@ -0,0 +1,123 @@
+"""Unit tests for writing synthetic input files."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.cask import DEFAULT_ISOTOPES, Cask
+from snf_simulations.data.fispin import get_isotope_masses, load_tabqfile
+from snf_simulations.data.iaea import get_antineutrino_spectrum
+from snf_simulations.data.synthetic import (
+    get_synthetic_nuclides,
+    write_spectrum_file,
+    write_spectrum_files,
+    write_tabqfile,
+)
+from snf_simulations.scripts.command_line import main
+from snf_simulations.spec import Spectrum
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_get_synthetic_nuclides() -> None:
+    """Test the generated nuclides are distinct and start with the common ones."""
+    nuclides = get_synthetic_nuclides(2000)
+
+    assert len(nuclides) == 2000
+    assert len(set(nuclides)) == 2000
+    assert set(DEFAULT_ISOTOPES) <= set(nuclides[:20])
+    assert get_synthetic_nuclides(5) == nuclides[:5]
+
+
+def test_write_tabqfile(tmp_path: Path) -> None:
+    """Test synthetic .tbQ files can be parsed with the expected size."""
+    filepath = write_tabqfile(
+        tmp_path / "synthetic.tbQ", n_nuclides=500, n_steps=6, seed=1
+    )
+
+    contents = filepath.read_text()
+    assert "U 235" in contents
+    assert "Y  90" in contents
+    assert "A  38" in contents
+
+    time_dfs = load_tabqfile(filepath)
+    assert len(time_dfs) == 6
+    assert [time_str.split()[1] for time_str in time_dfs] == [
+        "HOURS",
+        "DAYS",
+        "YEARS",
+    ] * 2
+    for df in time_dfs.values():
+        assert len(df) == 500
+        assert df["ALL-NUC"].tolist() == get_synthetic_nuclides(500)
+
+    # The masses should decay over time
+    masses = [df["GRAMS"].to_numpy() for df in time_dfs.values()]
+    assert np.all(np.diff(masses, axis=0) <= 0)
+
+
+def test_write_tabqfile_cask(tmp_path: Path) -> None:
+    """Test a Cask can be created from a synthetic file."""
+    filepath = write_tabqfile(
+        tmp_path / "synthetic.tbQ", n_nuclides=100, n_steps=3, include_other=True
+    )
+
+    masses, cooling_time = get_isotope_masses(filepath)
+    assert "<other>" in masses
+    assert cooling_time == pytest.approx(1 / 365.2425)
+
+    cask = Cask.from_tabqfile(filepath, total_mass=1000)
+    assert set(cask.isotopes) == set(DEFAULT_ISOTOPES)
+
+
+def test_write_tabqfile_inputs(tmp_path: Path) -> None:
+    """Test that write_tabqfile validates its inputs."""
+    with pytest.raises(ValueError, match="must be positive values"):
+        write_tabqfile(tmp_path / "a.tbQ", n_nuclides=0)
+    with pytest.raises(ValueError, match="units must be from"):
+        write_tabqfile(tmp_path / "a.tbQ", units=["WEEKS"])
+
+
+def test_write_spectrum_file(tmp_path: Path) -> None:
+    """Test synthetic spectra have the IAEA format and a normalised shape."""
+    filepath = write_spectrum_file(
+        tmp_path / "90sr.csv", "Sr90", end_point=546, bin_width=1, n_branches=2
+    )
+
+    data = np.genfromtxt(filepath, delimiter=",", names=True, dtype=None)
+    assert set(data["p_symbol"].astype(str)) == {"Sr"}
+    assert set(data["d_symbol"].astype(str)) == {"Y"}
+    assert len(set(data["p_energy"])) == 2
+
+    ground_state = data[data["p_energy"] == 0]
+    assert ground_state["bin_en"][-1] == pytest.approx(546)
+    assert np.sum(ground_state["dn_de_nu"]) == pytest.approx(1)
+    assert ground_state["dn_de_nu"][0] == 0
+
+
+def test_write_spectrum_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test synthetic spectra are loaded from the cache directory."""
+    monkeypatch.setenv("SNF_SIMULATIONS_CACHE_DIR", str(tmp_path))
+    filepaths = write_spectrum_files(tmp_path, ["Sr90", "Xe140"], seed=2)
+
+    assert [path.name for path in filepaths] == ["90sr.csv", "140xe.csv"]
+    data = get_antineutrino_spectrum("Xe140")
+    assert len(data) == 1001
+    spec = Spectrum.from_isotope("Xe140")
+    assert spec.integrate() == pytest.approx(1, rel=1e-3)
+
+
+def test_main_synthetic(tmp_path: Path) -> None:
+    """Test the synthetic subcommand writes the requested files."""
+    output = tmp_path / "synthetic.tbQ"
+    main(["synthetic", "tbq", str(output), "--nuclides", "50", "--steps", "2"])
+    assert len(load_tabqfile(output)) == 2
+
+    main(["synthetic", "spectra", str(tmp_path / "spectra"), "Sr90", "Cs137"])
+    assert sorted(path.name for path in (tmp_path / "spectra").iterdir()) == [
+        "137cs.csv",
+        "90sr.csv",
+    ]
@@ -0,0 +1,135 @@
+"""Unit tests for the CaskEvolution class."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.cask import Cask
+from snf_simulations.data import get_isotope_properties
+from snf_simulations.evolution import CaskEvolution, TabqEvolution
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def _make_cask() -> Cask:
+    """Create a cask with short and long-lived isotopes and a decay chain."""
+    return Cask(
+        {"Sr90": 1000.0, "Cs137": 1000.0, "Ce144": 10.0, "Ru106": 10.0},
+        initial_cooling_time=0.5,
+        name="test",
+    )
+
+
+def test_get_spectrum() -> None:
+    """Test the exact spectra match the cask and the interpolation is accurate."""
+    cask = _make_cask()
+    evolution = CaskEvolution(cask, max_time=50, max_energy=6000, rtol=1e-3)
+    assert evolution.times[0] == 0.5
+    assert evolution.times[-1] == 50
+    assert np.all(np.diff(evolution.times) > 0)
+    assert repr(evolution) == (
+        f"<CaskEvolution: {cask!r}, {len(evolution.times)} times up to 50 years>"
+    )
+
+    spec = cask.get_total_spectrum(cooling_time=7.3)
+    spec.equalise(width=1, min_energy=0, max_energy=6000)
+    exact = evolution.get_spectrum(7.3, exact=True)
+    assert exact.name == "test"
+    assert np.allclose(exact.flux, spec.flux, rtol=1e-10)
+    assert np.allclose(exact.errors, spec.errors, rtol=1e-10)
+
+    # The interpolated spectra are within the tolerance at any time
+    cooling_times = np.linspace(0.5, 50, 200)
+    interpolated = evolution.get_spectra(cooling_times)
+    exact_spectra = evolution.get_spectra(cooling_times, exact=True)
+    assert list(interpolated) == list(exact_spectra)
+    for cooling_time, spec in interpolated.items():
+        expected = exact_spectra[cooling_time]
+        assert spec.energy is evolution.basis.energy
+        # Bins below a millionth of the peak are compared to the peak
+        atol = 1e-6 * expected.flux.max()
+        assert np.allclose(spec.flux, expected.flux, rtol=2e-3, atol=2e-3 * atol)
+        atol = 1e-6 * expected.errors.max()
+        assert np.allclose(spec.errors, expected.errors, rtol=2e-3, atol=2e-3 * atol)
+
+    # Times on the grid are exact
+    grid_time = float(evolution.times[5])
+    assert np.allclose(
+        evolution.get_spectrum(grid_time).flux,
+        evolution.get_spectrum(grid_time, exact=True).flux,
+        rtol=1e-12,
+    )
+
+
+def test_tolerance() -> None:
+    """Test a tighter tolerance uses more grid points."""
+    cask = _make_cask()
+    coarse = CaskEvolution(cask, max_time=20, max_energy=6000, rtol=1e-2)
+    fine = CaskEvolution(cask, max_time=20, max_energy=6000, rtol=1e-3)
+    assert len(fine.times) > len(coarse.times)
+
+    with pytest.raises(ValueError, match="Could not reach rtol=1e-06"):
+        CaskEvolution(cask, max_time=20, max_energy=6000, rtol=1e-6, max_points=40)
+
+
+def test_evolution_inputs() -> None:
+    """Test invalid inputs raise errors."""
+    cask = _make_cask()
+    with pytest.raises(ValueError, match="max_time must be greater than"):
+        CaskEvolution(cask, max_time=0.5)
+    with pytest.raises(ValueError, match="rtol must be a positive value"):
+        CaskEvolution(cask, max_time=10, rtol=0)
+
+    evolution = CaskEvolution(cask, max_time=10, max_energy=6000)
+    with pytest.raises(ValueError, match="cooling_times must be between"):
+        evolution.get_spectrum(0.1)
+    with pytest.raises(ValueError, match="cooling_times must be between"):
+        evolution.get_spectra([5, 11])
+
+
+def test_tabq_evolution(tmp_path: Path) -> None:
+    """Test the spectra from the tabulated masses match the decay model."""
+    # Write a file with masses following the same decay as the model.
+    times = [1.0, 2.0, 5.0, 10.0, 30.0]
+    initial_masses = {"Cs137": 3000.0, "Tc99": 500.0}
+    lines = []
+    for time in times:
+        lines += [f"*** TIME    {time:.3E} YEARS", "ALL-NUC      GRAMS"]
+        for isotope, mass in initial_masses.items():
+            half_life = get_isotope_properties(isotope)["half_life"]
+            decayed = mass * 0.5 ** ((time - times[0]) / half_life)
+            lines.append(f"{isotope.upper():<13}{decayed:.10E}")
+        lines += ["<other>      1500.0", "TOTAL        0.0"]
+    filepath = tmp_path / "series.tbQ"
+    filepath.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    evolution = TabqEvolution(filepath, total_mass=50.0, max_energy=3000)
+    assert len(evolution) == 5
+    assert repr(evolution) == f"<TabqEvolution: {evolution.cask!r}, 5 times>"
+    assert evolution.cask.name == "series"
+    assert evolution.cask.isotope_masses == pytest.approx({"Cs137": 30, "Tc99": 5})
+    np.testing.assert_allclose(evolution.cooling_times, times)
+
+    spectra = list(evolution.iter_spectra(batch_size=2))
+    assert [time for time, _ in spectra] == pytest.approx(times)
+    for time, spec in spectra:
+        expected = evolution.cask.get_total_spectrum(cooling_time=time)
+        expected.equalise(width=1, min_energy=0, max_energy=3000)
+        assert spec.name == "series"
+        np.testing.assert_allclose(spec.energy, expected.energy)
+        np.testing.assert_allclose(spec.flux, expected.flux, rtol=1e-8)
+        np.testing.assert_allclose(spec.errors, expected.errors, rtol=1e-8)
+
+    # The batch size doesn't change the results
+    for (_, batched), (_, single) in zip(
+        spectra, evolution.iter_spectra(batch_size=64), strict=True
+    ):
+        np.testing.assert_allclose(batched.flux, single.flux, rtol=1e-12)
+
+    with pytest.raises(ValueError, match="batch_size must be a positive value"):
+        next(evolution.iter_spectra(batch_size=0))
+    with pytest.raises(ValueError, match="No time sections found"):
+        TabqEvolution("ALL-NUC      GRAMS\n")
@@ -0,0 +1,122 @@
+"""Unit tests for the columnar and CSV export functions."""
+
+import sys
+from collections.abc import Iterator
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from snf_simulations.export import (
+    iter_csv_chunks,
+    iter_parquet_chunks,
+    read_spectra_table,
+    write_spectra_table,
+)
+from snf_simulations.spec import Spectrum
+
+# Suppress warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def _make_spectra() -> dict[float, Spectrum]:
+    """Create spectra for three cooling times, with different binnings."""
+    rng = np.random.default_rng(1)
+    energy = np.linspace(0, 100, 11)
+    return {
+        0.5: Spectrum(energy, rng.random(10), rng.random(10)),
+        5.0: Spectrum(energy, rng.random(10), rng.random(10)),
+        10.0: Spectrum(energy[:6], rng.random(5), rng.random(5)),
+    }
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_write_read_spectra_table(tmp_path: Path, suffix: str) -> None:
+    """Test spectra are written with one row group each and read back."""
+    pytest.importorskip("pyarrow")
+    spectra = _make_spectra()
+    filepath = write_spectra_table(tmp_path / f"scan{suffix}", spectra)
+    assert filepath == tmp_path / f"scan{suffix}"
+
+    loaded = read_spectra_table(filepath)
+    assert list(loaded) == [0.5, 5.0, 10.0]
+    for key, spec in spectra.items():
+        assert np.array_equal(loaded[key].energy, spec.energy)
+        assert np.array_equal(loaded[key].flux, spec.flux)
+        assert np.array_equal(loaded[key].errors, spec.errors)
+
+    loaded = read_spectra_table(filepath, keys=[5.0])
+    assert list(loaded) == [5.0]
+    with pytest.raises(ValueError, match="Spectra not found in .*: 1.0"):
+        read_spectra_table(filepath, keys=[1.0])
+
+
+def test_write_spectra_table_streaming(tmp_path: Path) -> None:
+    """Test spectra can be given as a generator and keyed by name."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    spectra = _make_spectra()
+    written = []
+
+    def _generate() -> Iterator[tuple[str, Spectrum]]:
+        for i, spec in enumerate(spectra.values()):
+            written.append(i)
+            yield f"cask{i}", spec
+
+    filepath = write_spectra_table(tmp_path / "casks.pq", _generate(), key_name="cask")
+    assert written == [0, 1, 2]
+    parquet_file = pq.ParquetFile(filepath)
+    assert parquet_file.num_row_groups == 3
+    assert parquet_file.schema_arrow.names == [
+        "cask",
+        "energy_min",
+        "energy_max",
+        "flux",
+        "errors",
+    ]
+    loaded = read_spectra_table(filepath, key_name="cask", keys=["cask2"])
+    assert np.array_equal(loaded["cask2"].flux, spectra[10.0].flux)
+
+
+def test_write_spectra_table_inputs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test invalid inputs and a missing pyarrow raise errors."""
+    pytest.importorskip("pyarrow")
+    with pytest.raises(ValueError, match="spectra must not be empty"):
+        write_spectra_table(tmp_path / "scan.parquet", {})
+    with pytest.raises(ValueError, match="Cannot tell the format"):
+        write_spectra_table(tmp_path / "scan.csv", _make_spectra())
+    with pytest.raises(ValueError, match="file_format must be 'parquet' or 'arrow'"):
+        write_spectra_table(tmp_path / "scan", _make_spectra(), file_format="csv")
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match=r"pip install snf_simulations\[parquet\]"):
+        write_spectra_table(tmp_path / "scan.parquet", _make_spectra())
+
+
+def test_iter_csv_chunks() -> None:
+    """Test the chunks join to give the full CSV text."""
+    df = pd.DataFrame({"energy": np.arange(25), "flux": np.linspace(0, 1, 25)})
+    chunks = list(iter_csv_chunks(df, chunk_rows=10))
+    assert len(chunks) == 3
+    assert chunks[0].startswith("energy,flux")
+    assert "".join(chunks) == df.to_csv(index=False)
+
+    # An empty table still gives the header
+    assert "".join(iter_csv_chunks(df.iloc[:0])) == "energy,flux\n"
+    with pytest.raises(ValueError, match="chunk_rows must be a positive value"):
+        next(iter_csv_chunks(df, chunk_rows=0))
+
+
+def test_iter_parquet_chunks() -> None:
+    """Test the chunks join to give a full Parquet file."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    df = pd.DataFrame({"energy": np.arange(25), "flux": np.linspace(0, 1, 25)})
+    chunks = list(iter_parquet_chunks(df, chunk_rows=10))
+    assert len(chunks) == 4
+    parquet_file = pq.ParquetFile(BytesIO(b"".join(chunks)))
+    assert parquet_file.num_row_groups == 3
+    assert parquet_file.read().to_pandas().equals(df)
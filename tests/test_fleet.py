@@ -0,0 +1,148 @@
+"""Unit tests for the CaskFleet class."""
+
+import numpy as np
+import pytest
+
+from snf_simulations.cask import Cask
+from snf_simulations.fleet import CaskFleet
+from snf_simulations.geometry import CaskShape
+from snf_simulations.physics import calculate_flux_at_distance
+from snf_simulations.spec import Spectrum
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def _get_spectrum(cask: Cask, cooling_time: float, scale: float = 1) -> Spectrum:
+    """Get the total spectrum of a cask equalised to the fleet binning."""
+    spec = cask.get_total_spectrum(cooling_time=cooling_time)
+    spec.equalise(width=1, min_energy=0, max_energy=6000)
+    return spec * scale
+
+
+def _make_fleet() -> tuple[CaskFleet, Cask, Cask]:
+    """Create a fleet with two compositions and three casks."""
+    composition1 = Cask({"Sr90": 1000.0, "Cs137": 1000.0}, initial_cooling_time=1.0)
+    composition2 = Cask({"Cs137": 100.0, "Ce144": 10.0}, initial_cooling_time=0.5)
+
+    fleet = CaskFleet(name="site", max_energy=6000)
+    fleet.add_composition("a", composition1)
+    fleet.add_composition("b", composition2, total_mass=1000.0)
+    fleet.add_cask("a", 4000.0, loading_time=0)
+    fleet.add_cask("a", 2000.0, loading_time=3, position=(5, 0, 0))
+    fleet.add_cask("b", 500.0, loading_time=1, position=(0, 5, 0))
+    return fleet, composition1, composition2
+
+
+def test_create_fleet() -> None:
+    """Test building a fleet and its string representation."""
+    fleet, _, _ = _make_fleet()
+
+    assert repr(fleet) == '<CaskFleet "site": 3 casks, 2 compositions>'
+    assert fleet.cask_names == ["cask0", "cask1", "cask2"]
+    assert fleet.positions.shape == (3, 3)
+    assert list(fleet.loading_times) == [0, 3, 1]
+
+    # Components shared between compositions are only included once
+    basis = fleet.get_basis()
+    assert basis.names == ["Sr90", "Cs137", "Sr90->Y90", "Ce144", "Ce144->Pr144"]
+    assert basis.flux.shape == (5, 6000)
+
+
+def test_get_total_spectra() -> None:
+    """Test the fleet spectra match summing the spectra of each cask."""
+    fleet, composition1, composition2 = _make_fleet()
+
+    spectra = fleet.get_total_spectra([0.5, 2.0, 5.0])
+    assert list(spectra) == [0.5, 2.0, 5.0]
+
+    # Only the first cask has been loaded at 0.5 years
+    expected = _get_spectrum(composition1, 1.5, scale=2)
+    assert np.allclose(spectra[0.5].flux, expected.flux)
+    assert np.allclose(spectra[0.5].errors, expected.errors)
+
+    expected = _get_spectrum(composition1, 3.0, scale=2)
+    expected += _get_spectrum(composition2, 1.5, scale=0.5)
+    assert np.allclose(spectra[2.0].flux, expected.flux)
+
+    expected = _get_spectrum(composition1, 6.0, scale=2)
+    expected += _get_spectrum(composition1, 3.0, scale=1)
+    expected += _get_spectrum(composition2, 4.5, scale=0.5)
+    assert np.allclose(spectra[5.0].flux, expected.flux)
+
+
+def test_get_detector_spectra() -> None:
+    """Test the detector spectra scale each cask by the inverse square distance."""
+    fleet, composition1, composition2 = _make_fleet()
+
+    detector_spectra = fleet.get_detector_spectra([[0, 0, 10], [5, 0, 20]], [5.0])
+    assert len(detector_spectra) == 2
+
+    distances = [
+        np.array([10, np.sqrt(125), np.sqrt(125)]),
+        np.array([np.sqrt(425), 20, np.sqrt(450)]),
+    ]
+    for spectra, cask_distances in zip(detector_spectra, distances, strict=True):
+        factors = calculate_flux_at_distance(1, cask_distances)
+        expected = _get_spectrum(composition1, 6.0, scale=2 * factors[0])
+        expected += _get_spectrum(composition1, 3.0, scale=factors[1])
+        expected += _get_spectrum(composition2, 4.5, scale=0.5 * factors[2])
+        assert np.allclose(spectra[5.0].flux, expected.flux)
+
+
+def test_fleet_inputs() -> None:
+    """Test that the CaskFleet validates its inputs."""
+    fleet, composition1, _ = _make_fleet()
+
+    with pytest.raises(ValueError, match="width must be a positive value"):
+        CaskFleet(width=0)
+    with pytest.raises(ValueError, match="Composition a is already in the fleet"):
+        fleet.add_composition("a", composition1)
+    with pytest.raises(ValueError, match="Composition c is not in the fleet"):
+        fleet.add_cask("c", 1000.0)
+    with pytest.raises(ValueError, match="Cask mass must be a positive value"):
+        fleet.add_cask("a", 0)
+    with pytest.raises(ValueError, match="position must have three coordinates"):
+        fleet.add_cask("a", 1000.0, position=(0, 0))
+    with pytest.raises(ValueError, match="cannot be at the same position as a source"):
+        fleet.get_detector_spectra([[0, 0, 0]], [1.0])
+    with pytest.raises(ValueError, match="does not have any casks"):
+        CaskFleet().get_total_spectra([1.0])
+
+
+def test_get_detector_spectra_extended() -> None:
+    """Test extended casks give the same spectra as point casks far away."""
+    fleet, _, _ = _make_fleet()
+    shape = CaskShape(radius=1.0, height=5.0)
+
+    point = fleet.get_detector_spectra([[0, 500, 0]], [5.0])[0][5.0]
+    extended = fleet.get_detector_spectra([[0, 500, 0]], [5.0], cask_shape=shape)
+    assert np.allclose(extended[0][5.0].flux, point.flux, rtol=1e-4)
+
+
+def test_fleet_float32() -> None:
+    """Test storing the fleet spectra in single precision."""
+    fleet, composition1, composition2 = _make_fleet()
+    fleet32 = CaskFleet(max_energy=6000, dtype=np.float32)
+    fleet32.add_composition("a", composition1)
+    fleet32.add_composition("b", composition2, total_mass=1000.0)
+    for i in range(3):
+        fleet32.add_cask(
+            fleet.cask_compositions[i],
+            fleet.cask_masses[i],
+            loading_time=fleet.loading_times[i],
+        )
+    assert fleet32.get_basis().flux.dtype == np.float32
+
+    spectra = fleet.get_total_spectra([2.0, 5.0])
+    spectra32 = fleet32.get_total_spectra([2.0, 5.0])
+    for time, spec in spectra.items():
+        assert spectra32[time].flux.dtype == np.float32
+        assert np.allclose(spectra32[time].flux, spec.flux, rtol=1e-6)
+        assert np.allclose(spectra32[time].errors, spec.errors, rtol=1e-6)
+    # All the fleet spectra share the basis energy array
+    assert spectra32[2.0].energy is spectra32[5.0].energy
+
+    with pytest.raises(ValueError, match="dtype must be a floating point type"):
+        CaskFleet(dtype=int)
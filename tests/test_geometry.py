@@ -0,0 +1,85 @@
+"""Unit tests for geometric flux factors."""
+
+import numpy as np
+import pytest
+
+from snf_simulations.geometry import CaskShape, _get_quadrature, get_geometry_matrix
+from snf_simulations.physics import calculate_flux_at_distance
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_get_quadrature() -> None:
+    """Test the quadrature points fill the cylinder and are cached."""
+    shape = CaskShape(radius=1.0, height=4.0)
+
+    points, weights = _get_quadrature(shape, 4, 8, 4)
+    assert points.shape == (128, 3)
+    assert weights.sum() == pytest.approx(1)
+    assert np.all(np.linalg.norm(points[:, :2], axis=1) <= 1)
+    assert np.all(np.abs(points[:, 2]) <= 2)
+    # The centroid should be at the centre, and the mean squared radius
+    # should match a uniform cylinder (R^2 / 2)
+    assert np.allclose(weights @ points, 0)
+    assert weights @ np.sum(points[:, :2] ** 2, axis=1) == pytest.approx(0.5)
+
+    assert _get_quadrature(shape, 4, 8, 4)[0] is points
+    assert not points.flags.writeable
+
+
+def test_get_geometry_matrix_point() -> None:
+    """Test point sources follow the inverse square law."""
+    sources = np.array([[0, 0, 0], [10, 0, 0]])
+    detectors = np.array([[0, 40, 0], [10, 0, 20], [0, 0, 5]])
+
+    matrix = get_geometry_matrix(sources, detectors)
+
+    assert matrix.shape == (3, 2)
+    distances = np.linalg.norm(detectors[:, None] - sources[None], axis=2)
+    assert np.allclose(matrix, calculate_flux_at_distance(1, distances))
+
+
+def test_get_geometry_matrix_extended() -> None:
+    """Test extended casks match a point source far away and sampling close in."""
+    shape = CaskShape(radius=1.0, height=5.0)
+    sources = np.array([[0, 0, 0]])
+
+    # Far away the cask looks like a point
+    far = get_geometry_matrix(sources, [[200, 0, 0]], shape=shape)
+    assert far[0, 0] == pytest.approx(calculate_flux_at_distance(1, 200), rel=1e-4)
+
+    # Close in, compare to averaging over random points in the cylinder
+    rng = np.random.default_rng(42)
+    n = 200000
+    radius = np.sqrt(rng.random(n))
+    angle = rng.random(n) * 2 * np.pi
+    height = (rng.random(n) - 0.5) * 5
+    points = np.stack([radius * np.cos(angle), radius * np.sin(angle), height], axis=1)
+    detector = np.array([3, 0, 1])
+    expected = np.mean(
+        calculate_flux_at_distance(1, np.linalg.norm(detector - points, axis=1))
+    )
+    close = get_geometry_matrix(sources, [detector], shape=shape)
+    assert close[0, 0] == pytest.approx(expected, rel=5e-3)
+    assert close[0, 0] != pytest.approx(
+        calculate_flux_at_distance(1, np.linalg.norm(detector)), rel=5e-3
+    )
+
+
+def test_get_geometry_matrix_inputs() -> None:
+    """Test that get_geometry_matrix validates its inputs."""
+    shape = CaskShape(radius=1.0, height=5.0)
+    sources = np.array([[0, 0, 0]])
+
+    with pytest.raises(ValueError, match="detector_positions must have shape"):
+        get_geometry_matrix(sources, [1, 2, 3])
+    with pytest.raises(ValueError, match="same position as a source"):
+        get_geometry_matrix(sources, [[0, 0, 0]])
+    with pytest.raises(ValueError, match="cannot be inside a cask"):
+        get_geometry_matrix(sources, [[0.5, 0, 2]], shape=shape)
+    with pytest.raises(ValueError, match="radius and height must be positive"):
+        get_geometry_matrix(sources, [[5, 0, 0]], shape=CaskShape(0, 1))
+    with pytest.raises(ValueError, match="quadrature points must be a positive"):
+        get_geometry_matrix(sources, [[5, 0, 0]], shape=shape, n_axial=0)
@@ -0,0 +1,86 @@
+"""Unit tests for calculating spectra in parallel processes."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations.cask import Cask
+from snf_simulations.parallel import (
+    _read_shared_spectra,
+    _write_shared_spectra,
+    get_total_spectra,
+)
+from snf_simulations.spec import Spectrum
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+
+
+def _make_casks() -> list[Cask]:
+    """Create a few small casks with different compositions."""
+    return [
+        Cask({"Sr90": 1000.0, "Cs137": 500.0}, name="cask1"),
+        Cask({"Ce144": 200.0}, initial_cooling_time=1.0, name="cask2"),
+        Cask({"Kr88": 1.0, "Cs137": 100.0}, name="cask3"),
+    ]
+
+
+def test_shared_spectra_round_trip(tmp_path: Path) -> None:
+    """Test spectra packed into the shared file are read back unchanged."""
+    spectra = {
+        "Sr90": Spectrum.from_isotope("Sr90"),
+        "Cs137": Spectrum.from_isotope("Cs137"),
+    }
+    filepath = tmp_path / "spectra.npy"
+
+    layout = _write_shared_spectra(spectra, filepath)
+    shared = _read_shared_spectra(filepath, layout)
+
+    assert shared == spectra
+    assert not shared["Sr90"].flux.flags.writeable, "Shared data should be read-only"
+
+
+def test_get_total_spectra_serial() -> None:
+    """Test the combined spectra match summing each cask spectrum directly."""
+    casks = _make_casks()
+    offsets = [0.0, 2.0, 5.0]
+
+    spectra = get_total_spectra(
+        casks, [1.0, 10.0], cooling_offsets=offsets, max_energy=6000, max_workers=1
+    )
+
+    assert list(spectra) == [1.0, 10.0]
+    for cooling_time, total in spectra.items():
+        expected = None
+        for cask, offset in zip(casks, offsets, strict=True):
+            spec = cask.get_total_spectrum(cooling_time=cooling_time + offset)
+            spec.equalise(width=1, min_energy=0, max_energy=6000)
+            expected = spec if expected is None else expected + spec
+        assert expected is not None
+        assert np.array_equal(total.energy, expected.energy)
+        assert np.array_equal(total.flux, expected.flux)
+        assert np.array_equal(total.errors, expected.errors)
+
+
+def test_get_total_spectra_parallel_matches_serial() -> None:
+    """Test the results don't depend on the number of workers or chunk size."""
+    casks = _make_casks()
+    cooling_times = [1.0, 5.0, 20.0]
+
+    serial = get_total_spectra(casks, cooling_times, max_workers=1)
+    parallel = get_total_spectra(casks, cooling_times, max_workers=2, chunksize=1)
+
+    assert serial == parallel
+
+
+def test_get_total_spectra_inputs() -> None:
+    """Test that get_total_spectra validates its inputs."""
+    casks = _make_casks()
+
+    with pytest.raises(ValueError, match="casks must not be empty"):
+        get_total_spectra([], [1.0])
+    with pytest.raises(ValueError, match="cooling_offsets must have the same length"):
+        get_total_spectra(casks, [1.0], cooling_offsets=[0.0])
+    with pytest.raises(ValueError, match="max_workers must be a positive value"):
+        get_total_spectra(casks, [1.0], max_workers=0)
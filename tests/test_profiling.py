@@ -0,0 +1,129 @@
+"""Unit tests for the profiling timers and counters."""
+
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from snf_simulations import profiling
+from snf_simulations.scripts.command_line import main
+from snf_simulations.spec import Spectrum
+
+# Suppress warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+@pytest.fixture(autouse=True)
+def _reset_profiling() -> Iterator[None]:
+    """Clear and disable profiling before and after each test."""
+    profiling.disable()
+    profiling.reset()
+    yield  # The test runs here
+    profiling.disable()
+    profiling.reset()
+
+
+def _make_spectrum() -> Spectrum:
+    """Create a simple spectrum for testing."""
+    energy = np.linspace(0, 100, 11)
+    flux = np.arange(10, dtype=float)
+    return Spectrum(energy, flux, np.sqrt(flux), name="test")
+
+
+def test_disabled() -> None:
+    """Test nothing is recorded while profiling is disabled."""
+    assert not profiling.is_enabled()
+    spec = _make_spectrum()
+    spec.equalise(width=5)
+    with profiling.timer("stage"):
+        pass
+    profiling.count("counter")
+    assert profiling.get_summary() == {"stages": {}, "counters": {}}
+
+
+def test_enabled() -> None:
+    """Test timers, counters and the instrumented stages."""
+    profiling.enable()
+    spec = _make_spectrum()
+    spec.equalise(width=5)
+    spec.equalise(width=10)
+    spec.sample(10, seed=1)
+    with profiling.timer("stage"):
+        pass
+    profiling.count("counter")
+    profiling.count("counter", 2)
+
+    summary = profiling.get_summary()
+    assert summary["stages"]["Spectrum.equalise"]["calls"] == 2
+    assert summary["stages"]["Spectrum.sample"]["calls"] == 1
+    assert summary["stages"]["stage"]["calls"] == 1
+    stage = summary["stages"]["Spectrum.equalise"]
+    assert stage["min"] <= stage["mean"] <= stage["max"]
+    assert stage["total"] == pytest.approx(2 * stage["mean"])
+    assert summary["counters"] == {"counter": 3}
+
+    table = profiling.format_summary()
+    assert "Spectrum.equalise" in table
+    assert "counter" in table
+
+    # Errors are still timed, and then raised as normal.
+    with pytest.raises(ValueError, match="width must be a positive value"):
+        spec.equalise(width=0)
+    assert profiling.get_summary()["stages"]["Spectrum.equalise"]["calls"] == 3
+
+    # Disabling keeps the existing records, and reset clears them.
+    profiling.disable()
+    spec.equalise(width=10)
+    assert profiling.get_summary()["stages"]["Spectrum.equalise"]["calls"] == 3
+    profiling.reset()
+    assert profiling.get_summary() == {"stages": {}, "counters": {}}
+
+
+def test_write_report(tmp_path: Path) -> None:
+    """Test writing the summary and trace event reports."""
+    profiling.enable()
+    spec = _make_spectrum()
+    spec.equalise(width=5)
+    profiling.count("counter")
+
+    profiling.write_report(tmp_path / "summary.json")
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary == profiling.get_summary()
+
+    profiling.write_report(tmp_path / "trace.json", trace=True)
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    assert len(trace["traceEvents"]) == 1
+    event = trace["traceEvents"][0]
+    assert event["name"] == "Spectrum.equalise"
+    assert event["ph"] == "X"
+    assert event["ts"] >= 0
+    assert event["dur"] > 0
+    assert trace["otherData"]["counters"] == {"counter": 1}
+
+
+def test_main_profile(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """Test the --profile command line options."""
+    output = tmp_path / "synthetic.tbQ"
+    trace = tmp_path / "trace.json"
+    main(
+        [
+            "--profile",
+            "--profile-output",
+            str(trace),
+            "synthetic",
+            "tbq",
+            str(output),
+            "--nuclides",
+            "10",
+            "--steps",
+            "2",
+        ]
+    )
+    captured = capsys.readouterr()
+    assert f"Saved to {output}" in captured.out
+    assert "Stage" in captured.err
+    assert "traceEvents" in json.loads(trace.read_text())
+    assert not profiling.is_enabled()
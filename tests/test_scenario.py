@@ -0,0 +1,189 @@
+"""Unit tests for running scenario files in batch mode."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from snf_simulations.data import get_example_tbq_path
+from snf_simulations.export import read_spectra_table
+from snf_simulations.scenario import get_scenario_key, load_scenario, run_scenario
+from snf_simulations.scripts.command_line import main
+from snf_simulations.spec import Spectrum
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+EXAMPLE_SCENARIO = """
+name = "test_site"
+
+[simulation]
+times = [0.5, 5]
+
+[[casks]]
+name = "recent"
+mass = 10000
+count = 2
+
+[[casks]]
+name = "older"
+mass = 10000
+cooling_time = 10
+
+[[detectors]]
+name = "prototype"
+volume = 1.2
+distance = 40
+efficiency = 0.3
+
+[output]
+directory = "results"
+summary = "summary.json"
+"""
+
+
+def _write_scenario(tmp_path: Path, content: str = EXAMPLE_SCENARIO) -> Path:
+    """Write a scenario file to a temporary directory."""
+    filepath = tmp_path / "scenario.toml"
+    filepath.write_text(content, encoding="utf-8")
+    return filepath
+
+
+def test_load_scenario(tmp_path: Path) -> None:
+    """Test loading a scenario fills in default values and resolves paths."""
+    scenario = load_scenario(_write_scenario(tmp_path))
+
+    assert scenario["name"] == "test_site"
+    assert scenario["simulation"] == {
+        "times": [0.5, 5.0],
+        "width": 1.0,
+        "max_energy": 6000.0,
+    }
+    assert len(scenario["casks"]) == 2
+    assert scenario["casks"][0]["file"] == str(get_example_tbq_path())
+    assert scenario["casks"][0]["count"] == 2
+    assert scenario["casks"][1]["count"] == 1
+    assert scenario["casks"][1]["cooling_time"] == 10.0
+    assert scenario["detectors"][0]["proton_density"] == 4.6e22
+    assert scenario["output"]["directory"] == str(tmp_path.resolve() / "results")
+    assert scenario["output"]["spectra"]
+    assert not scenario["output"]["plot"]
+
+
+def test_load_scenario_invalid(tmp_path: Path) -> None:
+    """Test invalid scenario files raise errors."""
+    with pytest.raises(ValueError, match="at least one simulation time"):
+        load_scenario(_write_scenario(tmp_path, "[[casks]]\nmass = 1\n"))
+
+    with pytest.raises(ValueError, match="at least one cask"):
+        load_scenario(_write_scenario(tmp_path, "[simulation]\ntimes = [1]\n"))
+
+    with pytest.raises(ValueError, match="must have a mass"):
+        load_scenario(
+            _write_scenario(tmp_path, "[simulation]\ntimes = [1]\n[[casks]]\n")
+        )
+
+    with pytest.raises(ValueError, match="detector in the scenario must have a volume"):
+        load_scenario(
+            _write_scenario(
+                tmp_path,
+                "[simulation]\ntimes = [1]\n[[casks]]\nmass = 1\n"
+                "[[detectors]]\ndistance = 40\n",
+            )
+        )
+
+    with pytest.raises(ValueError, match=r"Unknown keys in scenario \[casks\]: nass"):
+        load_scenario(
+            _write_scenario(
+                tmp_path, "[simulation]\ntimes = [1]\n[[casks]]\nmass = 1\nnass = 2\n"
+            )
+        )
+
+
+def test_get_scenario_key(tmp_path: Path) -> None:
+    """Test the scenario key changes when the inputs change."""
+    scenario = load_scenario(_write_scenario(tmp_path))
+    key = get_scenario_key(scenario)
+
+    assert key == get_scenario_key(load_scenario(_write_scenario(tmp_path)))
+
+    scenario["casks"][0]["mass"] = 20000
+    assert get_scenario_key(scenario) != key
+
+
+def test_run_scenario(tmp_path: Path) -> None:
+    """Test running a scenario writes the outputs and returns a summary."""
+    summary = run_scenario(_write_scenario(tmp_path))
+
+    assert summary["scenario"] == "test_site"
+    assert not summary["cached"]
+    assert [result["cooling_time_yrs"] for result in summary["results"]] == [0.5, 5.0]
+    for result in summary["results"]:
+        detector_result = result["detectors"]["prototype"]
+        assert detector_result["distance_m"] == 40
+        assert detector_result["flux_cm-2_s-1"] > 0
+        assert detector_result["event_rate_s-1"] > 0
+
+    output_dir = tmp_path / "results"
+    assert sorted(Path(path).name for path in summary["outputs"]) == [
+        "summary.json",
+        "test_site_0.5y.csv",
+        "test_site_5y.csv",
+    ]
+    spec = Spectrum.from_file(output_dir / "test_site_0.5y.csv")
+    assert spec.energy[-1] == 6000
+    saved_summary = json.loads((output_dir / "summary.json").read_text())
+    assert saved_summary["results"] == summary["results"]
+
+
+def test_run_scenario_parquet(tmp_path: Path) -> None:
+    """Test writing the spectra at every time to a single Parquet file."""
+    pytest.importorskip("pyarrow")
+    summary = run_scenario(
+        _write_scenario(tmp_path, EXAMPLE_SCENARIO + 'format = "parquet"\n')
+    )
+
+    output_dir = tmp_path / "results"
+    assert sorted(Path(path).name for path in summary["outputs"]) == [
+        "summary.json",
+        "test_site_spectra.parquet",
+    ]
+    spectra = read_spectra_table(output_dir / "test_site_spectra.parquet")
+    assert list(spectra) == [0.5, 5.0]
+    assert spectra[0.5].integrate(lower_energy=1806) == pytest.approx(
+        summary["results"][0]["flux_above_threshold_s-1"]
+    )
+
+    with pytest.raises(ValueError, match="Output format must be one of"):
+        load_scenario(_write_scenario(tmp_path, EXAMPLE_SCENARIO + 'format = "h5"\n'))
+
+
+def test_run_scenario_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test re-running an unchanged scenario uses the cached results."""
+    filepath = _write_scenario(tmp_path)
+    summary = run_scenario(filepath)
+
+    monkeypatch.setattr(
+        "snf_simulations.scenario._create_cask",
+        lambda config: pytest.fail("Unexpected recalculation"),
+    )
+    cached_summary = run_scenario(filepath)
+    assert cached_summary["cached"]
+    assert cached_summary["results"] == summary["results"]
+
+    # Removing an output should force a re-run
+    Path(summary["outputs"][0]).unlink()
+    with pytest.raises(pytest.fail.Exception, match="Unexpected recalculation"):
+        run_scenario(filepath)
+
+
+def test_main_batch(tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+    """Test the batch subcommand prints only a JSON summary to stdout."""
+    filepath = _write_scenario(tmp_path)
+
+    main(["batch", str(filepath), "--no-cache"])
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["scenario"] == "test_site"
+    assert len(summary["results"]) == 2
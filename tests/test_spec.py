@@ -1,5 +1,7 @@
 """Unit tests for loading antineutrino spectra data."""
 
+import pickle
+from copy import deepcopy
 from pathlib import Path
 
 import numpy as np
@@ -7,6 +9,7 @@ import pytest
 
 from snf_simulations.cask import DEFAULT_ISOTOPES
 from snf_simulations.spec import Spectrum
+from snf_simulations.utils import sample_histogram
 
 # Suppress assert warnings from ruff
 # ruff: noqa: S101  # asserts
@@ -554,6 +557,65 @@ def test_integrate_outside_range() -> None:
     )
 
 
+def test_integrate_many() -> None:
+    """Test integrating over many ranges at once matches integrate."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1])
+
+    lower = np.array([-1.0, 0.0, 0.25, 1.0, 2.5, 7.0, 9.0])
+    upper = np.array([0.5, 8.0, 0.75, 6.0, 20.0, 8.0, 10.0])
+    integrals = spec.integrate_many(lower, upper)
+    assert integrals.shape == lower.shape
+    expected = [spec.integrate(a, b) for a, b in zip(lower, upper, strict=True)]
+    assert np.allclose(integrals, expected)
+
+    # Compare to the overlap of each bin with the ranges
+    upper_edges = np.minimum(energy[1:], upper[:, None])
+    lower_edges = np.maximum(energy[:-1], lower[:, None])
+    overlap = np.clip(upper_edges - lower_edges, 0, None)
+    assert np.allclose(integrals, overlap @ flux[:-1])
+
+    # Scalar bounds are broadcast
+    thresholds = np.linspace(0, 7, 8)
+    integrals = spec.integrate_many(thresholds, energy[-1])
+    expected = [spec.integrate(lower_energy=t) for t in thresholds]
+    assert np.allclose(integrals, expected)
+
+    with pytest.raises(
+        ValueError, match="upper_energies must be greater than lower_energies"
+    ):
+        spec.integrate_many([0, 2], [1, 2])
+
+
+def test_integrate_cache() -> None:
+    """Test the cached cumulative integral is updated when the spectrum changes."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1])
+    assert np.isclose(spec.integrate(), np.sum(flux[:-1] * np.diff(energy)))
+
+    spec.equalise(width=0.5, min_energy=0, max_energy=16)
+    assert np.isclose(spec.integrate(), np.sum(spec.flux * 0.5))
+    assert spec.integrate(8, 16) == 0
+
+    spec.flux = spec.flux * 2
+    assert np.isclose(spec.integrate(), np.sum(spec.flux * 0.5))
+
+    # Changing the arrays in place is also picked up
+    spec = Spectrum(np.array([0.0, 1.0, 2.0]), np.ones(2), np.zeros(2))
+    assert spec.integrate() == 2
+    spec.flux *= 10
+    assert spec.integrate() == 20
+    spec.energy[-1] = 3
+    assert spec.integrate() == 30
+    np.testing.assert_array_equal(spec.integrate_many(0, [1, 3]), [10, 30])
+
+    # The integral of a frozen spectrum is only calculated once
+    frozen = spec.freeze()
+    assert frozen.integrate() == 30
+    assert frozen._cumulative is not None  # noqa: SLF001
+    assert frozen.integrate(1, 3) == 20
+
+
 def test_integrate_invalid_range() -> None:
     """Test that invalid integration ranges raise ValueError."""
     energy, flux, errors = _mock_data()
@@ -683,3 +745,146 @@ def test_from_file() -> None:
 
     # Clean up the file after testing
     filename.unlink()
+
+
+def test_equalise_shared_energy() -> None:
+    """Test that spectra equalised to the same binning share one energy array."""
+    energy, flux, errors = _mock_data()
+    spec1 = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1])
+    spec2 = Spectrum(energy=energy, flux=flux[:-1] * 2, errors=errors[:-1] * 2)
+    spec1.equalise(width=1, min_energy=0, max_energy=8)
+    spec2.equalise(width=1, min_energy=0, max_energy=8)
+    assert spec1.energy is spec2.energy
+    assert not spec1.energy.flags.writeable
+
+    # Scaled and summed spectra keep the same array
+    assert (spec1 * 2).energy is spec1.energy
+    assert (spec1 + spec2).energy is spec1.energy
+
+
+def test_astype() -> None:
+    """Test storing the flux and errors in single precision."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1], name="test")
+    spec32 = spec.astype(np.float32)
+    assert spec32.flux.dtype == np.float32
+    assert spec32.errors.dtype == np.float32
+    assert spec32.energy is spec.energy
+    assert spec32.name == "test"
+    assert spec.flux.dtype == np.float64
+
+    # Operations keep the storage type, but calculate in double precision.
+    scaled = spec32 * 1e20
+    assert scaled.flux.dtype == np.float32
+    assert np.allclose(scaled.flux, spec.flux * 1e20, rtol=1e-7)
+    summed = spec32 + spec32
+    assert summed.flux.dtype == np.float32
+    assert (spec32 + spec).flux.dtype == np.float64
+    spec32.equalise(width=1)
+    spec.equalise(width=1)
+    assert spec32.flux.dtype == np.float32
+    assert spec32.integrate() == pytest.approx(spec.integrate(), rel=1e-6)
+
+    with pytest.raises(ValueError, match="dtype must be a floating point type"):
+        spec.astype(np.int32)
+
+
+def test_frozen() -> None:
+    """Test frozen spectra can't be changed."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1], name="test")
+    assert not spec.frozen
+    frozen = spec.freeze()
+    assert frozen.frozen
+    assert frozen.freeze() is frozen
+    assert frozen == spec
+    assert hash(frozen) == hash(spec)
+    assert hash(frozen) == hash(frozen)
+
+    # The arrays are read-only copies, so changing the originals has no effect
+    assert frozen.flux is not spec.flux
+    spec.flux[0] = 100
+    assert frozen.flux[0] == 10
+    with pytest.raises(ValueError, match="read-only"):
+        frozen.flux[0] = 100
+    for attribute in ["energy", "flux", "errors", "name"]:
+        with pytest.raises(AttributeError, match=f"Cannot set {attribute}"):
+            setattr(frozen, attribute, None)
+    with pytest.raises(ValueError, match="use equalised instead"):
+        frozen.equalise(width=1)
+
+    # Operations create new spectra
+    equalised = frozen.equalised(width=1, min_energy=0, max_energy=8)
+    assert equalised.frozen
+    assert len(equalised.flux) == 8
+    assert len(frozen.flux) == len(flux) - 1
+    scaled = frozen * 2
+    assert not scaled.frozen
+    scaled.equalise(width=1)
+    assert not (frozen + frozen).frozen
+    assert frozen.astype(np.float32).frozen
+
+    # Frozen spectra are shared rather than copied
+    assert deepcopy(frozen) is frozen
+    assert deepcopy(spec) is not spec
+    assert deepcopy(spec) == spec
+    unpickled = pickle.loads(pickle.dumps(frozen))  # noqa: S301
+    assert unpickled == frozen
+    assert unpickled.frozen
+    assert not unpickled.flux.flags.writeable
+
+
+def test_equalised() -> None:
+    """Test equalised returns a new spectrum matching equalise."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1], name="test")
+    equalised = spec.equalised(width=0.5, min_energy=0, max_energy=10)
+    assert not equalised.frozen
+    assert len(spec.flux) == len(flux) - 1
+
+    spec.equalise(width=0.5, min_energy=0, max_energy=10)
+    assert equalised == spec
+
+
+def test_sample_cached_cdf() -> None:
+    """Test sampling with the cached CDF matches sampling the histogram."""
+    energy, flux, errors = _mock_data()
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1]).freeze()
+    samples = spec.sample(100, seed=1)
+    assert np.array_equal(samples, spec.sample(100, seed=1))
+    assert np.array_equal(samples, sample_histogram(energy, flux[:-1], 100, seed=1))
+    assert spec._cdf is not None  # noqa: SLF001
+
+    # Replacing the flux updates the CDF
+    spec = Spectrum(energy=energy, flux=flux[:-1], errors=errors[:-1])
+    spec.sample(10, seed=1)
+    spec.flux = np.zeros_like(spec.flux)
+    with pytest.raises(ValueError, match="zero total area"):
+        spec.sample(10)
+
+    # Changing the flux in place is also picked up
+    spec = Spectrum(np.array([0.0, 1.0, 2.0]), np.ones(2), np.zeros(2))
+    assert spec.sample(100, seed=1).max() > 1
+    spec.flux[1] = 0
+    assert spec.sample(100, seed=1).max() < 1
+
+
+def test_write_npz(tmp_path: Path) -> None:
+    """Test writing and loading a spectrum without any loss."""
+    rng = np.random.default_rng(1)
+    energy = np.cumsum(rng.uniform(0.1, 1, 11))
+    spec = Spectrum(energy, rng.random(10), rng.random(10), name="test spectrum")
+
+    filepath = spec.write_npz(tmp_path / "spec")
+    assert filepath == tmp_path / "spec.npz"
+    loaded = Spectrum.from_npz(filepath)
+    assert loaded == spec
+    assert not loaded.frozen
+    assert Spectrum.from_npz(filepath, frozen=True).frozen
+
+    # Unnamed spectra and single precision values
+    spec = Spectrum(energy, rng.random(10), rng.random(10)).astype(np.float32)
+    loaded = Spectrum.from_npz(spec.write_npz(str(tmp_path / "unnamed")))
+    assert loaded == spec
+    assert loaded.name is None
+    assert loaded.flux.dtype == np.float32
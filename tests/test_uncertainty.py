@@ -0,0 +1,157 @@
+"""Unit tests for Monte Carlo uncertainty propagation."""
+
+import numpy as np
+import pytest
+
+from snf_simulations.cask import Cask
+from snf_simulations.uncertainty import (
+    UncertaintyResult,
+    _get_interpolation_weights,
+    propagate_uncertainties,
+)
+from snf_simulations.utils import linear_interpolate_with_errors
+
+# Suppress assert warnings from ruff
+# ruff: noqa: S101  # asserts
+# ruff: noqa: PLR2004  # magic numbers
+
+
+def test_get_interpolation_weights() -> None:
+    """Test the interpolation weights reproduce linear_interpolate_with_errors."""
+    original_bins = np.array([0.0, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0])
+    original_content = np.array([10.0, 20.0, 30.0, 40.0, 50.0, 60.0])
+    new_bins = np.arange(-1.0, 10.0, 0.5)
+
+    expected, _ = linear_interpolate_with_errors(
+        original_bins, original_content, np.ones(6), new_bins
+    )
+    lower, upper, weight_lower, weight_upper = _get_interpolation_weights(
+        original_bins, new_bins
+    )
+    content = (
+        original_content[lower] * weight_lower + original_content[upper] * weight_upper
+    )
+
+    assert np.allclose(content, expected)
+
+
+def test_propagate_uncertainties_no_variation() -> None:
+    """Test the mean matches the nominal spectrum if no inputs are varied."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 1000.0}, initial_cooling_time=10.0)
+
+    results = propagate_uncertainties(
+        cask, cooling_times=[10.0, 20.0], n_variations=5, vary_spectra=False
+    )
+
+    assert set(results) == {10.0, 20.0}
+    for cooling_time, result in results.items():
+        assert isinstance(result, UncertaintyResult)
+        assert result.n_variations == 5
+        expected = cask.get_total_spectrum(cooling_time=cooling_time)
+        expected.equalise(width=1, min_energy=0, max_energy=result.spectrum.energy[-1])
+        assert np.allclose(result.spectrum.energy, expected.energy)
+        assert np.allclose(result.spectrum.flux, expected.flux)
+        assert np.allclose(result.spectrum.errors, 0)
+        assert np.allclose(result.covariance, 0)
+
+
+def test_propagate_uncertainties_mass() -> None:
+    """Test a relative mass uncertainty is propagated to the total flux."""
+    cask = Cask({"Cs137": 1000.0}, initial_cooling_time=0.0)
+
+    results = propagate_uncertainties(
+        cask,
+        cooling_times=[1.0],
+        n_variations=2000,
+        mass_uncertainty=0.1,
+        vary_spectra=False,
+        seed=1234,
+    )
+    result = results[1.0]
+
+    # The masses are fully correlated between bins, so the relative error in each
+    # bin and on the total flux should both match the mass uncertainty.
+    nonzero = result.spectrum.flux > 0
+    relative_errors = result.spectrum.errors[nonzero] / result.spectrum.flux[nonzero]
+    assert np.allclose(relative_errors, 0.1, rtol=0.1)
+    total_error = np.sqrt(np.sum(result.covariance))
+    assert total_error / result.spectrum.integrate() == pytest.approx(0.1, rel=0.1)
+
+
+def test_propagate_uncertainties_large() -> None:
+    """Test large relative uncertainties still give positive, finite results."""
+    cask = Cask({"Sr90": 1000.0, "Cs137": 500.0}, initial_cooling_time=0.0)
+
+    with np.errstate(over="raise", invalid="raise"):
+        results = propagate_uncertainties(
+            cask,
+            cooling_times=[1.0, 10.0],
+            n_variations=500,
+            mass_uncertainty=0.5,
+            half_life_uncertainty=0.5,
+            vary_spectra=False,
+            seed=1,
+        )
+    for result in results.values():
+        assert np.all(np.isfinite(result.spectrum.flux))
+        assert np.all(np.isfinite(result.spectrum.errors))
+        assert np.all(np.isfinite(result.covariance))
+        assert np.all(result.spectrum.flux >= 0)
+        assert result.spectrum.integrate() > 0
+
+
+def test_propagate_uncertainties_covariance() -> None:
+    """Test the covariance matrix shape and consistency with the bin errors."""
+    cask = Cask({"Sr90": 1000.0}, initial_cooling_time=0.0)
+
+    results = propagate_uncertainties(
+        cask,
+        cooling_times=[5.0],
+        n_variations=200,
+        covariance_width=50,
+        batch_size=30,
+        seed=1,
+    )
+    result = results[5.0]
+
+    n_coarse = len(result.covariance_energy) - 1
+    assert result.covariance.shape == (n_coarse, n_coarse)
+    assert result.covariance_energy[0] == result.spectrum.energy[0]
+    assert result.covariance_energy[-1] == result.spectrum.energy[-1]
+    assert np.allclose(result.covariance, result.covariance.T)
+    assert np.all(
+        np.linalg.eigvalsh(result.covariance) > -1e-6 * result.covariance.max()
+    )
+
+
+def test_propagate_uncertainties_reproducible() -> None:
+    """Test results are reproducible with a seed."""
+    cask = Cask({"Sr90": 1000.0}, initial_cooling_time=0.0)
+
+    result1 = propagate_uncertainties(cask, [1.0], n_variations=20, seed=42)[1.0]
+    result2 = propagate_uncertainties(cask, [1.0], n_variations=20, seed=42)[1.0]
+
+    assert result1.spectrum == result2.spectrum
+    assert np.array_equal(result1.covariance, result2.covariance)
+
+
+def test_propagate_uncertainties_inputs() -> None:
+    """Test that propagate_uncertainties validates its inputs."""
+    cask = Cask({"Sr90": 1000.0}, initial_cooling_time=5.0)
+
+    with pytest.raises(ValueError, match="n_variations must be at least 2"):
+        propagate_uncertainties(cask, [5.0], n_variations=1)
+    with pytest.raises(ValueError, match="batch_size must be a positive value"):
+        propagate_uncertainties(cask, [5.0], batch_size=0)
+    with pytest.raises(ValueError, match="covariance_width must be a positive"):
+        propagate_uncertainties(cask, [5.0], width=2, covariance_width=3)
+    with pytest.raises(ValueError, match="cooling_times must be a non-empty list"):
+        propagate_uncertainties(cask, [])
+    with pytest.raises(
+        ValueError, match="cannot be less than the initial cask cooling time"
+    ):
+        propagate_uncertainties(cask, [1.0])
+    with pytest.raises(ValueError, match="Relative uncertainties must be non-negative"):
+        propagate_uncertainties(cask, [5.0], mass_uncertainty={"Sr90": -0.1})
+    with pytest.raises(ValueError, match="Relative uncertainties must be non-negative"):
+        propagate_uncertainties(cask, [5.0], half_life_uncertainty=-0.1)
@@ -3,7 +3,12 @@
 import numpy as np
 import pytest
 
-from snf_simulations.utils import linear_interpolate_with_errors, sample_histogram
+from snf_simulations.utils import (
+    get_energy_grid,
+    intern_energy_grid,
+    linear_interpolate_with_errors,
+    sample_histogram,
+)
 
 # Suppress assert warnings from ruff
 # ruff: noqa: S101  # asserts
@@ -198,3 +203,40 @@ def test_sample_histogram_invalid_inputs() -> None:
             np.array([1.0, -1.0]),
             n_samples=10,
         )
+
+
+def test_intern_energy_grid() -> None:
+    """Test equal energy grids are shared as one read-only array."""
+    energy = np.array([0.0, 1.0, 3.0])
+    grid = intern_energy_grid(energy)
+    assert np.array_equal(grid, energy)
+    assert grid is not energy
+    assert not grid.flags.writeable
+    assert intern_energy_grid(energy.copy()) is grid
+    assert intern_energy_grid([0, 1, 3]) is grid
+    assert intern_energy_grid(np.array([0.0, 1.0, 4.0])) is not grid
+
+    # Changing the original array doesn't change the shared one
+    energy[0] = -1
+    assert grid[0] == 0
+    with pytest.raises(ValueError, match="read-only"):
+        grid[0] = -1
+
+
+def test_get_energy_grid() -> None:
+    """Test creating equally spaced shared energy grids."""
+    grid = get_energy_grid(0, 10, 2)
+    assert np.array_equal(grid, [0, 2, 4, 6, 8, 10])
+    assert get_energy_grid(0, 10, 2) is grid
+    assert not grid.flags.writeable
+
+
+def test_sample_histogram_float32() -> None:
+    """Test sampling a histogram with single precision bin contents."""
+    bin_edges = np.linspace(0, 1000, 1001)
+    bin_contents = np.random.default_rng(1).uniform(0, 1e6, 1000).astype(np.float32)
+    samples = sample_histogram(bin_edges, bin_contents, n_samples=100, seed=1)
+    expected = sample_histogram(
+        bin_edges, bin_contents.astype(np.float64), n_samples=100, seed=1
+    )
+    assert np.array_equal(samples, expected)